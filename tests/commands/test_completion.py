@@ -1,9 +1,14 @@
 """Command line completion tests."""
 from __future__ import annotations
 
+from itertools import starmap
 from typing import TYPE_CHECKING
 
-from xirvik.commands.utils import complete_hosts, complete_ports
+from tests.test_snapshot import LIST_JSON
+from xirvik.cache import TorrentCache
+from xirvik.client import _decode_torrent_row  # ruff:ignore[import-private-name]
+from xirvik.commands.utils import complete_hashes, complete_hosts, complete_ports
+import click
 
 if TYPE_CHECKING:
     import pathlib
@@ -79,3 +84,16 @@ def test_complete_ports_empty() -> None:
     assert '80' in ports
     assert '8080' in ports
     assert '443' in ports
+
+
+def test_complete_hashes(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('HOME', str(tmp_path))
+    TorrentCache().put('machine.com:443', list(starmap(_decode_torrent_row,
+                                                       LIST_JSON['t'].items())))
+    ctx = click.Context(click.Command('list-files'))
+    assert complete_hashes(ctx, None, 'hash') == []
+    ctx.params['host'] = 'machine.com'
+    assert complete_hashes(ctx, None, 'hash') == ['hash1', 'hash2', 'hash3']
+    assert complete_hashes(ctx, None, 'hash2') == ['hash2']
+    ctx.params['port'] = 8080
+    assert complete_hashes(ctx, None, 'hash') == []
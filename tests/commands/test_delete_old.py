@@ -2,12 +2,14 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import TYPE_CHECKING, NamedTuple
+from typing import TYPE_CHECKING, Any, NamedTuple
 from unittest.mock import AsyncMock
+import json
 import xmlrpc.client as xmlrpc
 
 from niquests.exceptions import HTTPError
 from tests.conftest import async_iter
+from xirvik.client import label_filter
 from xirvik.commands.root import xirvik
 
 if TYPE_CHECKING:
@@ -15,6 +17,7 @@ if TYPE_CHECKING:
 
     from click.testing import CliRunner
     from pytest_mock import MockerFixture
+    from xirvik.tracing import Tracer
 
 
 class MinimalTorrentDict(NamedTuple):
@@ -33,7 +36,7 @@ def _patch_client(mocker: MockerFixture,
     client_mock.return_value.__aenter__.return_value = client_mock.return_value
     if torrents is not None:
         client_mock.return_value.list_torrents.return_value = async_iter(torrents)
-    client_mock.return_value.delete = AsyncMock()
+    client_mock.return_value.delete_many = AsyncMock(side_effect=dict.fromkeys)
     return client_mock
 
 
@@ -59,7 +62,7 @@ def test_delete_old_list_torrents_invalid_for_deletion(runner: CliRunner, mocker
     assert runner.invoke(
         xirvik,
         ('rtorrent', 'delete-old', '--label', 'the-label', '-H', 'machine.com')).exit_code == 0
-    assert client_mock.return_value.delete.call_count == 0
+    assert client_mock.return_value.delete_many.call_count == 0
 
 
 def test_delete_old_list_torrents_dict_invalid_for_deletion2(runner: CliRunner,
@@ -71,7 +74,7 @@ def test_delete_old_list_torrents_dict_invalid_for_deletion2(runner: CliRunner,
     assert runner.invoke(
         xirvik,
         ('rtorrent', 'delete-old', '--label', 'the-label', '-H', 'machine.com')).exit_code == 0
-    assert client_mock.return_value.delete.call_count == 0
+    assert client_mock.return_value.delete_many.call_count == 0
 
 
 def test_delete_old_dry_run(runner: CliRunner, mocker: MockerFixture,
@@ -88,7 +91,7 @@ def test_delete_old_dry_run(runner: CliRunner, mocker: MockerFixture,
         ])
     assert runner.invoke(xirvik, ('rtorrent', 'delete-old', '--dry-run', '--label', 'the-label',
                                   '-H', 'machine.com')).exit_code == 0
-    assert client_mock.return_value.delete.call_count == 0
+    assert client_mock.return_value.delete_many.call_count == 0
 
 
 def test_delete_old_normal(runner: CliRunner, mocker: MockerFixture,
@@ -107,8 +110,11 @@ def test_delete_old_normal(runner: CliRunner, mocker: MockerFixture,
     assert runner.invoke(
         xirvik,
         ('rtorrent', 'delete-old', '--label', 'the-label', '-H', 'machine.com')).exit_code == 0
-    assert client_mock.return_value.delete.call_count == 1
-    assert sleep_mock.call_count == 1
+    assert client_mock.return_value.delete_many.call_count == 1
+    assert sleep_mock.call_count == 0
+    list_kwargs = client_mock.return_value.list_torrents.call_args.kwargs
+    assert list_kwargs['view'] == 'complete'
+    assert list_kwargs['filter'] == label_filter('the-label')
 
 
 def test_delete_old_ignore_ratio(runner: CliRunner, mocker: MockerFixture,
@@ -126,8 +132,8 @@ def test_delete_old_ignore_ratio(runner: CliRunner, mocker: MockerFixture,
         ])
     assert runner.invoke(xirvik, ('rtorrent', 'delete-old', '--label', 'the-label',
                                   '--ignore-ratio', '-H', 'machine.com')).exit_code == 0
-    assert client_mock.return_value.delete.call_count == 1
-    assert sleep_mock.call_count == 1
+    assert client_mock.return_value.delete_many.call_count == 1
+    assert sleep_mock.call_count == 0
 
 
 def test_delete_old_ignore_date(runner: CliRunner, mocker: MockerFixture,
@@ -145,8 +151,8 @@ def test_delete_old_ignore_date(runner: CliRunner, mocker: MockerFixture,
         ])
     assert runner.invoke(xirvik, ('rtorrent', 'delete-old', '--label', 'the-label', '--ignore-date',
                                   '-H', 'machine.com')).exit_code == 0
-    assert client_mock.return_value.delete.call_count == 1
-    assert sleep_mock.call_count == 1
+    assert client_mock.return_value.delete_many.call_count == 1
+    assert sleep_mock.call_count == 0
 
 
 def test_delete_old_xmlrpc_fault(runner: CliRunner, mocker: MockerFixture,
@@ -162,10 +168,11 @@ def test_delete_old_xmlrpc_fault(runner: CliRunner, mocker: MockerFixture,
                                ratio=2,
                                creation_date=datetime.now(timezone.utc) - timedelta(days=14))
         ])
-    client_mock.return_value.delete.side_effect = xmlrpc.Fault(200, 'ss')
+    client_mock.return_value.delete_many.side_effect = lambda hashes: dict.fromkeys(
+        hashes, xmlrpc.Fault(200, 'ss'))
     assert runner.invoke(xirvik, ('rtorrent', 'delete-old', '--label', 'the-label',
                                   '--max-attempts', '3', '-H', 'machine.com')).exit_code == 0
-    assert client_mock.return_value.delete.call_count == 3
+    assert client_mock.return_value.delete_many.call_count == 3
     assert sleep_mock.call_count == 3
 
 
@@ -182,9 +189,72 @@ def test_delete_old_protocol_error(runner: CliRunner, mocker: MockerFixture,
                                ratio=2,
                                creation_date=datetime.now(timezone.utc) - timedelta(days=14))
         ])
-    client_mock.return_value.delete.side_effect = xmlrpc.ProtocolError(
+    client_mock.return_value.delete_many.side_effect = xmlrpc.ProtocolError(
         'https://machine.com', 500, 'ss', {})
     assert runner.invoke(xirvik, ('rtorrent', 'delete-old', '--label', 'the-label',
                                   '--max-attempts', '3', '-H', 'machine.com')).exit_code == 0
-    assert client_mock.return_value.delete.call_count == 3
+    assert client_mock.return_value.delete_many.call_count == 3
     assert sleep_mock.call_count == 3
+
+
+def test_delete_old_batches(runner: CliRunner, mocker: MockerFixture,
+                            tmp_netrc: pathlib.Path) -> None:
+    sleep_mock = mocker.patch('xirvik.commands.delete_old.anyio.sleep', new_callable=AsyncMock)
+    client_mock = _patch_client(mocker,
+                                torrents=[
+                                    MinimalTorrentDict(f'hash{i}',
+                                                       name=f'Test #{i}',
+                                                       left_bytes=0,
+                                                       custom1='the-label',
+                                                       ratio=2) for i in range(3)
+                                ])
+    faults = [{'hash0': None, 'hash1': xmlrpc.Fault(200, 'ss')}, {'hash1': None}, {'hash2': None}]
+    client_mock.return_value.delete_many.side_effect = faults
+    assert runner.invoke(xirvik, ('rtorrent', 'delete-old', '--label', 'the-label', '--batch-size',
+                                  '2', '-H', 'machine.com')).exit_code == 0
+    assert [x.args[0]
+            for x in client_mock.return_value.delete_many.call_args_list] == [['hash0', 'hash1'],
+                                                                              ['hash1'], ['hash2']]
+    # Only the retry backs off. Batches are paced by the client's limiters.
+    assert [x.args[0] for x in sleep_mock.call_args_list] == [5]
+
+
+def test_delete_old_trace_file(runner: CliRunner, mocker: MockerFixture, tmp_netrc: pathlib.Path,
+                               tmp_path: pathlib.Path) -> None:
+    mocker.patch('xirvik.commands.delete_old.anyio.sleep', new_callable=AsyncMock)
+    client_mock = _patch_client(mocker,
+                                torrents=[
+                                    MinimalTorrentDict('hash1',
+                                                       name='Test #1',
+                                                       left_bytes=0,
+                                                       custom1='the-label',
+                                                       ratio=2)
+                                ])
+    client_mock.return_value.delete_many.side_effect = [{
+        'hash1': xmlrpc.Fault(200, 'ss')
+    }, {
+        'hash1': None
+    }]
+
+    def make_client(*args: Any, tracer: Tracer, **kwargs: Any) -> Any:
+        client_mock.return_value.tracer = tracer
+        return client_mock.return_value
+
+    client_mock.side_effect = make_client
+    trace_file = tmp_path / 'trace.jsonl'
+    assert runner.invoke(xirvik, ('rtorrent', 'delete-old', '--label', 'the-label', '--trace-file',
+                                  str(trace_file), '-H', 'machine.com')).exit_code == 0
+    spans = {
+        x['name']: x
+        for x in map(json.loads,
+                     trace_file.read_text(encoding='utf-8').splitlines())
+    }
+    assert list(spans) == ['list', 'filter', 'sleep', 'act', 'delete-old']
+    root = spans['delete-old']
+    assert root['parent_span_id'] is None
+    assert spans['list']['parent_span_id'] == root['span_id']
+    assert spans['list']['attributes'] == {'xirvik.torrent_count': 1}
+    assert spans['filter']['attributes'] == {'xirvik.hash_count': 1}
+    assert spans['act']['parent_span_id'] == root['span_id']
+    assert spans['sleep']['parent_span_id'] == spans['act']['span_id']
+    assert spans['sleep']['attributes'] == {'xirvik.seconds': 5}
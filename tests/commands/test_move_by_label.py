@@ -134,7 +134,6 @@ def test_move_torrent_lower(runner: CliRunner, mocker: MockerFixture, tmp_path:
     netrc = tmp_path / '.netrc'
     netrc.write_text('machine machine.com login some_name password pass\n')
     monkeypatch.setenv('HOME', str(tmp_path))
-    mocker.patch('xirvik.commands.move_by_label.anyio.sleep', new_callable=AsyncMock)
     client_mock = _patch_client(mocker,
                                 torrents=[
                                     MinimalTorrentDict('hash1',
@@ -149,13 +148,11 @@ def test_move_torrent_lower(runner: CliRunner, mocker: MockerFixture, tmp_path:
                                                                   '/downloads/_completed/test me')
 
 
-def test_move_torrent_sleep_after_10(runner: CliRunner, mocker: MockerFixture,
-                                     tmp_path: pathlib.Path,
-                                     monkeypatch: pytest.MonkeyPatch) -> None:
+def test_move_torrent_rate_limit(runner: CliRunner, mocker: MockerFixture, tmp_path: pathlib.Path,
+                                 monkeypatch: pytest.MonkeyPatch) -> None:
     netrc = tmp_path / '.netrc'
     netrc.write_text('machine machine.com login some_name password pass\n')
     monkeypatch.setenv('HOME', str(tmp_path))
-    sleep_mock = mocker.patch('xirvik.commands.move_by_label.anyio.sleep', new_callable=AsyncMock)
     tl_len = 10
     torrent_list = [
         MinimalTorrentDict(f'hash{i}',
@@ -166,6 +163,55 @@ def test_move_torrent_sleep_after_10(runner: CliRunner, mocker: MockerFixture,
     ]
     client_mock = _patch_client(mocker, torrents=torrent_list)
     assert runner.invoke(
-        xirvik, ('rtorrent', 'move-by-label', '-l', '-t', '10', '-H', 'machine.com')).exit_code == 0
+        xirvik, ('rtorrent', 'move-by-label', '-l', '--rate-limit', '2', '--endpoint-rate-limit',
+                 'datadir=0.5', '-H', 'machine.com')).exit_code == 0
     assert client_mock.return_value.move_torrent.call_count == tl_len
-    sleep_mock.assert_any_call(tl_len)
+    kwargs = client_mock.call_args.kwargs
+    assert kwargs['rate_limit'] == 2
+    assert kwargs['rate_burst'] == 10
+    assert kwargs['endpoint_rate_limits'] == {'datadir': 0.5}
+
+
+def test_move_torrent_bad_endpoint_rate_limit(runner: CliRunner, mocker: MockerFixture,
+                                              tmp_path: pathlib.Path,
+                                              monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    client_mock = _patch_client(mocker, torrents=[])
+    for value in ('nope=1', 'datadir=x'):
+        assert runner.invoke(xirvik, ('rtorrent', 'move-by-label', '--endpoint-rate-limit', value,
+                                      '-H', 'machine.com')).exit_code != 0
+    client_mock.assert_not_called()
+
+
+def test_move_torrent_deprecated_options(runner: CliRunner, mocker: MockerFixture,
+                                         tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch,
+                                         caplog: pytest.LogCaptureFixture) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    _patch_client(mocker, torrents=[])
+    assert runner.invoke(xirvik, ('rtorrent', 'move-by-label', '-b', '2', '--sleep-time', '7', '-H',
+                                  'machine.com')).exit_code == 0
+    assert 'Option --batch-size is deprecated and has no effect.' in caplog.messages
+    assert 'Option --sleep-time is deprecated and has no effect.' in caplog.messages
+    assert '--sleep-time' not in runner.invoke(xirvik,
+                                               ('rtorrent', 'move-by-label', '--help')).output
+
+
+def test_move_torrent_failure(runner: CliRunner, mocker: MockerFixture, tmp_path: pathlib.Path,
+                              monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    torrent_list = [
+        MinimalTorrentDict(f'hash{i}',
+                           custom1='TEST me',
+                           name='The Name',
+                           base_path='/downloads/_completed') for i in range(3)
+    ]
+    client_mock = _patch_client(mocker, torrents=torrent_list)
+    client_mock.return_value.move_torrent.side_effect = [None, HTTPError, None]
+    assert runner.invoke(xirvik, ('rtorrent', 'move-by-label', '-H', 'machine.com')).exit_code != 0
+    assert client_mock.return_value.move_torrent.call_count == 3
@@ -4,6 +4,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING, NamedTuple
 from unittest.mock import AsyncMock
 
+from niquests.exceptions import HTTPError
 from tests.conftest import async_iter
 from xirvik.commands.root import xirvik
 
@@ -62,12 +63,11 @@ def test_move_erroneous_normal(runner: CliRunner, mocker: MockerFixture, tmp_pat
     assert client_mock.return_value.stop.call_args_list[1].args[0] == 'hash1'
 
 
-def test_move_erroneous_sleep(runner: CliRunner, mocker: MockerFixture, tmp_path: pathlib.Path,
-                              monkeypatch: pytest.MonkeyPatch) -> None:
+def test_move_erroneous_many(runner: CliRunner, mocker: MockerFixture, tmp_path: pathlib.Path,
+                             monkeypatch: pytest.MonkeyPatch) -> None:
     netrc = tmp_path / '.netrc'
     netrc.write_text('machine machine.com login some_name password pass\n')
     monkeypatch.setenv('HOME', str(tmp_path))
-    sleep_mock = mocker.patch('xirvik.commands.move_erroneous.anyio.sleep', new_callable=AsyncMock)
     client_mock = _patch_client(mocker,
                                 torrents=[
                                     MinimalTorrentDict(f'hash{i}',
@@ -79,4 +79,28 @@ def test_move_erroneous_sleep(runner: CliRunner, mocker: MockerFixture, tmp_path
     assert client_mock.return_value.move_torrent.call_count == 12
     assert client_mock.return_value.remove.call_count == 12
     assert client_mock.return_value.stop.call_count == 24
-    assert sleep_mock.call_count == 3
+    assert client_mock.call_args.kwargs['rate_limit'] is None
+
+
+def test_move_erroneous_failure(runner: CliRunner, mocker: MockerFixture, tmp_path: pathlib.Path,
+                                monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    client_mock = _patch_client(mocker,
+                                torrents=[
+                                    MinimalTorrentDict(f'hash{i}',
+                                                       message='unregistered torrent',
+                                                       name=f'Test #{i}',
+                                                       custom1='anything') for i in range(3)
+                                ])
+
+    def move_torrent(hash_: str, _: str) -> None:
+        if hash_ == 'hash1':
+            raise HTTPError
+
+    client_mock.return_value.move_torrent.side_effect = move_torrent
+    assert runner.invoke(xirvik, ('rtorrent', 'move-erroneous', '-H', 'machine.com')).exit_code != 0
+    assert client_mock.return_value.move_torrent.call_count == 3
+    assert sorted(
+        x.args[0] for x in client_mock.return_value.remove.call_args_list) == ['hash0', 'hash2']
@@ -3,13 +3,14 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING, NamedTuple
+from typing import TYPE_CHECKING, Any, NamedTuple
 from unittest.mock import AsyncMock
 import json
 import re
 
 from tests.conftest import async_iter
 from xirvik.commands.root import xirvik
+from xirvik.json_backend import JSON_BACKENDS, get_json_backend
 from xirvik.typing import FileDownloadStrategy, FilePriority, TorrentTrackedFile
 import pytest
 
@@ -65,6 +66,26 @@ def test_start_torrents_normal(runner: CliRunner, niquests_mock: MockRouter, tmp
     assert route.call_count == 1
 
 
+def test_start_torrents_one_request(runner: CliRunner, niquests_mock: MockRouter, tmp_path: Path,
+                                    monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    torrents = [tmp_path / 'a.torrent', tmp_path / 'b.torrent']
+    for torrent in torrents:
+        torrent.write_bytes(b'\xFF')
+    route = niquests_mock.post('https://machine.com:443/rtorrent/php/addtorrent.php?').respond(
+        json=[{
+            'status': 'Success'
+        }, {
+            'status': 'Failed'
+        }])
+    assert runner.invoke(xirvik,
+                         ('rtorrent', 'add', '-H', 'machine.com', str(Path.home()))).exit_code == 0
+    assert route.call_count == 1
+    assert [x.is_file() for x in sorted(torrents)] == [False, True]
+
+
 def test_start_torrents_error_uploading(runner: CliRunner, niquests_mock: MockRouter,
                                         tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     netrc = tmp_path / '.netrc'
@@ -220,6 +241,8 @@ def _patch_client_async(mocker: MockerFixture,
         client_mock.return_value.list_torrents.return_value = async_iter(torrents)
     if files is not None:
         client_mock.return_value.list_files.return_value = async_iter(files)
+        client_mock.return_value.list_files_many.side_effect = lambda hashes: async_iter(
+            (hash_, files) for hash_ in hashes)
     return client_mock
 
 
@@ -241,6 +264,106 @@ def test_list_torrents(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
     assert re.match(r'^hash1\s+The Name\s+TEST me', lines[1])
 
 
+def test_list_torrents_metrics_file(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
+                                    monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    client_mock = _patch_client_async(mocker, torrents=[MinimalTorrentDict('hash1')])
+
+    def list_torrents(**_: Any) -> Any:
+        client_mock.call_args.kwargs['metrics'].record('multirpc', 'list', 0.1)
+        return async_iter([MinimalTorrentDict('hash1')])
+
+    client_mock.return_value.list_torrents.side_effect = list_torrents
+    path = tmp_path / 'xirvik.prom'
+    assert runner.invoke(xirvik,
+                         ('rtorrent', 'list-torrents', '-H', 'machine.com', '--metrics-file',
+                          str(path))).exit_code == 0
+    assert ('xirvik_requests_total{endpoint="multirpc",mode="list"} 1'
+            in path.read_text(encoding='utf-8').splitlines())
+
+
+def test_export_torrents(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
+                         monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    client_mock = _patch_client_async(
+        mocker, torrents=[MinimalTorrentDict('hash1'),
+                          MinimalTorrentDict('hash2')])
+    client_mock.return_value.save_torrents = mocker.AsyncMock(return_value={
+        'hash1': True,
+        'hash2': True
+    })
+    assert runner.invoke(xirvik, ('rtorrent', 'export-torrents', '-H', 'machine.com', '-o',
+                                  str(tmp_path / 'out'), '-c', '8')).exit_code == 0
+    client_mock.return_value.save_torrents.assert_called_once_with(['hash1', 'hash2'],
+                                                                   tmp_path / 'out', 8)
+
+
+def test_export_torrents_tar(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
+                             monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    client_mock = _patch_client_async(mocker)
+    client_mock.return_value.save_torrents = mocker.AsyncMock(return_value={
+        'hash1': True,
+        'hash2': False
+    })
+    result = runner.invoke(xirvik, ('rtorrent', 'export-torrents', '-H', 'machine.com', '-t',
+                                    str(tmp_path / 'out.tar'), 'hash1', 'hash2'))
+    assert result.exit_code == 1
+    args = client_mock.return_value.save_torrents.call_args.args
+    assert args[0] == ('hash1', 'hash2')
+    assert args[1].name == str(tmp_path / 'out.tar')
+    client_mock.return_value.list_torrents.assert_not_called()
+
+
+def test_export_torrents_conflicting_options(runner: CliRunner, mocker: MockerFixture,
+                                             tmp_path: Path,
+                                             monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    client_mock = _patch_client_async(mocker)
+    assert runner.invoke(xirvik, ('rtorrent', 'export-torrents', '-H', 'machine.com', '-o',
+                                  str(tmp_path), '-t', '-')).exit_code == 1
+    client_mock.assert_not_called()
+
+
+def test_list_torrents_cache(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
+                             monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    client_mock = _patch_client_async(mocker, torrents=[MinimalTorrentDict('hash1')])
+    assert runner.invoke(xirvik, ('rtorrent', 'list-torrents', '-H', 'machine.com', '--cache',
+                                  '--cache-max-age', '60', '--refresh')).exit_code == 0
+    cache = client_mock.call_args.kwargs['cache']
+    assert cache.max_age == 60
+    assert cache.path == tmp_path / '.cache/xirvik/torrents.sqlite3'
+    client_mock.return_value.list_torrents.assert_called_once_with(refresh=True)
+
+
+def test_list_torrents_connection_options(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
+                                          monkeypatch: pytest.MonkeyPatch) -> None:
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    config = tmp_path / 'xirvik.yml'
+    config.write_text('list-torrents:\n  multiplexed: true\n  read-timeout: 5\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    client_mock = _patch_client_async(mocker, torrents=[MinimalTorrentDict('hash1')])
+    assert runner.invoke(xirvik, ('rtorrent', 'list-torrents', '-H', 'machine.com', '-C',
+                                  str(config), '--pool-maxsize', '4')).exit_code == 0
+    kwargs = client_mock.call_args.kwargs
+    assert kwargs['multiplexed'] is True
+    assert kwargs['read_timeout'] == 5
+    assert kwargs['pool_maxsize'] == 4
+    assert kwargs['pool_connections'] == 10
+
+
 def test_list_torrents_json(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
                             monkeypatch: pytest.MonkeyPatch) -> None:
     netrc = tmp_path / '.netrc'
@@ -418,6 +541,24 @@ def test_list_files(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
     assert data[1]['name'] == 'file2'
 
 
+@pytest.mark.parametrize('name', JSON_BACKENDS)
+def test_list_files_json_backend(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
+                                 monkeypatch: pytest.MonkeyPatch, name: str) -> None:
+    pytest.importorskip(name)
+    netrc = tmp_path / '.netrc'
+    netrc.write_text('machine machine.com login some_name password pass\n')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    mocker.patch('xirvik.commands.simple.get_json_backend', return_value=get_json_backend(name))
+    _patch_client_async(mocker,
+                        files=[
+                            TorrentTrackedFile('fïle ☃', 512, 512, 1000, FilePriority.HIGH,
+                                               FileDownloadStrategy.NORMAL)
+                        ])
+    result = runner.invoke(xirvik, ('rtorrent', 'list-files', '--table-format', 'json', 'hash1'))
+    assert result.output == ('[{"name":"fïle ☃","number_of_pieces":512,"downloaded_pieces":512,'
+                             '"size_bytes":1000,"priority_id":2,"download_strategy_id":0}]\n')
+
+
 def test_list_files_reversed(runner: CliRunner, mocker: MockerFixture, tmp_path: Path,
                              monkeypatch: pytest.MonkeyPatch) -> None:
     netrc = tmp_path / '.netrc'
@@ -3,14 +3,18 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any, NoReturn
 import os
+import xmlrpc.client
 
 from click.testing import CliRunner
+from niquests_mock import build_response
 import pytest
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncIterator, Iterable
+    from collections.abc import AsyncIterator, Callable, Iterable
     import pathlib
 
+    from niquests.models import PreparedRequest, Response
+
 if os.getenv('_PYTEST_RAISE', '0') != '0':  # pragma no cover
 
     @pytest.hookimpl(tryfirst=True)
@@ -57,3 +61,38 @@ async def async_iter(items: Iterable[Any]) -> AsyncIterator[Any]:  # ruff:ignore
     """
     for item in items:
         yield item
+
+
+def xmlrpc_responder(
+    handler: Callable[..., Any],
+    form_handler: Callable[[PreparedRequest], Response] | None = None
+) -> Callable[[PreparedRequest], Response]:
+    """
+    Create a mock side effect that answers XML-RPC requests.
+
+    Parameters
+    ----------
+    handler : Callable[..., Any]
+        Called with the method name and parameters of each request. The return value is sent as
+        the response. If it raises :py:class:`xmlrpc.client.Fault`, a fault response is sent.
+    form_handler : Callable[[PreparedRequest], Response] | None
+        Called with requests that are not XML-RPC requests, such as ``mode=setlabel``.
+
+    Returns
+    -------
+    Callable[[PreparedRequest], Response]
+        Side effect for a ``niquests_mock`` route.
+    """
+    def side_effect(request: PreparedRequest) -> Response:
+        if form_handler is not None and not (isinstance(request.body, bytes)
+                                             and request.body.startswith(b'<?xml')):
+            return form_handler(request)
+        assert isinstance(request.body, bytes)
+        params, method = xmlrpc.client.loads(request.body)
+        try:
+            content = xmlrpc.client.dumps((handler(method, *params),), methodresponse=True)
+        except xmlrpc.client.Fault as e:
+            content = xmlrpc.client.dumps(e)
+        return build_response(request, content=content.encode())
+
+    return side_effect
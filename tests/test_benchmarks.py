@@ -0,0 +1,254 @@
+"""Micro-benchmarks for hot paths in the client."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from itertools import starmap
+from typing import TYPE_CHECKING, Any
+import inspect
+import json
+import logging
+import operator
+import time
+import tracemalloc
+
+from niquests_mock import build_response
+from tests.conftest import alist, xmlrpc_responder
+from xirvik.client import (
+    _decode_file_row,  # ruff:ignore[import-private-name]
+    _decode_lazy_torrent_row,  # ruff:ignore[import-private-name]
+    _decode_torrent_row,  # ruff:ignore[import-private-name]
+    ruTorrentClient,
+)
+from xirvik.commands.delete_old import _select  # ruff:ignore[import-private-name]
+from xirvik.json_backend import get_json_backend
+from xirvik.snapshot import TorrentSnapshot
+from xirvik.typing import (
+    FIRST_YEAR_XIRVIK,
+    CompactTorrentInfo,
+    CompactTorrentTrackedFile,
+    TorrentInfo,
+)
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from niquests.models import PreparedRequest, Response
+    from niquests_mock import MockRouter
+
+log = logging.getLogger(__name__)
+ROWS = 5000
+DELETE_OLD_ROWS = 100_000
+SNAPSHOT_ROWS = 50_000
+FILES = 100_000
+HASHES = 100
+RTT = 0.002
+
+
+def _make_row(i: int) -> list[str]:
+    return [
+        '1', '0', '1', '1', f'torrent {i}', '250952849', '958', '958', '250952849', '357999402',
+        '1426', '0', '0', '262144', 'label', '0', '0', '0', '0', '0', '1', '1633423132', '0', '0',
+        '0', f'/downloads/torrent {i}', '1633423000', '0', '1', '', '', '0', '0', '1', '',
+        '1633423132\n'
+    ]
+
+
+def _legacy_decode(hash_: str, x: list[Any]) -> TorrentInfo:
+    # Decoding as done before the decoder table was introduced.
+    annots = inspect.get_annotations(TorrentInfo)
+    del x[34]
+    for i, (type_cls, val) in enumerate(
+            zip((t[1] for t in list(annots.items())[1:]), (y.strip() for y in x), strict=False)):
+        match type_cls if isinstance(type_cls, str) else type_cls.__forward_arg__:
+            case 'datetime | None':
+                try:
+                    x[i] = datetime.fromtimestamp(float(val.strip() or '0'), timezone.utc)
+                    if x[i].year < FIRST_YEAR_XIRVIK:
+                        x[i] = None
+                except ValueError:  # pragma no cover
+                    x[i] = None
+            case 'int' | 'HashingState' | 'State':
+                x[i] = int(val)
+            case 'float':
+                x[i] = float(val)
+            case 'bool':
+                x[i] = bool(int(val))
+            case _:
+                x[i] = val
+    return TorrentInfo(hash_, *x)
+
+
+def _rows_per_second(decode: Callable[[str, list[Any]], TorrentInfo],
+                     rows: list[list[str]]) -> tuple[float, list[TorrentInfo]]:
+    start = time.perf_counter()
+    ret = [decode(f'hash{i}', row) for i, row in enumerate(rows)]
+    return len(rows) / (time.perf_counter() - start), ret
+
+
+def test_decode_torrent_rows_benchmark() -> None:
+    legacy_rate, legacy = _rows_per_second(_legacy_decode, [_make_row(i) for i in range(ROWS)])
+    table_rate, decoded = _rows_per_second(_decode_torrent_row, [_make_row(i) for i in range(ROWS)])
+    log.info('list_torrents row decoding: %.0f rows/s before, %.0f rows/s after', legacy_rate,
+             table_rate)
+    assert decoded == legacy
+
+
+def _delete_old(decode: Callable[[str, list[Any]], TorrentInfo], rows: dict[str, list[str]], *,
+                dry_run: bool) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    selected = _select(starmap(decode, rows.items()),
+                       'label',
+                       14,
+                       ignore_ratio=False,
+                       ignore_date=False,
+                       dry_run=dry_run)
+    return time.perf_counter() - start, selected
+
+
+def test_lazy_torrent_info_delete_old_benchmark() -> None:
+    rows = {}
+    for i in range(DELETE_OLD_ROWS):
+        row = _make_row(i)
+        # Mix incomplete, unlabelled, low ratio and old torrents so each test of delete-old runs.
+        row[19] = str(i % 3)
+        row[14] = 'label' if i % 5 else 'other'
+        row[10] = str(i % 2000)
+        rows[f'hash{i}'] = row
+    eager_time, _ = _delete_old(_decode_torrent_row, rows, dry_run=True)
+    lazy_time, _ = _delete_old(_decode_lazy_torrent_row, rows, dry_run=True)
+    log.info(
+        'delete-old dry run over %d torrents: %.3f s with eager records, %.3f s with lazy '
+        'records', DELETE_OLD_ROWS, eager_time, lazy_time)
+    _, eager = _delete_old(_decode_torrent_row, rows, dry_run=False)
+    _, lazy = _delete_old(_decode_lazy_torrent_row, rows, dry_run=False)
+    assert lazy == eager
+    assert eager
+
+
+def _allocated(build: Callable[[], list[Any]]) -> tuple[int, list[Any]]:
+    tracemalloc.start()
+    try:
+        ret = build()
+        return tracemalloc.get_traced_memory()[0], ret
+    finally:
+        tracemalloc.stop()
+
+
+def test_compact_torrent_info_memory_benchmark() -> None:
+    rows = [_make_row(i) for i in range(ROWS)]
+    eager_size, eager = _allocated(
+        lambda: [_decode_torrent_row(f'hash{i}', row) for i, row in enumerate(rows)])
+    compact_size, compact = _allocated(
+        lambda:
+        [_decode_torrent_row(f'hash{i}', row, CompactTorrentInfo) for i, row in enumerate(rows)])
+    log.info('Memory of %d torrents: %.0f bytes per TorrentInfo, %.0f bytes per CompactTorrentInfo',
+             ROWS, eager_size / ROWS, compact_size / ROWS)
+    assert compact == eager
+    assert compact_size < eager_size
+
+
+def test_compact_torrent_tracked_file_memory_benchmark() -> None:
+    rows = [[
+        f'/downloads/torrent/file {i}.mkv',
+        str(958 + i),
+        str(i),
+        str(250952849 + i), '1', '0'
+    ] for i in range(FILES)]
+    eager_size, eager = _allocated(lambda: [_decode_file_row(row) for row in rows])
+    compact_size, compact = _allocated(
+        lambda: [_decode_file_row(row, CompactTorrentTrackedFile) for row in rows])
+    log.info(
+        'Memory of %d files: %.0f bytes per TorrentTrackedFile, %.0f bytes per '
+        'CompactTorrentTrackedFile', FILES, eager_size / FILES, compact_size / FILES)
+    assert compact == eager
+    assert compact_size < eager_size
+
+
+def _mask_per_row(snapshot: TorrentSnapshot, field: str, predicate: Callable[[Any],
+                                                                             bool]) -> list[bool]:
+    return [predicate(x) for x in snapshot.column(field)]
+
+
+def test_snapshot_benchmark() -> None:
+    rows = {}
+    for i in range(SNAPSHOT_ROWS):
+        row = _make_row(i)
+        row[14] = 'label' if i % 5 else 'other'
+        row[19] = str(i % 3)
+        rows[f'hash{i}'] = row
+    start = time.perf_counter()
+    # Building the snapshot as done before rows were decoded straight into the columns.
+    legacy = TorrentSnapshot(starmap(_decode_torrent_row, rows.items()))
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    snapshot = TorrentSnapshot()
+    snapshot.extend_rows(rows.items())
+    snapshot_time = time.perf_counter() - start
+    start = time.perf_counter()
+    # Filtering as done before compare(), with a Python call per row.
+    mask = [
+        a and b for a, b in zip(_mask_per_row(legacy, 'custom1', lambda x: x == 'label'),
+                                _mask_per_row(legacy, 'left_bytes', lambda x: x == 0),
+                                strict=True)
+    ]
+    mask_time = time.perf_counter() - start
+    start = time.perf_counter()
+    compared = list(
+        map(operator.and_, snapshot.compare('custom1', operator.eq, 'label'),
+            snapshot.compare('left_bytes', operator.eq, 0)))
+    compare_time = time.perf_counter() - start
+    log.info(
+        'Snapshot of %d torrents: built in %.3f s from TorrentInfo and %.3f s from rows, filtered '
+        'in %.4f s with a Python call per row and %.4f s with compare()', SNAPSHOT_ROWS,
+        legacy_time, snapshot_time, mask_time, compare_time)
+    assert compared == mask
+    assert list(snapshot.filter(compared)) == list(legacy.filter(mask))
+
+
+def test_json_backend_decode_benchmark() -> None:
+    pytest.importorskip('orjson')
+    body = json.dumps({'t': {f'hash{i}': _make_row(i) for i in range(ROWS)}, 'cid': 92385}).encode()
+    times = {}
+    for name in ('json', 'orjson'):
+        loads = get_json_backend(name).loads
+        start = time.perf_counter()
+        decoded = loads(body)
+        times[name] = time.perf_counter() - start
+        assert len(decoded['t']) == ROWS
+    log.info('Decoding a %d-torrent list (%d bytes): %.4f s with json, %.4f s with orjson', ROWS,
+             len(body), times['json'], times['orjson'])
+
+
+async def test_list_files_many_benchmark(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    hashes = [f'hash{i}' for i in range(HASHES)]
+    round_trips = 0
+
+    def per_hash(request: PreparedRequest) -> Response:
+        nonlocal round_trips
+        round_trips += 1
+        time.sleep(RTT)
+        return build_response(request, json=[['file', '14', '13', '8192', '1', '0', '0']])
+
+    def multicall(_: str, call_list: list[dict[str, Any]]) -> list[Any]:
+        nonlocal round_trips
+        round_trips += 1
+        time.sleep(RTT)
+        return [[[['file', 14, 13, 8192, 1, 0]]] for _ in call_list]
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=per_hash)
+    start = time.perf_counter()
+    per_hash_files = [await alist(client.list_files(h)) for h in hashes]
+    per_hash_time = time.perf_counter() - start
+    assert round_trips == HASHES
+    round_trips = 0
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(multicall))
+    start = time.perf_counter()
+    batched = await alist(client.list_files_many(hashes, chunk_size=50))
+    batched_time = time.perf_counter() - start
+    log.info(
+        'Listing files of %d torrents: %.3f s with %d requests before, %.3f s with %d requests '
+        'after', HASHES, per_hash_time, HASHES, batched_time, round_trips)
+    assert round_trips == 2
+    assert [files for _, files in batched] == per_hash_files
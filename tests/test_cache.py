@@ -0,0 +1,122 @@
+"""Torrent cache tests."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import sqlite3
+
+from tests.conftest import alist
+from tests.test_snapshot import LIST_JSON
+from xirvik.cache import TorrentCache
+from xirvik.client import ruTorrentClient
+from xirvik.typing import CompactTorrentInfo, LazyTorrentInfo
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from niquests_mock import MockRouter
+    from pytest_mock.plugin import MockerFixture
+
+
+async def test_list_torrents_cached(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    cache = TorrentCache(tmp_path / 'cache.sqlite3')
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', cache=cache)
+    niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    expected = await alist(client.list_torrents())
+    assert cache.get('hostname-test.com:443') == expected
+    assert cache.get('other-host.com') is None
+    # Served from the cache, so no further request is mocked.
+    assert await alist(client.list_torrents()) == expected
+    assert expected[0].finished is not None
+
+
+async def test_list_torrents_cached_port(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    cache = TorrentCache(tmp_path / 'cache.sqlite3')
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', cache=cache)
+    route = niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    expected = await alist(client.list_torrents())
+    # A client given the default port explicitly shares the entry.
+    other = ruTorrentClient('hostname-test.com:443', 'a', 'b', cache=cache)
+    assert await alist(other.list_torrents()) == expected
+    assert route.call_count == 1
+
+
+def test_cache_key() -> None:
+    assert TorrentCache.key('hostname-test.com') == 'hostname-test.com:443'
+    assert TorrentCache.key('hostname-test.com:8443') == 'hostname-test.com:8443'
+    assert TorrentCache.key('hostname-test.com', 8443) == 'hostname-test.com:8443'
+    assert TorrentCache.key('[::1]') == '[::1]:443'
+
+
+async def test_list_torrents_cached_fields(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    cache = TorrentCache(tmp_path / 'cache.sqlite3')
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', cache=cache)
+    niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    # The full list is fetched so that it can be cached.
+    fetched = await alist(client.list_torrents(fields=('name',)))
+    expected = cache.get('hostname-test.com:443')
+    assert expected is not None
+    assert [(x.hash, x.name) for x in expected] == fetched
+    assert await alist(client.list_torrents(fields=('name',))) == fetched
+
+
+async def test_list_torrents_cached_stale_and_refresh(niquests_mock: MockRouter, tmp_path: Path,
+                                                      mocker: MockerFixture) -> None:
+    cache = TorrentCache(tmp_path / 'cache.sqlite3', max_age=60)
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', cache=cache)
+    cache.put('hostname-test.com:443', [])
+    niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    assert len(await alist(client.list_torrents(refresh=True))) == 3
+    mocker.patch('xirvik.cache.time.time', return_value=10 ** 10)
+    assert cache.get('hostname-test.com:443') is None
+    assert len(cache.get('hostname-test.com:443', ignore_age=True) or []) == 3
+    niquests_mock.post(client.multirpc_action_uri).respond(json={'t': {}})
+    assert await alist(client.list_torrents()) == []
+
+
+async def test_cache_invalidated_on_change(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    cache = TorrentCache(tmp_path / 'cache.sqlite3')
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', cache=cache)
+    niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    await alist(client.list_torrents())
+    niquests_mock.post(client.multirpc_action_uri).respond(200)
+    await client.stop('hash1')
+    assert cache.get('hostname-test.com:443') is None
+
+
+def test_cache_schema_upgrade(tmp_path: Path) -> None:
+    path = tmp_path / 'cache.sqlite3'
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE torrents (x TEXT)')
+    cache = TorrentCache(path)
+    assert cache.get('hostname-test.com') is None
+    cache.put('hostname-test.com', [])
+    assert cache.get('hostname-test.com') == []
+    cache.invalidate('hostname-test.com')
+    assert cache.get('hostname-test.com') is None
+
+
+@pytest.mark.parametrize(('lazy', 'record'), [(True, LazyTorrentInfo), (False, CompactTorrentInfo)])
+async def test_list_torrents_cached_record(niquests_mock: MockRouter, tmp_path: Path, *, lazy: bool,
+                                           record: type[Any]) -> None:
+    cache = TorrentCache(tmp_path / 'cache.sqlite3')
+    client = ruTorrentClient('hostname-test.com',
+                             'a',
+                             'b',
+                             cache=cache,
+                             lazy=lazy,
+                             compact=not lazy)
+    niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    expected = await alist(client.list_torrents())
+    cached = await alist(client.list_torrents())
+    assert all(isinstance(x, record) for x in cached)
+    assert cached == expected
+
+
+async def test_list_torrents_cached_stream(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    cache = TorrentCache(tmp_path / 'cache.sqlite3')
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', cache=cache)
+    niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    # Streamed torrents are kept until the list is complete and then cached.
+    expected = await alist(client.list_torrents(stream=True))
+    assert cache.get('hostname-test.com:443') == expected
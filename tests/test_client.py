@@ -4,21 +4,53 @@ from __future__ import annotations
 from os import environ
 from pathlib import Path
 from tempfile import NamedTemporaryFile, TemporaryDirectory
-from typing import TYPE_CHECKING, Any, cast
+from typing import IO, TYPE_CHECKING, Any, NoReturn, cast
 from urllib.parse import parse_qsl
+import asyncio
+import contextlib
+import io
+import json
+import tarfile
 import xmlrpc.client
 
+from niquests import AsyncSession
+from niquests.adapters import AsyncHTTPAdapter
 from niquests.exceptions import HTTPError
 from niquests_mock import MockRouter, build_response
-from tests.conftest import alist
-from xirvik.client import ListTorrentsError, UnexpectedruTorrentError, log, ruTorrentClient
-from xirvik.typing import FileDownloadStrategy, FilePriority
+from tests.conftest import alist, async_iter, xmlrpc_responder
+from xirvik.cache import TorrentCache
+from xirvik.client import (
+    LABELLED_FILTER,
+    TORRENT_COMMANDS,
+    ListTorrentsError,
+    UnexpectedruTorrentError,
+    _decode_torrent_row,  # ruff:ignore[import-private-name]
+    label_filter,
+    log,
+    ruTorrentClient,
+)
+from xirvik.metrics import RequestMetrics
+from xirvik.ratelimit import AdaptiveConcurrencyLimiter, TokenBucket
+from xirvik.tracing import JSONLinesTracer
+from xirvik.typing import (
+    CompactTorrentInfo,
+    CompactTorrentTrackedFile,
+    FileDownloadStrategy,
+    FilePriority,
+    LazyTorrentInfo,
+    TorrentEventType,
+    TorrentInfo,
+    TorrentTrackedFile,
+)
 from xirvik.utils import parse_header
 import pytest
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, AsyncIterator
+
     from niquests.models import PreparedRequest, Response
     from pytest_mock.plugin import MockerFixture
+    from xirvik.typing import TorrentEvent
 
 
 def test_netrc() -> None:
@@ -79,6 +111,245 @@ async def test_add_torrent_bad_status(niquests_mock: MockRouter) -> None:
             await client.add_torrent(f.name)
 
 
+async def test_add_torrents(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    paths = []
+    for name in ('a', 'b', 'c', 'é'):
+        path = tmp_path / f'{name}.torrent'
+        path.write_bytes(name.encode())
+        paths.append(path)
+    bodies: list[bytes] = []
+
+    def side_effect(request: PreparedRequest) -> Response:
+        assert isinstance(request.body, bytes)
+        bodies.append(request.body)
+        if b'filename="a.torrent"' in request.body:
+            return build_response(request, json=[{'status': 'Success'}, {'status': 'Failed'}])
+        if b'filename="c.torrent"' in request.body:
+            return build_response(request, content=b'<html></html>')
+        return build_response(request, status_code=500)
+
+    niquests_mock.post(client.add_torrent_uri).mock(side_effect=side_effect)
+    result = await client.add_torrents(paths, batch_size=2, start_now=False)
+    assert result == {
+        str(paths[0]): True,
+        str(paths[1]): False,
+        str(paths[2]): True,
+        str(paths[3]): True
+    }
+    assert len(bodies) == 2
+    assert all(x.count(b'name="torrent_file[]"') == 2 for x in bodies)
+    assert all(b'name="torrents_start_stopped"' in x for x in bodies)
+    assert any(b'filename="e.torrent"' in x for x in bodies)
+
+
+async def test_add_torrents_error(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    path = tmp_path / 'a.torrent'
+    path.write_bytes(b'a')
+    route = niquests_mock.post(client.add_torrent_uri).respond(500)
+    assert await client.add_torrents([path, tmp_path / 'missing.torrent'], batch_size=1) == {
+        str(path): False,
+        str(tmp_path / 'missing.torrent'): False
+    }
+    assert route.call_count == 1
+
+
+async def test_rate_limits(niquests_mock: MockRouter, mocker: MockerFixture) -> None:
+    acquire = mocker.spy(TokenBucket, 'acquire')
+    client = ruTorrentClient('hostname-test.com',
+                             'a',
+                             'b',
+                             rate_limit=3,
+                             endpoint_rate_limits={
+                                 'xmlrpc': 1,
+                                 'multirpc': 2,
+                                 'datadir': 0
+                             })
+    niquests_mock.post(
+        client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(lambda *_: 0, build_response))
+    niquests_mock.post(client.datadir_action_uri).respond(json={})
+    await client.xmlrpc_call('d.name', 'hash1')
+    await client.stop('hash1')
+    await client.move_torrent('hash1', '/target')
+    assert [call.args[0].rate for call in acquire.call_args_list] == [1, 3, 2, 3, 3]
+
+
+class _FakeServer:
+    """Fake ruTorrent XML-RPC endpoint that injects latency and errors."""
+    def __init__(self) -> None:
+        self.in_flight = self.max_in_flight = 0
+        self.latency = 0.002
+        self.mode = 'ok'
+
+    async def __call__(self, request: PreparedRequest) -> Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if self.mode == 'busy':
+            return build_response(request, status_code=503)
+        assert isinstance(request.body, bytes)
+        params, method = xmlrpc.client.loads(request.body)
+        if self.mode == 'fault':
+            content = xmlrpc.client.dumps(xmlrpc.client.Fault(-501, 'busy'))
+        elif method == 'system.multicall':
+            content = xmlrpc.client.dumps(([[[]] for _ in cast('list[Any]', params[0])],),
+                                          methodresponse=True)
+        else:
+            content = xmlrpc.client.dumps((0,), methodresponse=True)
+        return build_response(request, content=content.encode())
+
+
+async def test_adaptive_concurrency(niquests_mock: MockRouter) -> None:
+    limiter = AdaptiveConcurrencyLimiter(initial=2, maximum=16)
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', concurrency_limiter=limiter)
+    server = _FakeServer()
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=server)
+    hashes = [f'hash{i}' for i in range(200)]
+    # A healthy server lets bulk operations raise the limit.
+    assert len(await client.delete_many(hashes, chunk_size=2)) == len(hashes)
+    assert limiter.limit > 4
+    assert 2 < server.max_in_flight <= limiter.maximum
+    grown = limiter.limit
+    # Server errors cut it back multiplicatively.
+    server.mode = 'busy'
+    results = await asyncio.gather(*(client.xmlrpc_call('d.name', hash_) for hash_ in hashes[:20]),
+                                   return_exceptions=True)
+    assert all(isinstance(x, xmlrpc.client.ProtocolError) for x in results)
+    assert limiter.limit <= grown / 2
+    cut = limiter.limit
+    # So do XML-RPC faults.
+    server.mode = 'fault'
+    with pytest.raises(xmlrpc.client.Fault):
+        await client.xmlrpc_call('d.name', 'hash1')
+    assert limiter.limit == max(1, cut / 2)
+    # File listings read ahead within the limit once the server recovers.
+    server.mode = 'ok'
+    server.max_in_flight = 0
+    limiter.limit = 4
+    assert len(await alist(client.list_files_many(hashes, chunk_size=10))) == len(hashes)
+    assert 1 < server.max_in_flight <= int(limiter.limit)
+
+
+async def test_request_metrics(niquests_mock: MockRouter) -> None:
+    metrics = RequestMetrics()
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', metrics=metrics)
+
+    def handler(method: str, *_: Any) -> None:
+        raise xmlrpc.client.Fault(-501, method)
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(
+        handler, lambda request: build_response(request, json={'t': {}})))
+    niquests_mock.post(client.datadir_action_uri).respond(500)
+    await alist(client.list_torrents())
+    with pytest.raises(xmlrpc.client.Fault):
+        await client.xmlrpc_call('d.name', 'hash1')
+    with pytest.raises(HTTPError):
+        await client.move_torrent('hash1', '/target')
+    lines = metrics.to_prometheus().splitlines()
+    assert 'xirvik_requests_total{endpoint="multirpc",mode="list"} 1' in lines
+    assert 'xirvik_request_failures_total{endpoint="multirpc",mode="list"} 0' in lines
+    assert 'xirvik_response_bytes_received_total{endpoint="multirpc",mode="list"} 8' in lines
+    assert 'xirvik_request_failures_total{endpoint="xmlrpc",mode="d.name"} 1' in lines
+    assert 'xirvik_request_failures_total{endpoint="datadir",mode=""} 1' in lines
+    assert any(
+        x.startswith('xirvik_request_bytes_sent_total{endpoint="datadir",mode=""} ')
+        and not x.endswith(' 0') for x in lines)
+
+
+async def test_request_metrics_list_files(niquests_mock: MockRouter) -> None:
+    metrics = RequestMetrics()
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', metrics=metrics)
+    niquests_mock.post(
+        client.multirpc_action_uri).respond(json=[['name of file', '14', '13', '8192', '1', '0']])
+    assert len(await alist(client.list_files('hash1'))) == 1
+    assert 'xirvik_requests_total{endpoint="multirpc",mode="fls"} 1' in metrics.to_prometheus(
+    ).splitlines()
+
+
+async def test_tracing(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    tracer = JSONLinesTracer(tmp_path / 'trace.jsonl')
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', tracer=tracer)
+
+    def handler(_: str, calls: list[Any]) -> list[Any]:
+        return [[0] for _ in calls]
+
+    rows = {'hash1': ['0'] * 35, 'hash2': ['0'] * 35}
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(
+        handler, lambda request: build_response(request, json={'t': rows})))
+    assert len(await alist(client.list_torrents())) == 2
+    await client.delete_many(['hash1', 'hash2', 'hash3'], chunk_size=2)
+    tracer.close()
+    spans = [
+        json.loads(x) for x in (tmp_path / 'trace.jsonl').read_text(encoding='utf-8').splitlines()
+    ]
+    by_id = {x['span_id']: x for x in spans}
+    list_request, list_torrents = spans[:2]
+    assert list_request['name'] == 'ruTorrentClient.request'
+    assert list_request['parent_span_id'] is None
+    assert list_request['attributes']['xirvik.endpoint'] == 'multirpc'
+    assert list_request['attributes']['xirvik.mode'] == 'list'
+    assert list_request['attributes']['http.request.method'] == 'POST'
+    assert list_request['attributes']['http.response.status_code'] == 200
+    assert list_request['attributes']['http.response.body.size'] > 0
+    assert list_request['attributes']['xirvik.retries'] == 0
+    assert list_torrents['name'] == 'ruTorrentClient.list_torrents'
+    assert list_torrents['attributes'] == {'xirvik.torrent_count': 2}
+    delete_many = spans[-1]
+    assert delete_many['name'] == 'ruTorrentClient.delete_many'
+    assert delete_many['attributes'] == {'xirvik.hash_count': 3}
+    delete_requests = [x for x in spans[2:] if x['name'] == 'ruTorrentClient.request']
+    assert len(delete_requests) == 2
+    for request in delete_requests:
+        assert request['attributes']['xirvik.mode'] == 'system.multicall'
+        call = by_id[request['parent_span_id']]
+        assert call['name'] == 'ruTorrentClient.xmlrpc_call'
+        assert call['parent_span_id'] == delete_many['span_id']
+
+
+async def test_tracing_list_files(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    tracer = JSONLinesTracer(tmp_path / 'trace.jsonl')
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', tracer=tracer)
+    niquests_mock.post(
+        client.multirpc_action_uri).respond(json=[['name of file', '14', '13', '8192', '1', '0']])
+    assert len(await alist(client.list_files('hash1'))) == 1
+    tracer.close()
+    request, list_files = (json.loads(x)
+                           for x in (tmp_path /
+                                     'trace.jsonl').read_text(encoding='utf-8').splitlines())
+    assert request['attributes']['xirvik.mode'] == 'fls'
+    assert request['status'] == 'OK'
+    assert list_files['name'] == 'ruTorrentClient.list_files'
+
+
+def test_rate_limits_unknown_endpoint() -> None:
+    with pytest.raises(ValueError, match='Unknown endpoints: nope'):
+        ruTorrentClient('hostname-test.com', 'a', 'b', endpoint_rate_limits={'nope': 1})
+
+
+async def test_connection_options(niquests_mock: MockRouter, mocker: MockerFixture) -> None:
+    adapter = mocker.patch('xirvik.client.AsyncHTTPAdapter', wraps=AsyncHTTPAdapter)
+    session = mocker.patch('xirvik.client.AsyncSession', wraps=AsyncSession)
+    gather = mocker.spy(AsyncSession, 'gather')
+    client = ruTorrentClient('hostname-test.com',
+                             'a',
+                             'b',
+                             pool_maxsize=4,
+                             multiplexed=True,
+                             connect_timeout=1,
+                             read_timeout=2)
+    assert adapter.call_args.kwargs['pool_maxsize'] == 4
+    assert session.call_args.kwargs['multiplexed'] is True
+    assert session.call_args.kwargs['timeout'].connect_timeout == 1
+    assert session.call_args.kwargs['timeout'].read_timeout == 2
+    niquests_mock.post(client.multirpc_action_uri).respond(json={'t': {}})
+    await alist(client.list_torrents())
+    gather.assert_called_once()
+
+
 async def test_list_torrents_bad_status(niquests_mock: MockRouter) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
     niquests_mock.post(client.multirpc_action_uri).respond(400)
@@ -109,6 +380,163 @@ async def test_list_torrents(niquests_mock: MockRouter) -> None:
     assert result[0].name == 'name of torrent?'
 
 
+async def test_list_torrents_lazy(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', lazy=True)
+    row = [
+        '1', '0', '1', '1', 'name of torrent?', '1000', '1', '1024', '1000', '0', '0.14', '0', '0',
+        '512', 'label'
+    ] + (20 * ['0']) + ['1633423132\n']
+    niquests_mock.post(client.multirpc_action_uri).respond(json={'t': {'hash here': row}})
+    info = (await alist(client.list_torrents()))[0]
+    assert isinstance(info, LazyTorrentInfo)
+    assert info.hash == 'hash here'
+    assert info.name == 'name of torrent?'
+    assert info.finished is info.finished
+    eager = _decode_torrent_row('hash here', row)
+    assert info == eager
+    assert info != 'hash here'
+    assert hash(info) == hash(eager)
+    assert tuple(info) == eager
+    assert len(info) == len(eager)
+    assert info[5] == eager[5]
+    assert info._asdict() == eager._asdict()
+    assert info.to_torrent_info() == eager
+    assert repr(info) == repr(eager).replace('TorrentInfo', 'LazyTorrentInfo')
+    with pytest.raises(AttributeError, match='unknown'):
+        info.unknown  # ruff:ignore[useless-expression]
+
+
+async def test_list_torrents_fields(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    received: list[Any] = []
+
+    def handler(method: str, *params: Any) -> list[Any]:
+        received.append((method, *params))
+        return [['hash1', 'label ', 1500, 0, 1633423132], ['hash2', '', 0, 1, 0]]
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(handler))
+    result = await alist(
+        client.list_torrents(fields=('custom1', 'ratio', 'hash', 'is_hash_checking', 'custom1',
+                                     'state_changed')))
+    assert received == [('d.multicall2', '', 'main', 'd.hash=', 'd.custom1=', 'd.ratio=',
+                         'd.is_hash_checking=', 'd.state_changed=')]
+    assert result[0]._fields == ('hash', 'custom1', 'ratio', 'is_hash_checking', 'state_changed')
+    assert result[0].custom1 == 'label'
+    assert result[0].ratio == pytest.approx(1500)
+    assert result[0].is_hash_checking is False
+    assert result[0].state_changed is not None
+    assert result[1].hash == 'hash2'
+    assert result[1].is_hash_checking is True
+    assert result[1].state_changed is None
+
+
+async def test_list_torrents_fields_unknown() -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    with pytest.raises(ValueError, match='Unknown fields: nope'):
+        await alist(client.list_torrents(fields=('name', 'nope')))
+
+
+async def test_list_torrents_fields_bad_type(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(lambda *_: 0))
+    with pytest.raises(ListTorrentsError):
+        await alist(client.list_torrents(fields=('name',)))
+
+
+async def test_list_torrents_view_filter(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    client = ruTorrentClient('hostname-test.com',
+                             'a',
+                             'b',
+                             cache=TorrentCache(tmp_path / 'cache.sqlite3'))
+    received: list[Any] = []
+
+    def handler(method: str, *params: Any) -> list[Any]:
+        received.append((method, *params[:3]))
+        return [['hash1', *(['0'] * (len(params) - params.index('d.hash=') - 1))]]
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(handler))
+    result = await alist(client.list_torrents(view='complete', filter=LABELLED_FILTER))
+    assert isinstance(result[0], TorrentInfo)
+    assert result[0].hash == 'hash1'
+    assert received == [('d.multicall.filtered', '', 'complete', LABELLED_FILTER)]
+    assert await alist(client.list_torrents(view='seeding', fields=('name',))) == [('hash1', '0')]
+    assert received[-1] == ('d.multicall2', '', 'seeding', 'd.hash=')
+    # The cache is not used with a view or filter.
+    assert client.cache is not None
+    assert client.cache.get('hostname-test.com:443') is None
+
+
+async def test_list_torrents_filter_unsupported(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    methods: list[str] = []
+
+    def handler(method: str, *_: Any) -> list[Any]:
+        methods.append(method)
+        if method == 'd.multicall.filtered':
+            raise xmlrpc.client.Fault(-506, f"Method '{method}' not defined")
+        return [['hash1', 'name']]
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(handler))
+    assert await alist(client.list_torrents(fields=('name',),
+                                            filter=label_filter('x'))) == [('hash1', 'name')]
+    assert methods == ['d.multicall.filtered', 'd.multicall2']
+
+
+@pytest.mark.parametrize(('label', 'expected'),
+                         [('movies', 'equal={d.custom1=,cat="movies"}'),
+                          ('a "b" \\', ('or={equal={d.custom1=,cat="a \\"b\\" \\\\"},'
+                                        'equal={d.custom1=,cat="a%20%22b%22%20%5C"}}'))])
+def test_label_filter(label: str, expected: str) -> None:
+    assert label_filter(label) == expected
+
+
+def test_torrent_commands() -> None:
+    assert list(TORRENT_COMMANDS) == list(TorrentInfo._fields[1:])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+async def test_list_torrents_stream(niquests_mock: MockRouter, mocker: MockerFixture,
+                                    chunk_size: int) -> None:
+    mocker.patch('xirvik.client.STREAM_CHUNK_SIZE', chunk_size)
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    row = [
+        '1', '0', '1', '1', 'név \u2603', '1000', '1', '1024', '1000', '0', '0.14', '0', '0', '512',
+        'label'
+    ] + (20 * ['0']) + ['1633423132\n']
+    niquests_mock.post(client.multirpc_action_uri).respond(
+        content=json.dumps({
+            'x': [1, {
+                't': 2
+            }],
+            't': {
+                'hash1': row,
+                'hash2': row
+            },
+            'cid': 92385
+        },
+                           ensure_ascii=False,
+                           indent=1).encode())
+    result = await alist(client.list_torrents(stream=True))
+    assert [x.hash for x in result] == ['hash1', 'hash2']
+    assert result == await alist(client.list_torrents())
+
+
+@pytest.mark.parametrize('body',
+                         [b'{"t": []}', b'{"cid": 1}', b'{"t": {"a": [', b'[]', b'{"t": {"a" []}}'])
+async def test_list_torrents_stream_bad(niquests_mock: MockRouter, body: bytes) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(client.multirpc_action_uri).respond(content=body)
+    with pytest.raises(ListTorrentsError):
+        await alist(client.list_torrents(stream=True))
+
+
+async def test_list_torrents_stream_bad_status(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(client.multirpc_action_uri).respond(400)
+    with pytest.raises(HTTPError):
+        await alist(client.list_torrents(stream=True))
+
+
 async def test_get_torrent(niquests_mock: MockRouter) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
     uri = (f'{client.http_prefix}/rtorrent/plugins/source/action.php'
@@ -120,6 +548,96 @@ async def test_get_torrent(niquests_mock: MockRouter) -> None:
     assert fn == 'test.torrent'
 
 
+def _source_uri(client: ruTorrentClient, hash_: str) -> str:
+    return f'{client.http_prefix}/rtorrent/plugins/source/action.php?hash={hash_}'
+
+
+async def test_save_torrents(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    dest = tmp_path / 'out'
+    dest.mkdir()
+    (dest / 'hash1.torrent').write_bytes(b'old')
+    headers = {'content-disposition': 'attachment; filename=test.torrent'}
+    niquests_mock.get(_source_uri(client, 'hash2')).respond(content=b'x' * 100000, headers=headers)
+    niquests_mock.get(_source_uri(client, 'hash3')).respond(404)
+    assert await client.save_torrents(['hash1', 'hash2', 'hash3'], dest, concurrency=2) == {
+        'hash1': True,
+        'hash2': True,
+        'hash3': False
+    }
+    assert (dest / 'hash1.torrent').read_bytes() == b'old'
+    assert (dest / 'hash2.torrent').read_bytes() == b'x' * 100000
+    assert sorted(x.name for x in dest.iterdir()) == ['hash1.torrent', 'hash2.torrent']
+
+
+async def test_save_torrents_tar(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    headers = {'content-disposition': 'attachment; filename=test.torrent'}
+    niquests_mock.get(_source_uri(client, 'hash1')).respond(content=b'a', headers=headers)
+    niquests_mock.get(_source_uri(client, 'hash2')).respond(content=b'bb', headers=headers)
+    niquests_mock.get(_source_uri(client, 'hash3')).respond(404)
+    buf = io.BytesIO()
+    assert await client.save_torrents(['hash1', 'hash2', 'hash3'], buf) == {
+        'hash1': True,
+        'hash2': True,
+        'hash3': False
+    }
+    buf.seek(0)
+    with tarfile.open(fileobj=buf) as tar:
+        members = {m.name: cast('IO[bytes]', tar.extractfile(m)).read() for m in tar}
+    assert members == {'hash1.torrent': b'a', 'hash2.torrent': b'bb'}
+
+
+def _file_names(path: Path) -> list[str]:
+    return sorted(x.name for x in path.iterdir())
+
+
+async def test_plugin_endpoints(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    metrics = RequestMetrics()
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', metrics=metrics)
+    niquests_mock.get(_source_uri(client, 'hash1')).respond(
+        content=b'a', headers={'content-disposition': 'attachment; filename=test.torrent'})
+    niquests_mock.post(f'{client.http_prefix}/rtorrent/plugins/edit/action.php').respond()
+    assert await client.save_torrents(['hash1'], tmp_path) == {'hash1': True}
+    await client.edit_torrents(['hash1'], comment='New comment')
+    lines = metrics.to_prometheus().splitlines()
+    assert 'xirvik_requests_total{endpoint="source",mode=""} 1' in lines
+    assert 'xirvik_requests_total{endpoint="edit",mode=""} 1' in lines
+
+
+async def test_save_torrents_no_file_name(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    headers = {'content-disposition': 'attachment; filename=test.torrent'}
+    niquests_mock.get(_source_uri(client, 'hash1')).respond(content=b'a', headers=headers)
+    niquests_mock.get(_source_uri(client, 'hash2')).respond(content=b'bb')
+    assert await client.save_torrents(['hash1', 'hash2'], tmp_path) == {
+        'hash1': True,
+        'hash2': False
+    }
+    assert _file_names(tmp_path) == ['hash1.torrent']
+    buf = io.BytesIO()
+    assert await client.save_torrents(['hash1', 'hash2'], buf) == {'hash1': True, 'hash2': False}
+
+
+async def test_save_torrents_cancelled(mocker: MockerFixture, tmp_path: Path) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    started = asyncio.Event()
+
+    async def iter_torrent(hash_: str) -> AsyncIterator[bytes]:
+        yield b'a'
+        started.set()
+        await asyncio.Event().wait()
+
+    mocker.patch.object(client, '_iter_torrent', iter_torrent)
+    task = asyncio.create_task(client.save_torrents(['hash1'], tmp_path))
+    await started.wait()
+    assert _file_names(tmp_path) == ['hash1.torrent.part']
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert _file_names(tmp_path) == []
+
+
 async def test_list_files(niquests_mock: MockRouter) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
     niquests_mock.post(client.multirpc_action_uri).respond(
@@ -133,6 +651,47 @@ async def test_list_files(niquests_mock: MockRouter) -> None:
     assert files[0][5] == FileDownloadStrategy.NORMAL
 
 
+async def test_compact_records(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', compact=True)
+    row = [
+        '1', '0', '1', '1', 'name of torrent?', '1000', '1', '1024', '1000', '0', '0.14', '0', '0',
+        '512', 'label'
+    ] + (20 * ['0']) + ['1633423132\n']
+    niquests_mock.post(client.multirpc_action_uri).respond(json={'t': {'hash here': row}})
+    info = (await alist(client.list_torrents()))[0]
+    assert isinstance(info, CompactTorrentInfo)
+    assert info == _decode_torrent_row('hash here', row)
+    niquests_mock.post(client.multirpc_action_uri).respond(
+        json=[['name of file', '14', '13', '8192', '1', '0', '0']])
+    file = (await alist(client.list_files('hash here')))[0]
+    assert isinstance(file, CompactTorrentTrackedFile)
+    assert file == ('name of file', 14, 13, 8192, FilePriority.NORMAL, FileDownloadStrategy.NORMAL)
+
+
+@pytest.mark.parametrize('backend', ['json', 'orjson'])
+async def test_json_backend(niquests_mock: MockRouter, backend: str) -> None:
+    pytest.importorskip(backend)
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', json_backend=backend)
+    assert client.json_backend.name == backend
+    niquests_mock.post(client.multirpc_action_uri).respond(
+        json=[['name of file', '14', '13', '8192', '1', '0', '0']])
+    files = await alist(client.list_files('hash here'))
+    assert files == [
+        TorrentTrackedFile('name of file', 14, 13, 8192, FilePriority.NORMAL,
+                           FileDownloadStrategy.NORMAL)
+    ]
+
+
+def test_json_backend_unknown() -> None:
+    with pytest.raises(ValueError, match='Unknown JSON backend'):
+        ruTorrentClient('hostname-test.com', 'a', 'b', json_backend='unknown')
+
+
+def test_lazy_and_compact() -> None:
+    with pytest.raises(ValueError, match='both lazy and compact'):
+        ruTorrentClient('hostname-test.com', 'a', 'b', lazy=True, compact=True)
+
+
 async def test_list_all_files(niquests_mock: MockRouter) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
     call_count = 0
@@ -164,6 +723,11 @@ async def test_list_all_files(niquests_mock: MockRouter) -> None:
     assert files[0][5] == FileDownloadStrategy.NORMAL
 
 
+def _form_values(request: PreparedRequest, key: str) -> list[str]:
+    body = request.body.decode() if isinstance(request.body, bytes) else str(request.body)
+    return [v for k, v in parse_qsl(body) if k == key]
+
+
 async def test_set_label_to_hashes_bad_args() -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
     with pytest.raises(TypeError):
@@ -178,110 +742,139 @@ async def test_set_label_to_hashes_normal(mocker: MockerFixture, niquests_mock:
     assert spy_log_warning.call_count == 0
 
 
-async def test_set_label_to_hashes_recursion_limit_5(niquests_mock: MockRouter) -> None:
+async def test_set_label_to_hashes_recursion_limit_5(niquests_mock: MockRouter,
+                                                     mocker: MockerFixture) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
-    hashes = ['hash1', 'hash2']
-    label = 'my new label'
-    list_torrents_json: dict[str, Any] = {
-        't': {
-            'hash1': [
-                '1', '0', '1', '1', 'torrent name', '250952849', '958', '958', '250952849',
-                '357999402', '1426', '0', '0', '262144', ''
-            ] + (20 * ['0']) + ['1633423132\n'],
-            'hash2': [
-                '1', '0', '1', '1', 'torrent name2', '250952849', '958', '958', '250952849',
-                '357999402', '1426', '0', '0', '262144', ''
-            ] + (20 * ['0']) + ['1633423132\n'],
-            'hash3': [
-                '1', '0', '1', '1', 'torrent name2', '250952849', '958', '958', '250952849',
-                '357999402', '1426', '0', '0', '262144', ''
-            ] + (20 * ['0']) + ['1633423132\n']
-        },
-        'cid': 92983
-    }
-    response_sequence = cast('list[dict[str, Any]]', [{
-        'json': []
-    }, {
-        'json': list_torrents_json
-    }, {
-        'json': []
-    }, {
-        'json': list_torrents_json
-    }, {
-        'json': []
-    }, {
-        'json': list_torrents_json
-    }, {
-        'json': []
-    }, {
-        'json': list_torrents_json
-    }, {
-        'json': []
-    }, {
-        'json': list_torrents_json
-    }, {
-        'json': []
-    }])
-    call_count = 0
+    spy_log_warning = mocker.spy(log, 'warning')
+    labelled: list[list[str]] = []
+    verified: list[list[str]] = []
+
+    def form_handler(request: PreparedRequest) -> Response:
+        labelled.append(_form_values(request, 'hash'))
+        return build_response(request, json=[])
+
+    def handler(method: str, calls: list[dict[str, Any]]) -> list[Any]:
+        assert method == 'system.multicall'
+        verified.append([x['params'][0] for x in calls])
+        return [[''] for _ in calls]
+
+    niquests_mock.post(
+        client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(handler, form_handler))
+    await client.set_label_to_hashes(hashes=['hash1', 'hash2'],
+                                     label='my new label',
+                                     recursion_limit=5)
+    assert labelled == 6 * [['hash1', 'hash2']]
+    assert verified == 6 * [['hash1', 'hash2']]
+    spy_log_warning.assert_any_call('Failed to label %d torrents after %d attempts.', 2, 6)
+
+
+async def test_set_label_to_hashes_retries_only_failed(niquests_mock: MockRouter,
+                                                       mocker: MockerFixture) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    spy_log_warning = mocker.spy(log, 'warning')
+    labelled: list[list[str]] = []
+    labels = {'hash1': 'my%20new%20label', 'hash2': 'other', 'hash3': 'my new label'}
 
-    def side_effect(request: PreparedRequest) -> Response:
-        nonlocal call_count
-        resp = response_sequence[min(call_count, len(response_sequence) - 1)]
-        call_count += 1
-        return build_response(request, **resp)
+    def form_handler(request: PreparedRequest) -> Response:
+        hashes = _form_values(request, 'hash')
+        labelled.append(hashes)
+        return build_response(request, json=[0] * len(hashes) if len(labelled) > 1 else [])
 
-    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=side_effect)
-    await client.set_label_to_hashes(hashes=hashes, label=label, recursion_limit=5)
+    def handler(_: str, calls: list[dict[str, Any]]) -> list[Any]:
+        return [[labels[x['params'][0]]] if x['params'][0] in labels else {
+            'faultCode': -501,
+            'faultString': 'Could not find info-hash.'
+        } for x in calls]
+
+    niquests_mock.post(
+        client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(handler, form_handler))
+    await client.set_label_to_hashes(hashes=['hash1', 'hash2', 'hash3', 'hashX'],
+                                     label='my new label')
+    assert labelled == [['hash1', 'hash2', 'hash3', 'hashX'], ['hash2']]
+    spy_log_warning.assert_any_call('Cannot verify label of %s: %s', 'hashX', mocker.ANY)
 
 
 async def test_set_label_to_hashes_no_torrents_to_correct(mocker: MockerFixture,
                                                           niquests_mock: MockRouter) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
     spy_log_debug = mocker.spy(log, 'debug')
-    list_torrents_json: dict[str, Any] = {
-        't': {
-            'hash1': [
-                '1', '0', '1', '1', 'torrent name', '250952849', '958', '958', '250952849',
-                '357999402', '1426', '0', '0', '262144', 'existing label'
-            ] + (20 * ['0']) + ['1633423132\n']
-        },
-        'cid': 92983
-    }
-    response_sequence = cast('list[dict[str, Any]]', [{'json': []}, {'json': list_torrents_json}])
-    call_count = 0
 
-    def side_effect(request: PreparedRequest) -> Response:
-        nonlocal call_count
-        resp = response_sequence[min(call_count, len(response_sequence) - 1)]
-        call_count += 1
-        return build_response(request, **resp)
+    def form_handler(request: PreparedRequest) -> Response:
+        return build_response(request, json=[])
 
-    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=side_effect)
+    niquests_mock.post(client.multirpc_action_uri).mock(
+        side_effect=xmlrpc_responder(lambda *_: [['my new label']], form_handler))
     await client.set_label_to_hashes(hashes=['hashX'], label='my new label')
     spy_log_debug.assert_any_call('Found no torrents to correct')
 
 
+async def test_set_label_many(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    label = 'a & b+c/ü'
+    chunks: list[list[str]] = []
+    in_flight = max_in_flight = 0
+
+    async def side_effect(request: PreparedRequest) -> Response:
+        nonlocal in_flight, max_in_flight
+        hashes = _form_values(request, 'hash')
+        assert _form_values(request, 'v') == len(hashes) * [label]
+        assert _form_values(request, 's') == len(hashes) * ['label']
+        chunks.append(hashes)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if 'hash7' in hashes:
+            return build_response(request, status_code=500)
+        return build_response(request, json=[0] * len(hashes))
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=side_effect)
+    hashes = [f'hash{i}' for i in range(10)]
+    result = await client.set_label_many(hashes, label, chunk_size=3, concurrency=2, max_attempts=1)
+    assert sorted(chunks) == sorted([hashes[0:3], hashes[3:6], hashes[6:9], hashes[9:]])
+    assert max_in_flight == 2
+    assert result == {x: x not in {'hash6', 'hash7', 'hash8'} for x in hashes}
+
+
+async def test_set_label_many_chunk_errors(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+
+    def form_handler(request: PreparedRequest) -> Response:
+        match _form_values(request, 'hash'):
+            case ['hash1']:
+                return build_response(request, content=b'')
+            case ['hash2']:
+                return build_response(request, json=[])
+            case hashes:
+                return build_response(request, json=[0] * len(hashes))
+
+    def handler(method: str, *params: Any) -> NoReturn:
+        raise xmlrpc.client.Fault(1, 'Internal error')
+
+    niquests_mock.post(
+        client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(handler, form_handler))
+    result = await client.set_label_many(['hash0', 'hash1', 'hash2', 'hash3'],
+                                         'label',
+                                         chunk_size=1,
+                                         max_attempts=1)
+    assert result == {'hash0': True, 'hash1': False, 'hash2': False, 'hash3': True}
+
+
+async def test_set_label_http_error(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(client.multirpc_action_uri).respond(500)
+    with pytest.raises(HTTPError):
+        await client.set_label('a label', 'hash1')
+
+
 async def test_set_label(niquests_mock: MockRouter) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
-    list_torrents_json: dict[str, Any] = {
-        't': {
-            'hash1': [
-                '1', '0', '1', '1', 'torrent name', '250952849', '958', '958', '250952849',
-                '357999402', '1426', '0', '0', '262144', 'a label'
-            ] + (20 * ['0']) + ['1633423132\n']
-        },
-        'cid': 92983
-    }
-    response_sequence = cast('list[dict[str, Any]]', [{'json': []}, {'json': list_torrents_json}])
-    call_count = 0
 
-    def side_effect(request: PreparedRequest) -> Response:
-        nonlocal call_count
-        resp = response_sequence[min(call_count, len(response_sequence) - 1)]
-        call_count += 1
-        return build_response(request, **resp)
+    def form_handler(request: PreparedRequest) -> Response:
+        return build_response(request, json=[])
 
-    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=side_effect)
+    niquests_mock.post(client.multirpc_action_uri).mock(
+        side_effect=xmlrpc_responder(lambda *_: [['a label']], form_handler))
     await client.set_label('a label', 'hash1')
 
 
@@ -333,18 +926,21 @@ async def test_add_torrent_url(niquests_mock: MockRouter) -> None:
         await client.add_torrent_url('https://some-url')
 
 
-async def test_delete(mocker: MockerFixture) -> None:
-    mc = mocker.patch('xirvik.client.xmlrpc.MultiCall')
-    mc.return_value.return_value.results = [{'faultCode': '2000', 'faultString': 'some string'}]
+async def test_delete(niquests_mock: MockRouter) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(
+        client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(lambda _, calls: [{
+            'faultCode': 2000,
+            'faultString': 'some string'
+        } for _ in calls]))
     with pytest.raises(xmlrpc.client.Fault):
         await client.delete('some hash')
 
 
-async def test_delete2(mocker: MockerFixture) -> None:
-    mc = mocker.patch('xirvik.client.xmlrpc.MultiCall')
-    mc.return_value.return_value.results = [{}]
+async def test_delete2(niquests_mock: MockRouter) -> None:
     client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(client.multirpc_action_uri).mock(
+        side_effect=xmlrpc_responder(lambda _, calls: [[0] for _ in calls]))
     try:
         await client.delete('some hash')
     except xmlrpc.client.Fault:  # pragma no cover
@@ -397,3 +993,491 @@ async def test_edit_torrent(niquests_mock: MockRouter) -> None:
     assert ('hash', 'hash2') in pairs
     assert ('tracker', 'http://tracker.example.com') in pairs
     assert ('tracker', 'http://tracker2.example.com') in pairs
+
+
+async def test_sync_torrents(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+
+    def row(name: str) -> list[str]:
+        return [
+            '1', '0', '1', '1', name, '1000', '1', '1024', '1000', '0', '0.14', '0', '0', '512',
+            'label'
+        ] + (20 * ['0']) + ['1633423132\n']
+
+    responses: list[dict[str, Any]] = [{
+        'json': {
+            't': {
+                'hash1': row('one'),
+                'hash2': row('two')
+            },
+            'cid': 1
+        }
+    }, {
+        'json': {
+            't': {
+                'hash1': False,
+                'hash3': row('three')
+            },
+            'cid': 2
+        }
+    }, {
+        'json': {
+            't': [],
+            'cid': 3
+        }
+    }, {
+        'json': {
+            't': {
+                'hash4': row('four')
+            },
+            'cid': 4
+        }
+    }, {
+        'json': {
+            't': 'bad'
+        }
+    }]
+    bodies: list[dict[str, str]] = []
+
+    def side_effect(request: PreparedRequest) -> Response:
+        body = request.body
+        assert isinstance(body, (str, bytes))
+        bodies.append(dict(parse_qsl(body if isinstance(body, str) else body.decode())))
+        return build_response(request, **responses[len(bodies) - 1])
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=side_effect)
+    state = await client.sync_torrents()
+    assert sorted(state) == ['hash1', 'hash2']
+    assert 'cid' not in bodies[0]
+    await client.sync_torrents()
+    assert bodies[1]['cid'] == '1'
+    assert sorted(state) == ['hash2', 'hash3']
+    assert state['hash3'].name == 'three'
+    await client.sync_torrents()
+    assert bodies[2]['cid'] == '2'
+    assert sorted(state) == ['hash2', 'hash3']
+    await client.sync_torrents(full=True)
+    assert 'cid' not in bodies[3]
+    assert sorted(state) == ['hash4']
+    with pytest.raises(ListTorrentsError):
+        await client.sync_torrents()
+    assert bodies[4]['cid'] == '4'
+
+
+async def test_watch_torrents(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+
+    def row(name: str, **fields: str) -> list[str]:
+        ret = [
+            '1', '0', '1', '1', name, '1000', '1', '1024', '1000', '0', '0.14', '0', '0', '512',
+            'label'
+        ] + (20 * ['0']) + ['1633423132\n']
+        for key, value in fields.items():
+            ret[TorrentInfo._fields.index(key) - 1] = value
+        return ret
+
+    responses: list[dict[str, Any]] = [{
+        'json': {
+            't': {
+                'hash1': row('one', left_bytes='100'),
+                'hash2': row('two')
+            },
+            'cid': 1
+        }
+    }, {
+        'json': {
+            't': {
+                'hash1': row('one', custom1='done'),
+                'hash2': False,
+                'hash3': row('three')
+            },
+            'cid': 2
+        }
+    }, {
+        'json': {
+            't': [],
+            'cid': 3
+        }
+    }, {
+        'json': {
+            't': {
+                'hash3': row('three', state='0', message='Tracker: timed out')
+            }
+        }
+    }, {
+        'json': {
+            't': {
+                'hash1': row('one', custom1='done')
+            },
+            'cid': 5
+        }
+    }]
+    bodies: list[dict[str, str]] = []
+
+    def side_effect(request: PreparedRequest) -> Response:
+        body = request.body
+        assert isinstance(body, (str, bytes))
+        bodies.append(dict(parse_qsl(body if isinstance(body, str) else body.decode())))
+        return build_response(request, **responses[len(bodies) - 1])
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=side_effect)
+    events = []
+    async for event in client.watch_torrents(interval=0):
+        events.append(event)
+        if len(events) == 7:
+            break
+    assert [(x.type, x.hash) for x in events] == [
+        (TorrentEventType.COMPLETED, 'hash1'),
+        (TorrentEventType.LABEL_CHANGED, 'hash1'),
+        (TorrentEventType.REMOVED, 'hash2'),
+        (TorrentEventType.ADDED, 'hash3'),
+        (TorrentEventType.STATE_CHANGED, 'hash3'),
+        (TorrentEventType.MESSAGE_CHANGED, 'hash3'),
+        (TorrentEventType.REMOVED, 'hash3'),
+    ]
+    assert events[0].info is not None
+    assert events[0].info.left_bytes == 0
+    assert events[0].previous is not None
+    assert events[0].previous.left_bytes == 100
+    assert events[2].info is None
+    assert events[2].previous is not None
+    assert events[2].previous.name == 'two'
+    assert events[3].previous is None
+    assert events[5].info is not None
+    assert events[5].info.message == 'Tracker: timed out'
+    assert 'cid' not in bodies[0]
+    assert [x.get('cid') for x in bodies[1:]] == ['1', '2', '3', None]
+
+
+async def test_tracing_watch_torrents(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    tracer = JSONLinesTracer(tmp_path / 'trace.jsonl')
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', tracer=tracer)
+    responses: list[dict[str, Any]] = [{
+        't': {
+            'hash1': 36 * ['0']
+        },
+        'cid': 1
+    }, {
+        't': {
+            'hash1': False
+        },
+        'cid': 2
+    }]
+    niquests_mock.post(client.multirpc_action_uri).mock(
+        side_effect=lambda request: build_response(request, json=responses.pop(0)))
+    async with contextlib.aclosing(
+            cast('AsyncGenerator[TorrentEvent, None]',
+                 client.watch_torrents(interval=0))) as events:
+        async for event in events:
+            assert event.type == TorrentEventType.REMOVED
+            break
+    tracer.close()
+    spans = [
+        json.loads(x) for x in (tmp_path / 'trace.jsonl').read_text(encoding='utf-8').splitlines()
+    ]
+    assert [x['name'] for x in spans] == [
+        'ruTorrentClient.request', 'ruTorrentClient.request', 'ruTorrentClient.watch_torrents'
+    ]
+    assert spans[-1]['attributes']['xirvik.event_count'] == 1
+
+
+async def test_list_files_many(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    calls: list[list[dict[str, Any]]] = []
+
+    def multicall(method: str, call_list: list[dict[str, Any]]) -> list[Any]:
+        assert method == 'system.multicall'
+        calls.append(call_list)
+        return [[[['file of ' + x['params'][0], 14, 13, 8192, 1, 0]]] for x in call_list]
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(multicall))
+    results = await alist(client.list_files_many(['hash1', 'hash2', 'hash3'], chunk_size=2))
+    assert [len(x) for x in calls] == [2, 1]
+    assert calls[0][0]['methodName'] == 'f.multicall'
+    assert calls[0][0]['params'][:2] == ['hash1', '']
+    assert [h for h, _ in results] == ['hash1', 'hash2', 'hash3']
+    files = results[2][1]
+    assert files[0].name == 'file of hash3'
+    assert files[0].number_of_pieces == 14
+    assert files[0].downloaded_pieces == 13
+    assert files[0].size_bytes == 8192
+    assert files[0].priority_id == FilePriority.NORMAL
+    assert files[0].download_strategy_id == FileDownloadStrategy.NORMAL
+
+
+async def test_list_files_many_fault(niquests_mock: MockRouter, mocker: MockerFixture) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    spy_log_warning = mocker.spy(log, 'warning')
+
+    def multicall(_: str, call_list: list[dict[str, Any]]) -> list[Any]:
+        return [{
+            'faultCode': -501,
+            'faultString': 'Could not find info-hash.'
+        } if x['params'][0] == 'hash2' else [[['file of ' + x['params'][0], 14, 13, 8192, 1, 0]]]
+                for x in call_list]
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(multicall))
+    results = await alist(client.list_files_many(['hash1', 'hash2', 'hash3', 'hash4'],
+                                                 chunk_size=3))
+    assert [h for h, _ in results] == ['hash1', 'hash3', 'hash4']
+    assert results[1][1][0].name == 'file of hash3'
+    assert spy_log_warning.call_count == 1
+
+
+async def test_list_files_many_request_error(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(client.multirpc_action_uri).respond(500)
+    with pytest.raises(xmlrpc.client.ProtocolError):
+        await alist(client.list_files_many(['hash1']))
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+async def test_list_all_files_concurrency(mocker: MockerFixture, *, ordered: bool) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    hashes = [f'hash{i}' for i in range(6)]
+    in_flight = 0
+    max_in_flight = 0
+
+    async def list_files(hash_: str) -> AsyncIterator[TorrentTrackedFile]:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(in_flight, max_in_flight)
+        index = int(hash_[4:])
+        # Later hashes complete first.
+        await asyncio.sleep(0.001 * (len(hashes) - index))
+        in_flight -= 1
+        if hash_ == 'hash2':
+            raise HTTPError
+        yield TorrentTrackedFile(hash_, 1, 1, 1, FilePriority.NORMAL, FileDownloadStrategy.NORMAL)
+
+    mocker.patch.object(client,
+                        'list_torrents',
+                        return_value=async_iter(mocker.Mock(hash=x) for x in hashes))
+    mocker.patch.object(client, 'list_files', list_files)
+    names = [f.name async for f in client.list_all_files(concurrency=3, ordered=ordered)]
+    assert max_in_flight == 3
+    assert sorted(names) == ['hash0', 'hash1', 'hash3', 'hash4', 'hash5']
+    if ordered:
+        assert names == ['hash0', 'hash1', 'hash3', 'hash4', 'hash5']
+    else:
+        assert names != sorted(names)
+
+
+async def test_list_all_files_unexpected_error(mocker: MockerFixture) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    mocker.patch.object(client, 'list_torrents', return_value=async_iter([mocker.Mock(hash='h')]))
+    mocker.patch.object(client, 'list_files', side_effect=RuntimeError)
+    with pytest.raises(RuntimeError):
+        await alist(client.list_all_files(concurrency=2))
+
+
+async def test_delete_many(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    calls: list[list[dict[str, Any]]] = []
+
+    def multicall(_: str, call_list: list[dict[str, Any]]) -> list[Any]:
+        calls.append(call_list)
+        return [{
+            'faultCode': -501,
+            'faultString': 'Could not find info-hash.'
+        } if x['params'][0] == 'hash2' and x['methodName'] == 'd.erase' else [0] for x in call_list]
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(multicall))
+    faults = await client.delete_many(['hash1', 'hash2', 'hash3'], chunk_size=2)
+    assert [len(x) for x in calls] == [6, 3]
+    assert [x['methodName'] for x in calls[0][:3]] == ['d.custom5.set', 'd.delete_tied', 'd.erase']
+    assert calls[0][0]['params'] == ['hash1', '1']
+    assert faults['hash1'] is None
+    assert faults['hash3'] is None
+    fault = faults['hash2']
+    assert isinstance(fault, xmlrpc.client.Fault)
+    assert fault.faultCode == -501
+
+
+async def test_delete_many_concurrency(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    responder = xmlrpc_responder(lambda _, call_list: [[0] for _ in call_list])
+    in_flight = max_in_flight = 0
+
+    async def side_effect(request: PreparedRequest) -> Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return responder(request)
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=side_effect)
+    hashes = [f'hash{i}' for i in range(10)]
+    results = await client.delete_many(hashes, chunk_size=2, concurrency=2)
+    assert results == dict.fromkeys(hashes)
+    assert max_in_flight == 2
+
+
+async def test_delete_many_request_error(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    responder = xmlrpc_responder(lambda _, call_list: [[0] for _ in call_list])
+
+    def side_effect(request: PreparedRequest) -> Response:
+        assert isinstance(request.body, bytes)
+        if b'hash3' in request.body:
+            raise ConnectionError
+        return responder(request)
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=side_effect)
+    results = await client.delete_many(['hash1', 'hash2', 'hash3', 'hash4'], chunk_size=2)
+    assert results['hash1'] is None
+    assert results['hash2'] is None
+    assert isinstance(results['hash3'], ConnectionError)
+    assert results['hash4'] is results['hash3']
+    with pytest.raises(ConnectionError):
+        await client.delete('hash3')
+
+
+async def test_xmlrpc_call(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    route = niquests_mock.post(client.multirpc_action_uri).mock(
+        side_effect=xmlrpc_responder(lambda method, *args: [method, *args]))
+    assert await client.xmlrpc_call('d.name', 'hash1') == ['d.name', 'hash1']
+    headers = route.calls[0].request.headers
+    assert headers is not None
+    assert headers['Content-Type'] == 'text/xml'
+    assert str(headers['Authorization']).startswith('Basic ')
+
+
+async def test_xmlrpc_call_fault(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+
+    def handler(*_: Any) -> Any:
+        raise xmlrpc.client.Fault(-506, 'Method not defined')
+
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=xmlrpc_responder(handler))
+    with pytest.raises(xmlrpc.client.Fault):
+        await client.xmlrpc_call('bad.method')
+
+
+async def test_xmlrpc_call_protocol_error(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(client.multirpc_action_uri).respond(500)
+    with pytest.raises(xmlrpc.client.ProtocolError):
+        await client.xmlrpc_call('d.name', 'hash1')
+
+
+def _yield_before_requests(client: ruTorrentClient,
+                           mocker: MockerFixture,
+                           gate: asyncio.Event | None = None) -> None:
+    # The mocked transport never suspends, so let concurrent callers run before each request.
+    request = client._request  # ruff:ignore[private-member-access]
+
+    async def delayed(*args: Any, **kwargs: Any) -> Any:
+        await asyncio.sleep(0)
+        if gate is not None:
+            await gate.wait()
+        return await request(*args, **kwargs)
+
+    mocker.patch.object(client, '_request', side_effect=delayed)
+
+
+async def test_coalesce(niquests_mock: MockRouter, mocker: MockerFixture) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', coalesce=0)
+    _yield_before_requests(client, mocker)
+    route = niquests_mock.post(
+        client.multirpc_action_uri).respond(json=[['name of file', '14', '13', '8192', '1', '0']])
+    first, second, other = await asyncio.gather(alist(client.list_files('hash1')),
+                                                alist(client.list_files('hash1')),
+                                                alist(client.list_files('hash2')))
+    assert first == second == other
+    assert route.call_count == 2
+    await alist(client.list_files('hash1'))
+    assert route.call_count == 3
+
+
+async def test_coalesce_window(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', coalesce=60)
+    route = niquests_mock.post(client.multirpc_action_uri).mock(
+        side_effect=xmlrpc_responder(lambda method, *args: [method, *args]))
+    assert await client.xmlrpc_call('d.custom1', 'hash1') == ['d.custom1', 'hash1']
+    assert await client.xmlrpc_call('d.custom1', 'hash1') == ['d.custom1', 'hash1']
+    assert await client.xmlrpc_call('system.multicall', [{
+        'methodName': 'd.custom1',
+        'params': ['hash1']
+    }]) == ['system.multicall', [{
+        'methodName': 'd.custom1',
+        'params': ['hash1']
+    }]]
+    assert route.call_count == 2
+    # Calls that may change torrents are never coalesced and discard reused responses.
+    await client.xmlrpc_call('d.custom1.set', 'hash1', 'label')
+    await client.xmlrpc_call('d.custom1.set', 'hash1', 'label')
+    await client.xmlrpc_call('d.custom1', 'hash1')
+    assert route.call_count == 5
+
+
+async def test_coalesce_window_invalidated(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', coalesce=60)
+    route = niquests_mock.post(
+        client.multirpc_action_uri).respond(json=[['name of file', '14', '13', '8192', '1', '0']])
+    await alist(client.list_files('hash1'))
+    await alist(client.list_files('hash1'))
+    assert route.call_count == 1
+    await client.remove('hash1')
+    await alist(client.list_files('hash1'))
+    assert route.call_count == 3
+
+
+async def test_coalesce_window_expired(niquests_mock: MockRouter, mocker: MockerFixture) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', coalesce=5)
+    route = niquests_mock.post(client.multirpc_action_uri).respond(json={'t': {}, 'cid': 1})
+    monotonic = mocker.patch('xirvik.client.time.monotonic', return_value=100.0)
+    await client.sync_torrents()
+    monotonic.return_value = 104.0
+    await client.sync_torrents(full=True)
+    assert route.call_count == 1
+    monotonic.return_value = 106.0
+    await client.sync_torrents(full=True)
+    assert route.call_count == 2
+
+
+async def test_coalesce_error_not_reused(niquests_mock: MockRouter, mocker: MockerFixture) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', coalesce=60)
+    _yield_before_requests(client, mocker)
+    route = niquests_mock.post(client.multirpc_action_uri).respond(500, json=[])
+    results = await asyncio.gather(alist(client.list_files('hash1')),
+                                   alist(client.list_files('hash1')),
+                                   return_exceptions=True)
+    assert all(isinstance(x, HTTPError) for x in results)
+    assert route.call_count == 1
+    with pytest.raises(HTTPError):
+        await alist(client.list_files('hash1'))
+    assert route.call_count == 2
+
+
+async def test_coalesce_leader_raises(niquests_mock: MockRouter, mocker: MockerFixture) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', coalesce=0)
+    _yield_before_requests(client, mocker)
+    niquests_mock.post(client.multirpc_action_uri).mock(side_effect=ConnectionError)
+    results = await asyncio.gather(alist(client.list_files('hash1')),
+                                   alist(client.list_files('hash1')),
+                                   return_exceptions=True)
+    assert all(isinstance(x, ConnectionError) for x in results)
+    # The failed request is not reused by a later call.
+    with pytest.raises(ConnectionError):
+        await alist(client.list_files('hash1'))
+
+
+async def test_coalesce_leader_cancelled(niquests_mock: MockRouter, mocker: MockerFixture) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b', coalesce=0)
+    gate = asyncio.Event()
+    _yield_before_requests(client, mocker, gate)
+    route = niquests_mock.post(
+        client.multirpc_action_uri).respond(json=[['name of file', '14', '13', '8192', '1', '0']])
+    leader = asyncio.create_task(alist(client.list_files('hash1')))
+    follower = asyncio.create_task(alist(client.list_files('hash1')))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    await asyncio.sleep(0.01)
+    gate.set()
+    # The follower was waiting for the leader's request and sends it again.
+    assert len(await follower) == 1
+    assert leader.cancelled()
+    assert route.call_count == 1
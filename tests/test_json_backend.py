@@ -0,0 +1,57 @@
+"""JSON backend tests."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from xirvik.json_backend import JSON_BACKENDS, get_json_backend
+from xirvik.typing import FilePriority
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from pytest_mock import MockerFixture
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache() -> Iterator[None]:
+    get_json_backend.cache_clear()
+    yield
+    get_json_backend.cache_clear()
+
+
+@pytest.mark.parametrize('name', JSON_BACKENDS)
+def test_json_backend(name: str) -> None:
+    pytest.importorskip(name)
+    backend = get_json_backend(name)
+    assert backend.name == name
+    assert repr(backend) == f"JSONBackend('{name}')"
+    assert backend.loads(b'{"t": {"a": ["\\u2603", 1]}}') == {'t': {'a': ['☃', 1]}}
+    assert backend.loads('[1.5]') == [1.5]
+    assert backend.dumps([{
+        'name': '☃ é',
+        'priority_id': FilePriority.HIGH,
+        'ratio': 1.5,
+        'finished': None
+    }]) == '[{"name":"☃ é","priority_id":2,"ratio":1.5,"finished":null}]'
+
+
+def test_json_backend_auto(mocker: MockerFixture) -> None:
+    find_spec = mocker.patch('importlib.util.find_spec', return_value=None)
+    assert get_json_backend().name == 'json'
+    assert find_spec.call_count == 2
+    get_json_backend.cache_clear()
+    find_spec.return_value = object()
+    mocker.patch('importlib.import_module')
+    assert get_json_backend().name == 'orjson'
+
+
+def test_json_backend_unknown() -> None:
+    with pytest.raises(ValueError, match='Unknown JSON backend: simplejson'):
+        get_json_backend('simplejson')
+
+
+def test_json_backend_not_installed(mocker: MockerFixture) -> None:
+    mocker.patch('importlib.import_module', side_effect=ImportError)
+    with pytest.raises(ValueError, match='JSON backend msgspec is not installed'):
+        get_json_backend('msgspec')
@@ -0,0 +1,45 @@
+"""Request metrics tests."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from xirvik.metrics import RequestMetrics
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_to_prometheus() -> None:
+    metrics = RequestMetrics()
+    metrics.record('multirpc', 'list', 0.02, bytes_out=10, bytes_in=100)
+    metrics.record('multirpc', 'list', 120, retries=2, failed=True)
+    metrics.record('xmlrpc', 'd.name"\\\n', 0.001)
+    lines = metrics.to_prometheus().splitlines()
+    assert '# TYPE xirvik_requests_total counter' in lines
+    assert 'xirvik_requests_total{endpoint="multirpc",mode="list"} 2' in lines
+    assert 'xirvik_request_failures_total{endpoint="multirpc",mode="list"} 1' in lines
+    assert 'xirvik_request_retries_total{endpoint="multirpc",mode="list"} 2' in lines
+    assert 'xirvik_request_bytes_sent_total{endpoint="multirpc",mode="list"} 10' in lines
+    assert 'xirvik_response_bytes_received_total{endpoint="multirpc",mode="list"} 100' in lines
+    assert '# TYPE xirvik_request_duration_seconds histogram' in lines
+    assert ('xirvik_request_duration_seconds_bucket{endpoint="multirpc",mode="list",le="0.01"} 0'
+            in lines)
+    assert ('xirvik_request_duration_seconds_bucket{endpoint="multirpc",mode="list",le="0.025"} 1'
+            in lines)
+    assert ('xirvik_request_duration_seconds_bucket{endpoint="multirpc",mode="list",le="60.0"} 1'
+            in lines)
+    assert ('xirvik_request_duration_seconds_bucket{endpoint="multirpc",mode="list",le="+Inf"} 2'
+            in lines)
+    assert 'xirvik_request_duration_seconds_sum{endpoint="multirpc",mode="list"} 120.02' in lines
+    assert 'xirvik_request_duration_seconds_count{endpoint="multirpc",mode="list"} 2' in lines
+    assert r'xirvik_requests_total{endpoint="xmlrpc",mode="d.name\"\\\n"} 1' in lines
+
+
+def test_write_textfile(tmp_path: Path) -> None:
+    metrics = RequestMetrics(prefix='job')
+    metrics.record('datadir', '', 0.5)
+    path = tmp_path / 'xirvik.prom'
+    metrics.write_textfile(path)
+    assert path.read_text(encoding='utf-8') == metrics.to_prometheus()
+    assert 'job_requests_total{endpoint="datadir",mode=""} 1\n' in metrics.to_prometheus()
+    assert [x.name for x in tmp_path.iterdir()] == ['xirvik.prom']
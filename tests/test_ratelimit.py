@@ -0,0 +1,150 @@
+"""Rate limiter tests."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from xirvik.ratelimit import AdaptiveConcurrencyLimiter, TokenBucket
+import anyio
+import anyio.lowlevel
+import pytest
+
+if TYPE_CHECKING:
+    from pytest_mock.plugin import MockerFixture
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(mocker: MockerFixture) -> _FakeClock:
+    ret = _FakeClock()
+    mocker.patch('xirvik.ratelimit.time.monotonic', side_effect=ret.monotonic)
+    mocker.patch('xirvik.ratelimit.anyio.sleep', side_effect=ret.sleep)
+    return ret
+
+
+async def test_token_bucket_burst_then_rate(clock: _FakeClock) -> None:
+    bucket = TokenBucket(4, burst=2)
+    for _ in range(4):
+        await bucket.acquire()
+    assert clock.sleeps == [0.25, 0.25]
+    clock.now += 10
+    await bucket.acquire()
+    await bucket.acquire()
+    assert len(clock.sleeps) == 2
+    await bucket.acquire()
+    assert clock.sleeps[-1] == pytest.approx(0.25)
+
+
+async def test_token_bucket_concurrent(clock: _FakeClock) -> None:
+    bucket = TokenBucket(2)
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(bucket.acquire)
+    assert clock.now == 2
+
+
+def test_token_bucket_invalid() -> None:
+    with pytest.raises(ValueError, match='Rate'):
+        TokenBucket(0)
+    with pytest.raises(ValueError, match='Burst'):
+        TokenBucket(1, burst=0)
+
+
+async def test_adaptive_limiter_waits_for_slot() -> None:
+    limiter = AdaptiveConcurrencyLimiter(initial=2)
+    in_flight = max_in_flight = 0
+
+    async def request() -> None:
+        nonlocal in_flight, max_in_flight
+        async with limiter.slot():
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await anyio.sleep(0.001)
+            in_flight -= 1
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(6):
+            tg.start_soon(request)
+    assert max_in_flight == 2
+    assert limiter.in_flight == 0
+
+
+async def test_adaptive_limiter_increase(clock: _FakeClock) -> None:
+    limiter = AdaptiveConcurrencyLimiter(initial=2, maximum=3)
+    async with limiter.slot(), limiter.slot():
+        clock.now += 1
+    # Only the first release happens with the limit reached.
+    assert limiter.limit == pytest.approx(2.5)
+    async with limiter.slot():
+        clock.now += 1
+    assert limiter.limit == pytest.approx(2.5)
+    async with limiter.slot(), limiter.slot():
+        clock.now += 1
+    assert limiter.limit == pytest.approx(2.9)
+    async with limiter.slot(), limiter.slot():
+        clock.now += 1
+    assert limiter.limit == 3
+    # Latency well above the baseline stops growth.
+    limiter.limit = 2
+    async with limiter.slot(), limiter.slot():
+        clock.now += 10
+    assert limiter.limit == 2
+
+
+async def test_adaptive_limiter_decrease_once_per_overload() -> None:
+    limiter = AdaptiveConcurrencyLimiter(initial=8)
+
+    async def request() -> None:
+        async with limiter.slot() as slot:
+            await anyio.lowlevel.checkpoint()
+            slot.failed = True
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(8):
+            tg.start_soon(request)
+    assert limiter.limit == 4
+    await request()
+    assert limiter.limit == 2
+    with pytest.raises(RuntimeError):
+        async with limiter.slot():
+            raise RuntimeError
+    assert limiter.limit == 1
+    await request()
+    assert limiter.limit == 1
+
+
+async def test_adaptive_limiter_cancelled_waiter() -> None:
+    limiter = AdaptiveConcurrencyLimiter(initial=1)
+    entered: list[int] = []
+
+    async def request(index: int) -> None:
+        async with limiter.slot():
+            entered.append(index)
+            await anyio.sleep(0.01)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(request, 0)
+        await anyio.lowlevel.checkpoint()
+        with anyio.move_on_after(0.001):
+            await request(1)
+        tg.start_soon(request, 2)
+    assert entered == [0, 2]
+    assert limiter.in_flight == 0
+
+
+def test_adaptive_limiter_invalid() -> None:
+    with pytest.raises(ValueError, match='Limits'):
+        AdaptiveConcurrencyLimiter(initial=0)
+    with pytest.raises(ValueError, match='Backoff'):
+        AdaptiveConcurrencyLimiter(backoff=1)
@@ -0,0 +1,113 @@
+"""Snapshot tests."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+import operator
+
+from tests.conftest import alist
+from xirvik.cache import TorrentCache
+from xirvik.client import _decode_torrent_row, ruTorrentClient  # ruff:ignore[import-private-name]
+from xirvik.snapshot import TorrentSnapshot
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from niquests_mock import MockRouter
+
+
+def _row(name: str, label: str, left_bytes: str, ratio: str) -> list[str]:
+    return [
+        '1', '0', '1', '1', name, '1000', '1', '1024', '1000', '0', ratio, '0', '0', '512', label,
+        '0', '0', '0', '0', left_bytes
+    ] + (15 * ['0']) + ['1633423132\n']
+
+
+LIST_JSON: dict[str, Any] = {
+    't': {
+        'hash1': _row('first', 'movies', '0', '1.5'),
+        'hash2': _row('second', 'tv', '100', '0.2'),
+        'hash3': _row('third', 'movies', '0', '0.1')
+    },
+    'cid': 92385
+}
+
+
+async def test_list_torrents_snapshot(niquests_mock: MockRouter) -> None:
+    client = ruTorrentClient('hostname-test.com', 'a', 'b')
+    niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    expected = await alist(client.list_torrents())
+    niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    snapshot = await client.list_torrents_snapshot()
+    assert len(snapshot) == 3
+    assert list(snapshot) == expected
+    assert snapshot[1].finished == expected[1].finished
+    assert snapshot.hashes == ['hash1', 'hash2', 'hash3']
+    assert snapshot.index('hash3') == 2
+    with pytest.raises(KeyError):
+        snapshot.index('unknown')
+    assert list(snapshot.column('left_bytes')) == [0, 100, 0]
+    assert snapshot.column('custom1') == ['movies', 'tv', 'movies']
+    assert snapshot.column('hash') == ['hash1', 'hash2', 'hash3']
+    assert snapshot.column('finished')[0] == 1633423132
+
+
+def test_snapshot_filter() -> None:
+    assert len(TorrentSnapshot()) == 0
+    snapshot = TorrentSnapshot(_decode_torrent_row(k, list(v)) for k, v in LIST_JSON['t'].items())
+    mask = [
+        a and b for a, b in zip(snapshot.mask('custom1', lambda x: x == 'movies'),
+                                snapshot.mask('left_bytes', lambda x: x == 0),
+                                strict=True)
+    ]
+    assert mask == [True, False, True]
+    filtered = snapshot.filter(mask)
+    assert filtered.hashes == ['hash1', 'hash3']
+    assert filtered.index('hash3') == 1
+    assert [x.name for x in filtered] == ['first', 'third']
+    assert filtered[0].ratio == pytest.approx(1.5)
+    assert filtered[0].is_open is True
+    assert filtered[0].state_changed is None
+    assert filtered.filter(filtered.mask('ratio', lambda x: x >= 1)).hashes == ['hash1']
+
+
+def test_snapshot_extend_rows() -> None:
+    rows = [(k, list(v)) for k, v in LIST_JSON['t'].items()]
+    snapshot = TorrentSnapshot()
+    snapshot.extend_rows(rows[:1])
+    snapshot.extend_rows(rows[1:])
+    assert list(snapshot) == [_decode_torrent_row(k, list(v)) for k, v in rows]
+    assert snapshot.index('hash2') == 1
+    with pytest.raises(ValueError, match='do not have every field'):
+        snapshot.extend_rows([('hash4', ['0'] * 10)])
+    with pytest.raises(ValueError, match='could not convert'):
+        snapshot.extend_rows([('hash4', [*rows[0][1][:10], 'x', *rows[0][1][11:]])])
+    assert len(snapshot) == 3
+    assert all(len(snapshot.column(x)) == 3 for x in ('name', 'ratio', 'finished'))
+
+
+def test_snapshot_compare() -> None:
+    snapshot = TorrentSnapshot()
+    snapshot.extend_rows(LIST_JSON['t'].items())
+    assert snapshot.compare('custom1', operator.eq, 'movies') == [True, False, True]
+    assert snapshot.compare('custom1', operator.ne, 'unknown') == [True, True, True]
+    assert snapshot.compare('custom1', operator.lt, 'tv') == [True, False, True]
+    assert snapshot.compare('ratio', operator.ge, 1) == [True, False, False]
+    assert snapshot.compare('is_open', operator.eq, value=True) == [True, True, True]
+    finished = datetime.fromtimestamp(1633423132, timezone.utc)
+    assert snapshot.compare('finished', operator.ge, finished) == [True, True, True]
+    assert snapshot.compare('state_changed', operator.eq, None) == [True, True, True]
+    assert snapshot.compare('hash', operator.eq, 'hash2') == [False, True, False]
+    assert snapshot.mask('name', lambda x: x.startswith('t')) == [False, False, True]
+
+
+async def test_list_torrents_snapshot_cached(niquests_mock: MockRouter, tmp_path: Path) -> None:
+    client = ruTorrentClient('hostname-test.com',
+                             'a',
+                             'b',
+                             cache=TorrentCache(tmp_path / 'cache.sqlite3'))
+    route = niquests_mock.post(client.multirpc_action_uri).respond(json=LIST_JSON)
+    expected = await alist(client.list_torrents())
+    assert list(await client.list_torrents_snapshot()) == expected
+    assert route.call_count == 1
@@ -0,0 +1,124 @@
+"""Tracing tests."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import json
+
+from xirvik.tracing import JSONLinesTracer, OpenTelemetryTracer, Tracer
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+
+def _read(path: Path) -> list[dict[str, Any]]:
+    return [json.loads(x) for x in path.read_text(encoding='utf-8').splitlines()]
+
+
+def _fail() -> None:
+    msg = 'bad'
+    raise ValueError(msg)
+
+
+def test_noop_tracer() -> None:
+    tracer = Tracer()
+    assert tracer.enabled is False
+    with tracer.span('a', {'x': 1}) as span:
+        span.set_attribute('y', 2)
+        span.record_exception(ValueError())
+    tracer.current_span().set_attribute('z', 3)
+    tracer.close()
+
+
+def test_json_lines_tracer(tmp_path: Path) -> None:
+    tracer = JSONLinesTracer(tmp_path / 'trace.jsonl')
+    with tracer.span('parent', {'x': 1}) as parent:
+        tracer.current_span().set_attribute('y', 2)
+        with tracer.span('child', current=False):
+            assert tracer.current_span() is parent
+        with pytest.raises(ValueError, match='bad'), tracer.span('failed'):
+            _fail()
+    with tracer.span('other'):
+        pass
+    tracer.close()
+    child, failed, parent_record, other = _read(tmp_path / 'trace.jsonl')
+    assert parent_record['name'] == 'parent'
+    assert parent_record['parent_span_id'] is None
+    assert parent_record['attributes'] == {'x': 1, 'y': 2}
+    assert parent_record['status'] == 'OK'
+    assert parent_record['end_time_unix_nano'] >= parent_record['start_time_unix_nano']
+    assert child['parent_span_id'] == parent_record['span_id']
+    assert child['trace_id'] == parent_record['trace_id']
+    assert failed['status'] == 'ERROR'
+    assert failed['error'] == 'ValueError: bad'
+    assert other['trace_id'] != parent_record['trace_id']
+
+
+def test_json_lines_tracer_abandoned_generator(tmp_path: Path) -> None:
+    tracer = JSONLinesTracer(tmp_path / 'trace.jsonl')
+
+    def gen() -> Generator[int]:
+        with tracer.span('gen', current=False):
+            yield 1
+            yield 2
+
+    it = gen()
+    next(it)
+    it.close()
+    tracer.close()
+    assert _read(tmp_path / 'trace.jsonl')[0]['status'] == 'OK'
+
+
+class _FakeOpenTelemetrySpan:
+    def __init__(self, name: str, attributes: dict[str, Any] | None) -> None:
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.exceptions: list[BaseException] = []
+        self.ended = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.exceptions.append(exception)
+
+    def end(self) -> None:
+        self.ended = True
+
+
+class _FakeOpenTelemetryTracer:
+    def __init__(self) -> None:
+        self.spans: list[_FakeOpenTelemetrySpan] = []
+
+    def start_span(self,
+                   name: str,
+                   attributes: dict[str, Any] | None = None) -> _FakeOpenTelemetrySpan:
+        self.spans.append(_FakeOpenTelemetrySpan(name, attributes))
+        return self.spans[-1]
+
+    def start_as_current_span(self, name: str, attributes: dict[str, Any] | None = None) -> Any:
+        tracer = self
+
+        class Context:
+            def __enter__(self) -> _FakeOpenTelemetrySpan:
+                return tracer.start_span(name, attributes)
+
+            def __exit__(self, *args: object) -> None:
+                tracer.spans[-1].end()
+
+        return Context()
+
+
+def test_open_telemetry_tracer() -> None:
+    otel = _FakeOpenTelemetryTracer()
+    tracer = OpenTelemetryTracer(otel)
+    with tracer.span('current', {'x': 1}) as span:
+        assert tracer.current_span() is span
+    with pytest.raises(ValueError, match='bad'), tracer.span('not current', current=False):
+        _fail()
+    current, not_current = otel.spans
+    assert current.attributes == {'x': 1}
+    assert current.ended
+    assert not_current.ended
+    assert len(not_current.exceptions) == 1
@@ -0,0 +1,170 @@
+"""Record type tests."""
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any
+import copy
+import pickle  # ruff:ignore[suspicious-pickle-import]
+
+from xirvik.typing import (
+    UNKNOWN_TORRENT_COLUMN,
+    CompactTorrentInfo,
+    CompactTorrentTrackedFile,
+    FileDownloadStrategy,
+    FilePriority,
+    LazyTorrentInfo,
+    TorrentInfo,
+    TorrentTrackedFile,
+    field_converter,
+    torrent_row_decoders,
+)
+import pytest
+
+
+def _info(**kwargs: Any) -> TorrentInfo:
+    values: dict[str, Any] = dict.fromkeys(TorrentInfo._fields, 0) | {
+        'hash': 'hash1',
+        'is_open': True,
+        'is_hash_checking': False,
+        'is_hash_checked': True,
+        'name': 'name',
+        'ratio': 1.5,
+        'custom1': 'label',
+        'base_path': '/downloads/name',
+        'message': '',
+        'custom2': '',
+        'is_active': False,
+        'is_private': False,
+        'is_multi_file': True,
+        'state_changed': datetime(2021, 10, 5, 8, 38, 52, tzinfo=timezone.utc),
+        'creation_date': None,
+        'finished': datetime(2021, 10, 5, 8, 38, 52, tzinfo=timezone.utc),
+        'free_diskspace': 2 ** 40
+    } | kwargs
+    return TorrentInfo(**values)
+
+
+def test_compact_torrent_info() -> None:
+    info = _info()
+    compact = CompactTorrentInfo._make(info)
+    assert compact == info
+    assert compact != 'hash1'
+    assert tuple(compact) == info
+    assert hash(compact) == hash(info)
+    assert len(compact) == len(info)
+    assert compact[11] == info[11]
+    assert compact.state_changed == info.state_changed
+    assert compact.creation_date is None
+    assert compact.is_open is True
+    assert compact.free_diskspace == 2 ** 40
+    assert compact._asdict() == info._asdict()
+    assert repr(compact) == repr(info).replace('TorrentInfo', 'CompactTorrentInfo')
+    assert CompactTorrentInfo(**info._asdict()) == compact
+    assert pickle.loads(pickle.dumps(compact)) == info  # ruff:ignore[suspicious-pickle-usage]
+    with pytest.raises(AttributeError, match='read-only'):
+        compact.ratio = 2
+    with pytest.raises(AttributeError, match='read-only'):
+        compact.name = 'other'
+    with pytest.raises(AttributeError, match='read-only'):
+        del compact.name
+
+
+def test_compact_torrent_info_sequence() -> None:
+    info = _info()
+    compact = CompactTorrentInfo._make(info)
+    assert isinstance(compact, Sequence)
+    assert compact[:5] == info[:5]
+    assert compact[-3:] == info[-3:]
+    assert compact[::2] == info[::2]
+    assert 'name' in compact
+    assert compact.index('label') == info.index('label')
+    assert compact.count(0) == info.count(0)
+    assert tuple(reversed(compact)) == tuple(reversed(info))
+    assert compact < CompactTorrentInfo._make(info._replace(name='other'))
+    assert copy.deepcopy(compact) == info
+
+
+def test_compact_torrent_info_replace() -> None:
+    info = _info()
+    compact = CompactTorrentInfo._make(info)
+    replaced = compact._replace(custom1='other', ratio=2.5)
+    assert isinstance(replaced, CompactTorrentInfo)
+    assert replaced == info._replace(custom1='other', ratio=2.5)
+    assert compact == info
+    with pytest.raises(ValueError, match='unknown'):
+        compact._replace(unknown=1)
+
+
+def test_compact_torrent_info_interns_labels() -> None:
+    number = 1
+    first = CompactTorrentInfo._make(_info(custom1=f'label {number}'))
+    second = CompactTorrentInfo._make(_info(custom1=f'label {number}'))
+    assert first.custom1 is second.custom1
+
+
+def test_compact_torrent_info_wrong_field_count() -> None:
+    with pytest.raises(TypeError, match='Expected 36 fields, got 1'):
+        CompactTorrentInfo('hash1')
+
+
+def test_compact_torrent_tracked_file() -> None:
+    file = TorrentTrackedFile('name', 14, 13, 8192, FilePriority.HIGH,
+                              FileDownloadStrategy.LEADING_CHUNK_FIRST)
+    compact = CompactTorrentTrackedFile._make(file)
+    assert compact == file
+    assert compact.priority_id is FilePriority.HIGH
+    assert compact.download_strategy_id is FileDownloadStrategy.LEADING_CHUNK_FIRST
+    assert compact._asdict() == file._asdict()
+    assert compact[1:3] == (14, 13)
+    assert compact._replace(priority_id=FilePriority.NORMAL) == file._replace(
+        priority_id=FilePriority.NORMAL)
+    assert hasattr(CompactTorrentTrackedFile, 'number_of_pieces')
+
+
+def test_lazy_torrent_info() -> None:
+    row = [
+        '1', '0', '1', '1', 'name', '1000', '1', '1024', '1000', '0', '0.14', '0', '0', '512',
+        'label '
+    ] + (20 * ['0']) + ['1633423132']
+    info = LazyTorrentInfo('hash1', row)
+    assert isinstance(info, Sequence)
+    assert info[:6] == ('hash1', True, False, True, 1, 'name')
+    assert info[-1] == datetime(2021, 10, 5, 8, 38, 52, tzinfo=timezone.utc)
+    assert 'name' in info
+    assert info.index('name') == 5
+    replaced = info._replace(name='other')
+    assert isinstance(replaced, LazyTorrentInfo)
+    assert replaced[:6] == ('hash1', True, False, True, 1, 'other')
+    assert info.name == 'name'
+    assert info < replaced
+    assert LazyTorrentInfo._make(info) == info
+    assert copy.copy(info) == info
+    assert pickle.loads(pickle.dumps(info)) == info  # ruff:ignore[suspicious-pickle-usage]
+    assert info.to_torrent_info() == tuple(info)
+    with pytest.raises(AttributeError, match='read-only'):
+        info.name = 'other'
+    with pytest.raises(AttributeError, match='read-only'):
+        del info.name
+    with pytest.raises(ValueError, match='unknown'):
+        info._replace(unknown=1)
+
+
+def test_lazy_torrent_info_wrong_field_count() -> None:
+    with pytest.raises(TypeError, match='Expected 36 arguments, got 1'):
+        LazyTorrentInfo._make(['hash1'])
+
+
+def test_field_converter() -> None:
+    assert field_converter('int')(' 12 ') == 12
+    assert field_converter('bool')('1') is True
+    assert field_converter('datetime | None')('0') is None
+    assert field_converter('str')(' name ') == 'name'
+
+
+def test_torrent_row_decoders() -> None:
+    width = len(TorrentInfo._fields)
+    indices = [i for i, _ in torrent_row_decoders(width)]
+    assert len(indices) == width - 1
+    assert UNKNOWN_TORRENT_COLUMN not in indices
+    assert [i for i, _ in torrent_row_decoders(10)] == list(range(10))
@@ -0,0 +1,206 @@
+"""On-disk torrent state cache."""
+from __future__ import annotations
+
+from contextlib import closing
+from datetime import datetime, timezone
+from itertools import starmap
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+import inspect
+import json
+import logging
+import sqlite3
+import time
+import urllib.parse
+
+from .typing import TorrentInfo
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+__all__ = ('DEFAULT_CACHE_MAX_AGE', 'TorrentCache')
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_AGE = 300
+"""Default maximum age of cached torrent state in seconds."""
+_SCHEMA_VERSION = 1
+_DATETIME_INDICES = frozenset(
+    i for i, v in enumerate(inspect.get_annotations(TorrentInfo).values())
+    if (v if isinstance(v, str) else v.__forward_arg__) == 'datetime | None')
+
+
+def _encode(info: TorrentInfo) -> str:
+    return json.dumps([x.timestamp() if isinstance(x, datetime) else x for x in info])
+
+
+def _decode(data: str) -> TorrentInfo:
+    return TorrentInfo._make(
+        datetime.fromtimestamp(x, timezone.utc) if i in _DATETIME_INDICES and x is not None else x
+        for i, x in enumerate(json.loads(data)))
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    # Check again with the lock held as another process may have created the schema.
+    if conn.execute('PRAGMA user_version').fetchone()[0] == _SCHEMA_VERSION:
+        return
+    conn.execute('DROP TABLE IF EXISTS hosts')
+    conn.execute('DROP TABLE IF EXISTS torrents')
+    conn.execute('CREATE TABLE hosts (host TEXT PRIMARY KEY, updated_at REAL NOT NULL)')
+    conn.execute('CREATE TABLE torrents (host TEXT NOT NULL, hash TEXT NOT NULL, '
+                 'data TEXT NOT NULL, PRIMARY KEY (host, hash))')
+    conn.execute(f'PRAGMA user_version = {_SCHEMA_VERSION:d}')
+
+
+class TorrentCache:
+    """
+    SQLite-backed cache of the torrent list, keyed by host.
+
+    Entries are keyed by host and port, as returned by :py:meth:`key`, so that clients connecting to
+    the same server share them however the host was given.
+
+    Each host's torrents are replaced in a single transaction, so concurrent processes sharing the
+    database never see a partially written list. The database uses write-ahead logging so readers
+    are not blocked by a writer.
+
+    Parameters
+    ----------
+    path : str | Path | None
+        Database file path. Defaults to ``~/.cache/xirvik/torrents.sqlite3``. Parent directories are
+        created as needed.
+    max_age : float
+        Maximum age in seconds of a host's cached torrents before they are considered stale.
+    timeout : float
+        Time in seconds to wait for another process to release a lock on the database.
+    """
+    def __init__(self,
+                 path: str | Path | None = None,
+                 max_age: float = DEFAULT_CACHE_MAX_AGE,
+                 timeout: float = 30) -> None:
+        self.path = Path(path or '~/.cache/xirvik/torrents.sqlite3').expanduser()
+        """Database file path."""
+        self.max_age = max_age
+        """Maximum age in seconds of cached torrents."""
+        self.timeout = timeout
+        """Time in seconds to wait for a lock."""
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            if conn.execute('PRAGMA user_version').fetchone()[0] != _SCHEMA_VERSION:
+                self._transaction(conn, (), create_schema=True)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    @staticmethod
+    def _transaction(conn: sqlite3.Connection,
+                     statements: Iterable[tuple[str, Iterable[Sequence[Any]]]],
+                     *,
+                     create_schema: bool = False) -> None:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if create_schema:
+                _create_schema(conn)
+            for sql, params in statements:
+                conn.executemany(sql, params)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def key(host: str, port: int | None = None) -> str:
+        """
+        Get the key of a host's entry.
+
+        Parameters
+        ----------
+        host : str
+            Host name, optionally followed by ``:`` and the port.
+        port : int | None
+            Port. Defaults to the port in ``host``, or 443.
+
+        Returns
+        -------
+        str
+            The host name and the port separated by ``:``.
+        """
+        parts = urllib.parse.urlsplit(f'//{host}')
+        name = parts.netloc.rpartition(':')[0] if parts.port else parts.netloc
+        return f'{name}:{port or parts.port or 443}'
+
+    def get(self, host: str, *, ignore_age: bool = False) -> list[TorrentInfo] | None:
+        """
+        Get the cached torrents of a host.
+
+        Parameters
+        ----------
+        host : str
+            Key of the host the torrents were listed from, as returned by :py:meth:`key`.
+        ignore_age : bool
+            Return the cached torrents even if they are older than :py:attr:`max_age`.
+
+        Returns
+        -------
+        list[TorrentInfo] | None
+            The cached torrents, or ``None`` if the host is not cached or its entry is stale.
+        """
+        with closing(self._connect()) as conn:
+            # Read the timestamp and rows from the same snapshot of the database.
+            conn.execute('BEGIN')
+            try:
+                row = conn.execute('SELECT updated_at FROM hosts WHERE host = ?',
+                                   (host,)).fetchone()
+                if row is None:
+                    return None
+                if not ignore_age and time.time() - row[0] > self.max_age:
+                    log.debug('Cached torrents for %s are stale.', host)
+                    return None
+                return list(
+                    starmap(
+                        _decode,
+                        conn.execute('SELECT data FROM torrents WHERE host = ? ORDER BY rowid',
+                                     (host,))))
+            finally:
+                conn.execute('COMMIT')
+
+    def put(self, host: str, torrents: Iterable[TorrentInfo]) -> None:
+        """
+        Atomically replace the cached torrents of a host.
+
+        Parameters
+        ----------
+        host : str
+            Key of the host the torrents were listed from, as returned by :py:meth:`key`.
+        torrents : Iterable[TorrentInfo]
+            All torrents of the host.
+        """
+        rows = [(host, info.hash, _encode(info)) for info in torrents]
+        with closing(self._connect()) as conn:
+            self._transaction(conn, (
+                ('DELETE FROM torrents WHERE host = ?', [(host,)]),
+                ('INSERT OR REPLACE INTO torrents (host, hash, data) VALUES (?, ?, ?)', rows),
+                ('INSERT OR REPLACE INTO hosts (host, updated_at) VALUES (?, ?)', [
+                    (host, time.time())
+                ]),
+            ))
+        log.debug('Cached %d torrents for %s.', len(rows), host)
+
+    def invalidate(self, host: str) -> None:
+        """
+        Remove the cached torrents of a host.
+
+        Parameters
+        ----------
+        host : str
+            Key of the host the torrents were listed from, as returned by :py:meth:`key`.
+        """
+        with closing(self._connect()) as conn:
+            self._transaction(conn, (
+                ('DELETE FROM torrents WHERE host = ?', [(host,)]),
+                ('DELETE FROM hosts WHERE host = ?', [(host,)]),
+            ))
@@ -1,31 +1,71 @@
 """Client for ruTorrent."""
 from __future__ import annotations
 
-from datetime import datetime, timezone
 from functools import cached_property
+from http import HTTPStatus
 from netrc import netrc
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, ForwardRef, cast
-from urllib.parse import quote
+from types import MappingProxyType
+from typing import IO, TYPE_CHECKING, Any, NamedTuple, TypeVar, cast, overload
+from urllib.parse import parse_qsl, quote, unquote
+import contextlib
+import functools
 import inspect
+import io
+import itertools
 import logging
+import operator
+import re
+import tarfile
+import time
 import xmlrpc.client as xmlrpc
 
-from anyio.to_thread import run_sync
-from niquests import AsyncSession
+from niquests import AsyncSession, TimeoutConfiguration
 from niquests.adapters import AsyncHTTPAdapter
 from typing_extensions import Self
+from unidecode import unidecode
 from urllib3.util import Retry
 import anyio
 import niquests
 
-from .typing import FileDownloadStrategy, FilePriority, TorrentInfo, TorrentTrackedFile
-from .utils import parse_header
+from .json_backend import get_json_backend
+from .ratelimit import AdaptiveConcurrencyLimiter, TokenBucket
+from .snapshot import TorrentSnapshot
+from .tracing import Tracer
+from .typing import (
+    CompactTorrentInfo,
+    CompactTorrentTrackedFile,
+    FileDownloadStrategy,
+    FilePriority,
+    LazyTorrentInfo,
+    TorrentEvent,
+    TorrentEventType,
+    TorrentInfo,
+    TorrentTrackedFile,
+    field_converter,
+    torrent_row_decoders,
+)
+from .utils import iter_json_object_members, parse_header
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncIterator, Iterable
+    from collections.abc import (
+        AsyncIterator,
+        Awaitable,
+        Callable,
+        Iterable,
+        Iterator,
+        Mapping,
+        Sequence,
+    )
     from types import TracebackType
 
+    from niquests._typing import HttpMethodType
+
+    from .cache import TorrentCache
+    from .metrics import RequestMetrics
+    from .ratelimit import ConcurrencySlot
+    from .tracing import Span
+
 __all__ = ('UnexpectedruTorrentError', 'ruTorrentClient')
 
 log = logging.getLogger(__name__)
@@ -39,10 +79,355 @@ class ListTorrentsError(Exception):
     """Raised when ``ruTorrentClient.list_torrents`` has an exception."""
 
 
-FIRST_YEAR_XIRVIK = 2009
+STREAM_CHUNK_SIZE = 65536
+"""Size in bytes of the chunks read from streamed responses."""
+DEFAULT_POOL_CONNECTIONS = 10
+"""Default number of connection pools to cache."""
+DEFAULT_POOL_MAXSIZE = 10
+"""Default maximum number of connections to keep open to the host."""
+DEFAULT_CONNECT_TIMEOUT = 10.0
+"""Default time in seconds to wait for a connection."""
+DEFAULT_READ_TIMEOUT = 120.0
+"""Default time in seconds to wait for data from the server."""
+DEFAULT_KEEPALIVE_DELAY = 600.0
+"""Default time in seconds to keep an idle connection alive."""
+DEFAULT_RATE_BURST = 10
+"""Default number of requests that can be sent at once before rate limits apply."""
+ENDPOINTS = ('multirpc', 'xmlrpc', 'datadir', 'addtorrent', 'source', 'edit', 'other')
+"""
+Names of the ruTorrent endpoints used by the client, for per-endpoint settings. ``other`` is any
+URI that is not one of the others.
+"""
+_PLUGIN_ENDPOINTS = frozenset({'datadir', 'edit', 'source'})
+_NOOP_TRACER = Tracer()
+
+
+def _decode_torrent_row(hash_: str, row: list[str], record: Any = TorrentInfo) -> TorrentInfo:
+    return cast(
+        'TorrentInfo',
+        record._make([hash_, *[conv(row[i]) for i, conv in torrent_row_decoders(len(row))]]))
+
+
+def _decode_lazy_torrent_row(hash_: str, row: list[str]) -> TorrentInfo:
+    # Lazy records have the same attributes, so callers are typed as receiving TorrentInfo.
+    return cast('TorrentInfo', LazyTorrentInfo(hash_, row))
+
+
+TORRENT_COMMANDS = MappingProxyType({
+    'is_open': 'd.is_open=',
+    'is_hash_checking': 'd.is_hash_checking=',
+    'is_hash_checked': 'd.is_hash_checked=',
+    'state': 'd.state=',
+    'name': 'd.name=',
+    'size_bytes': 'd.size_bytes=',
+    'completed_chunks': 'd.completed_chunks=',
+    'size_chunks': 'd.size_chunks=',
+    'bytes_done': 'd.bytes_done=',
+    'up_total': 'd.up.total=',
+    'ratio': 'd.ratio=',
+    'up_rate': 'd.up.rate=',
+    'down_rate': 'd.down.rate=',
+    'chunk_size': 'd.chunk_size=',
+    'custom1': 'd.custom1=',
+    'peers_accounted': 'd.peers_accounted=',
+    'peers_not_connected': 'd.peers_not_connected=',
+    'peers_connected': 'd.peers_connected=',
+    'peers_complete': 'd.peers_complete=',
+    'left_bytes': 'd.left_bytes=',
+    'priority': 'd.priority=',
+    'state_changed': 'd.state_changed=',
+    'skip_total': 'd.skip.total=',
+    'hashing': 'd.hashing=',
+    'chunks_hashed': 'd.chunks_hashed=',
+    'base_path': 'd.base_path=',
+    'creation_date': 'd.creation_date=',
+    'tracker_focus': 'd.tracker_focus=',
+    'is_active': 'd.is_active=',
+    'message': 'd.message=',
+    'custom2': 'd.custom2=',
+    'free_diskspace': 'd.free_diskspace=',
+    'is_private': 'd.is_private=',
+    'is_multi_file': 'd.is_multi_file=',
+    'finished': 'd.custom=seedingtime'
+})
+"""``d.multicall2`` command for each field of ``TorrentInfo`` other than the hash."""
+
+
+class _TorrentProjection:
+    """Record type and decoders for a subset of the fields of ``TorrentInfo``."""
+    __slots__ = ('commands', 'converters', 'fields', 'record')
+
+    def __init__(self, fields: tuple[str, ...]) -> None:
+        annotations = inspect.get_annotations(TorrentInfo)
+        self.fields = fields
+        self.commands = tuple(TORRENT_COMMANDS[field] for field in fields)
+        self.converters = tuple(field_converter(annotations[field]) for field in fields)
+        # The fields are only known at run time, which type checkers cannot follow.
+        self.record: Any = TorrentInfo if fields == tuple(TORRENT_COMMANDS) else cast(
+            'Any', NamedTuple)('PartialTorrentInfo', [('hash', str), *((x, annotations[x])
+                                                                       for x in fields)])
+
+    def decode(self, row: Sequence[Any]) -> Any:
+        return self.record._make(
+            [row[0], *(conv(x) for conv, x in zip(self.converters, row[1:], strict=True))])
+
+    def project(self, info: TorrentInfo) -> Any:
+        return self.record._make([info.hash, *(getattr(info, field) for field in self.fields)])
+
+
+COALESCED_XMLRPC_METHODS = frozenset(
+    {'d.custom1', 'd.multicall.filtered', 'd.multicall2', 'f.multicall'})
+"""Read-only XML-RPC methods whose concurrent identical calls can share a request."""
+
+LABELLED_FILTER = 'not={equal={d.custom1=,cat=}}'
+"""``d.multicall.filtered`` expression that matches torrents with a label."""
+
+
+def _quote_argument(value: str) -> str:
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def label_filter(label: str) -> str:
+    """
+    Get a ``d.multicall.filtered`` expression that matches torrents with a label.
+
+    ruTorrent may store a label URL-encoded, so both forms are matched.
+
+    Parameters
+    ----------
+    label : str
+        The label.
+
+    Returns
+    -------
+    str
+        The filter expression, for the ``filter`` argument of
+        :py:meth:`ruTorrentClient.list_torrents`.
+    """
+    # Encoded like encodeURIComponent() in JavaScript.
+    exprs = [
+        f'equal={{d.custom1=,cat={_quote_argument(x)}}}'
+        for x in dict.fromkeys((label, quote(label, safe="!'()*")))
+    ]
+    return exprs[0] if len(exprs) == 1 else f'or={{{",".join(exprs)}}}'
+
+
+@functools.lru_cache
+def _torrent_projection(fields: tuple[str, ...]) -> _TorrentProjection:
+    if unknown := set(fields) - {'hash', *TORRENT_COMMANDS}:
+        msg = f'Unknown fields: {", ".join(sorted(unknown))}'
+        raise ValueError(msg)
+    return _TorrentProjection(tuple(x for x in dict.fromkeys(fields) if x != 'hash'))
+
+
+FILE_COMMANDS = ('f.path=', 'f.size_chunks=', 'f.completed_chunks=', 'f.size_bytes=', 'f.priority=',
+                 'f.prioritize_first=')
+"""``f.multicall`` commands matching the fields of ``TorrentTrackedFile``."""
+
+
+def _decode_file_row(x: Sequence[Any], record: Any = TorrentTrackedFile) -> TorrentTrackedFile:
+    # Numeric values come as strings from ruTorrent.
+    return cast(
+        'TorrentTrackedFile',
+        record(
+            x[0],
+            int(x[1]),  # total number of pieces
+            int(x[2]),  # downloaded pieces
+            int(x[3]),  # size in bytes
+            FilePriority(int(x[4])),  # priority ID
+            FileDownloadStrategy(int(x[5]))))  # download strategy ID
+
+
+DELETE_COMMANDS = ('d.custom5.set', 'd.delete_tied', 'd.erase')
+"""XML-RPC methods called in order to delete a torrent and its files."""
+
+
+def _delete_calls(hash_: str) -> list[tuple[str, tuple[Any, ...]]]:
+    return [(method, (hash_, '1') if method == 'd.custom5.set' else (hash_,))
+            for method in DELETE_COMMANDS]
+
+
+def _is_fault(r: niquests.Response) -> bool:
+    # A fault response has <fault> right after <methodResponse>. Faults of calls inside a
+    # system.multicall are plain structs and do not match.
+    return b'<fault>' in (r.content or b'')[:256]
+
+
+def _request_mode(endpoint: str, data: Any) -> str:
+    if endpoint == 'xmlrpc' and isinstance(data, bytes):
+        m = re.search(rb'<methodName>([^<]*)</methodName>', data[:512])
+        return m[1].decode() if m else ''
+    if endpoint == 'multirpc' and data:
+        # Form bodies are sent as mappings, pairs or already encoded strings.
+        if isinstance(data, bytes):
+            data = data.decode(errors='replace')
+        return str(dict(parse_qsl(data) if isinstance(data, str) else data).get('mode', ''))
+    return ''
+
+
+def _request_sizes(r: niquests.Response | None, *, stream: bool) -> tuple[int, int, int]:
+    bytes_out = bytes_in = retries = 0
+    if r is not None:
+        body = r.request.body if r.request is not None else None
+        if isinstance(body, str):
+            body = body.encode()
+        bytes_out = len(body) if isinstance(body, (bytes, bytearray)) else 0
+        # The body of a streamed response has not been read yet.
+        bytes_in = (int(r.headers.get('content-length') or 0) if stream else len(r.content or b''))
+        if (history := getattr(getattr(r.raw, 'retries', None), 'history', None)) is not None:
+            retries = len(history)
+    return bytes_out, bytes_in, retries
+
+
+_F = TypeVar('_F', bound='Callable[..., Any]')
+_T = TypeVar('_T')
+_R = TypeVar('_R')
 
 
-class ruTorrentClient:  # ruff:ignore[invalid-class-name]
+def _traced(count: str | None = None) -> Callable[[_F], _F]:
+    """
+    Run each call of a client method in a span named after the method.
+
+    When the client's tracer is disabled the method is called directly.
+
+    Parameters
+    ----------
+    count : str | None
+        Attribute to set to the number of items yielded by an async generator method, or to the
+        length of the value returned by a coroutine method.
+
+    Returns
+    -------
+    Callable[[_F], _F]
+        The decorator.
+    """
+    def decorator(func: _F) -> _F:
+        name = f'ruTorrentClient.{func.__name__}'
+        if inspect.isasyncgenfunction(func):
+
+            async def traced_gen(self: ruTorrentClient, *args: Any, **kwargs: Any) -> Any:
+                n = 0
+                # The span stays open across yields, so it is not made current.
+                with self.tracer.span(name, current=False) as span:
+                    try:
+                        async with contextlib.aclosing(func(self, *args, **kwargs)) as it:
+                            async for item in it:
+                                n += 1
+                                yield item  # ruff:ignore[yield-in-context-manager-in-async-generator]
+                    finally:
+                        if count:
+                            span.set_attribute(count, n)
+
+            @functools.wraps(func)
+            def gen_wrapper(self: ruTorrentClient, *args: Any, **kwargs: Any) -> Any:
+                if self.tracer.enabled:
+                    return traced_gen(self, *args, **kwargs)
+                return func(self, *args, **kwargs)
+
+            return cast('_F', gen_wrapper)
+
+        @functools.wraps(func)
+        async def wrapper(self: ruTorrentClient, *args: Any, **kwargs: Any) -> Any:
+            if not self.tracer.enabled:
+                return await func(self, *args, **kwargs)
+            with self.tracer.span(name) as span:
+                ret = await func(self, *args, **kwargs)
+                if count:
+                    span.set_attribute(count, len(ret))
+                return ret
+
+        return cast('_F', wrapper)
+
+    return decorator
+
+
+def _fault_from_result(result: Any) -> xmlrpc.Fault | None:
+    if isinstance(result, dict) and 'faultCode' in result and 'faultString' in result:
+        return xmlrpc.Fault(result['faultCode'], result['faultString'])
+    return None
+
+
+async def _run_each(func: Callable[[_T], Awaitable[_R]],
+                    items: Sequence[_T]) -> list[tuple[int, _R | Exception]]:
+    """
+    Call a function for each item in a task group.
+
+    An exception is returned instead of raised, so that one item does not cancel the others.
+
+    Parameters
+    ----------
+    func : Callable[[_T], Awaitable[_R]]
+        Function to call.
+    items : Sequence[_T]
+        Items to call it with.
+
+    Returns
+    -------
+    list[tuple[int, _R | Exception]]
+        The index of each item with its result or exception, in the order the calls completed.
+    """
+    ret: list[tuple[int, _R | Exception]] = []
+
+    async def run(index: int, item: _T) -> None:
+        try:
+            ret.append((index, await func(item)))
+        except Exception as e:  # ruff:ignore[blind-except]
+            ret.append((index, e))
+
+    async with anyio.create_task_group() as tg:
+        for index, item in enumerate(items):
+            tg.start_soon(run, index, item)
+    return ret
+
+
+class _Flight:
+    """Request sent by one task for every task that makes the same request meanwhile."""
+    __slots__ = ('done', 'error', 'response')
+
+    def __init__(self) -> None:
+        self.done = anyio.Event()
+        self.response: niquests.Response | None = None
+        self.error: Exception | None = None
+
+    async def result(self) -> niquests.Response | None:
+        """
+        Wait for the request to finish.
+
+        The error of the request is raised if it failed.
+
+        Returns
+        -------
+        niquests.Response | None
+            The response, or ``None`` if the task that sent the request was cancelled, in which
+            case the request must be sent again.
+        """
+        await self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+def _torrent_events(hash_: str, previous: TorrentInfo | None,
+                    info: TorrentInfo | None) -> Iterator[TorrentEvent]:
+    if previous is None:
+        if info is not None:
+            yield TorrentEvent(TorrentEventType.ADDED, hash_, info, None)
+        return
+    if info is None:
+        yield TorrentEvent(TorrentEventType.REMOVED, hash_, None, previous)
+        return
+    if previous.left_bytes != 0 and info.left_bytes == 0:
+        yield TorrentEvent(TorrentEventType.COMPLETED, hash_, info, previous)
+    if previous.custom1 != info.custom1:
+        yield TorrentEvent(TorrentEventType.LABEL_CHANGED, hash_, info, previous)
+    if (previous.state, previous.is_active) != (info.state, info.is_active):
+        yield TorrentEvent(TorrentEventType.STATE_CHANGED, hash_, info, previous)
+    if previous.message != info.message:
+        yield TorrentEvent(TorrentEventType.MESSAGE_CHANGED, hash_, info, previous)
+
+
+class ruTorrentClient:  # ruff:ignore[invalid-class-name, too-many-public-methods]
     """
     ruTorrent client class.
 
@@ -73,18 +458,114 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
     backoff_factor : int
         Factor used to calculate back-off time when retrying requests.
 
+    cache : TorrentCache | None
+        Cache for the torrent list. Changes made through the client invalidate the host's entry.
+        The listed torrents are kept until the list is complete so that the entry is replaced at
+        once, so streaming the list does not keep memory use flat when a cache is set.
+
+    pool_connections : int
+        Number of connection pools to cache.
+
+    pool_maxsize : int
+        Maximum number of connections to keep open to the host.
+
+    multiplexed : bool
+        Send requests over a multiplexed HTTP/2 (or HTTP/3) connection so that concurrent requests
+        do not wait for each other's connection to become free.
+
+    connect_timeout : float | None
+        Time in seconds to wait for a connection. ``None`` waits forever.
+
+    read_timeout : float | None
+        Time in seconds to wait for data from the server. ``None`` waits forever.
+
+    keepalive_delay : float | None
+        Time in seconds to keep an idle connection alive. ``None`` keeps it alive as long as the
+        server allows.
+
+    verify : bool
+        Verify the server's TLS certificate.
+
+    rate_limit : float | None
+        Maximum number of requests per second to the host. ``None`` or ``0`` for no limit.
+
+    rate_burst : int
+        Number of requests that can be sent at once before the rate limits apply.
+
+    endpoint_rate_limits : Mapping[str, float] | None
+        Maximum number of requests per second for each endpoint in :py:data:`ENDPOINTS`. These
+        apply in addition to ``rate_limit``. XML-RPC calls count as ``xmlrpc`` rather than
+        ``multirpc`` even though they share its URI.
+
+    concurrency_limiter : AdaptiveConcurrencyLimiter | None
+        Limits the requests in flight across all methods of the client. Server errors, timeouts and
+        XML-RPC faults cut the limit, and it grows back while latency stays stable. Defaults to an
+        :py:class:`~xirvik.ratelimit.AdaptiveConcurrencyLimiter` with its default settings.
+
+    metrics : RequestMetrics | None
+        Where to record the count, latency, sizes, retries and failures of requests, per endpoint
+        and mode.
+
+    tracer : Tracer | None
+        Tracer of the public methods and of each request. Defaults to a
+        :py:class:`~xirvik.tracing.Tracer` that records nothing.
+
+    lazy : bool
+        Yield :py:class:`LazyTorrentInfo` records from the full torrent list (in
+        :py:meth:`list_torrents` and :py:meth:`sync_torrents`), so that fields are only converted
+        when they are read.
+
+    compact : bool
+        Yield :py:class:`~xirvik.typing.CompactTorrentInfo` and
+        :py:class:`~xirvik.typing.CompactTorrentTrackedFile` records from the full torrent list and
+        the file lists, which use much less memory when many are kept.
+
+    json_backend : str
+        JSON backend used to decode responses, ``auto`` or a name in
+        :py:data:`~xirvik.json_backend.JSON_BACKENDS`. ``auto`` uses ``orjson`` or ``msgspec`` if
+        installed. Streamed torrent lists are always parsed with the standard library.
+
+    coalesce : float | None
+        Share one request between concurrent identical read requests (listing torrents or files,
+        and XML-RPC calls of the methods in :py:data:`COALESCED_XMLRPC_METHODS`). Requests are
+        identical if they go to the same endpoint with the same body. A positive value also
+        reuses the response of a completed request for that many seconds. Changes made through
+        the client discard reused responses. ``None`` sends every request.
+
     Raises
     ------
     ValueError
-        If no netrc entry is found for the host, or if username or password is not provided.
+        If no netrc entry is found for the host, if username or password is not provided, if an
+        endpoint rate limit is given for an unknown endpoint, if both ``lazy`` and ``compact`` are
+        set, or if the JSON backend is unknown or not installed.
     """
-    def __init__(self,
-                 host: str,
-                 name: str | None = None,
-                 password: str | None = None,
-                 max_retries: int = 10,
-                 netrc_path: str | Path | None = None,
-                 backoff_factor: int = 1) -> None:
+    def __init__(  # ruff:ignore[too-many-arguments]
+            self,
+            host: str,
+            name: str | None = None,
+            password: str | None = None,
+            max_retries: int = 10,
+            netrc_path: str | Path | None = None,
+            backoff_factor: int = 1,
+            cache: TorrentCache | None = None,
+            pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+            *,
+            multiplexed: bool = False,
+            connect_timeout: float | None = DEFAULT_CONNECT_TIMEOUT,
+            read_timeout: float | None = DEFAULT_READ_TIMEOUT,
+            keepalive_delay: float | None = DEFAULT_KEEPALIVE_DELAY,
+            verify: bool = True,
+            rate_limit: float | None = None,
+            rate_burst: int = DEFAULT_RATE_BURST,
+            endpoint_rate_limits: Mapping[str, float] | None = None,
+            concurrency_limiter: AdaptiveConcurrencyLimiter | None = None,
+            metrics: RequestMetrics | None = None,
+            tracer: Tracer | None = None,
+            lazy: bool = False,
+            compact: bool = False,
+            json_backend: str = 'auto',
+            coalesce: float | None = None) -> None:
         if not name and not password:
             if not netrc_path:
                 netrc_path = Path('~/.netrc').expanduser()
@@ -105,16 +586,155 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         """Password for authentication."""
         self.host = host
         """Hostname with no protocol."""
+        self.cache = cache
+        """Cache for the torrent list, keyed by :py:attr:`host`."""
         retry = Retry(connect=max_retries,
                       read=max_retries,
                       redirect=False,
                       backoff_factor=backoff_factor)
-        self._http_adapter = AsyncHTTPAdapter(max_retries=cast('Any', retry))
-        self._session = AsyncSession()
+        self._http_adapter = AsyncHTTPAdapter(pool_connections=pool_connections,
+                                              pool_maxsize=pool_maxsize,
+                                              max_retries=cast('Any', retry),
+                                              keepalive_delay=keepalive_delay)
+        self._session = AsyncSession(multiplexed=multiplexed,
+                                     timeout=TimeoutConfiguration(connect=connect_timeout,
+                                                                  read=read_timeout),
+                                     verify=verify)
         self._session.mount('http://', self._http_adapter)
         self._session.mount('https://', self._http_adapter)
-        self._xmlrpc_proxy = xmlrpc.ServerProxy(f'https://{self.name}:{self.password}@{self.host}'
-                                                '/rtorrent/plugins/multirpc/action.php')
+        if unknown := set(endpoint_rate_limits or {}) - set(ENDPOINTS):
+            msg = f'Unknown endpoints: {", ".join(sorted(unknown))}'
+            raise ValueError(msg)
+        self._rate_limiter = TokenBucket(rate_limit, rate_burst) if rate_limit else None
+        self._endpoint_rate_limiters = {
+            endpoint: TokenBucket(rate, rate_burst)
+            for endpoint, rate in (endpoint_rate_limits or {}).items() if rate
+        }
+        self.concurrency_limiter = concurrency_limiter or AdaptiveConcurrencyLimiter()
+        """Limiter of the requests in flight."""
+        self.metrics = metrics
+        """Request metrics, if recorded."""
+        self.tracer = tracer or _NOOP_TRACER
+        """Tracer of the client's methods and requests."""
+        if lazy and compact:
+            msg = 'Records cannot be both lazy and compact'
+            raise ValueError(msg)
+        self._decode_row: Callable[[str, list[str]], TorrentInfo] = _decode_torrent_row
+        self._record: type[Any] = TorrentInfo
+        if lazy:
+            self._decode_row = _decode_lazy_torrent_row
+            self._record = LazyTorrentInfo
+        elif compact:
+            self._decode_row = functools.partial(_decode_torrent_row, record=CompactTorrentInfo)
+            self._record = CompactTorrentInfo
+        self._file_record = CompactTorrentTrackedFile if compact else TorrentTrackedFile
+        self.json_backend = get_json_backend(json_backend)
+        """JSON backend used to decode responses."""
+        self.coalesce = coalesce
+        """Seconds to reuse responses of coalesced requests, or ``None`` to not coalesce."""
+        self._in_flight: dict[tuple[str, str], _Flight] = {}
+        self._responses: dict[tuple[str, str], tuple[float, niquests.Response]] = {}
+        self._generation = 0
+        self._list_cid: int | None = None
+        self._torrent_state: dict[str, TorrentInfo] = {}
+
+    async def _gather(self, r: niquests.Response | niquests.AsyncResponse) -> None:
+        if self._session.multiplexed:
+            # Responses are lazy on a multiplexed connection.
+            await self._session.gather(r)
+
+    def _endpoint(self, url: str, headers: Mapping[str, str] | None) -> str:
+        if url == self.multirpc_action_uri:
+            return 'xmlrpc' if (headers or {}).get('Content-Type') == 'text/xml' else 'multirpc'
+        if url == self.add_torrent_uri:
+            return 'addtorrent'
+        # Plugin URIs such as plugins/source/action.php are named after the plugin.
+        plugin = url.removeprefix(f'{self.http_prefix}/rtorrent/plugins/').partition('/')[0]
+        return plugin if plugin in _PLUGIN_ENDPOINTS else 'other'
+
+    async def _throttle(self, endpoint: str) -> None:
+        if limiter := self._endpoint_rate_limiters.get(endpoint):
+            await limiter.acquire()
+        if self._rate_limiter:
+            await self._rate_limiter.acquire()
+
+    async def _request(self, method: HttpMethodType, url: str, **kwargs: Any) -> niquests.Response:
+        endpoint = self._endpoint(url, kwargs.get('headers'))
+        with self.tracer.span('ruTorrentClient.request') as span:
+            queued = time.monotonic()
+            await self._throttle(endpoint)
+            r: niquests.Response | None = None
+            async with self.concurrency_limiter.slot() as slot:
+                try:
+                    r = await self._session.request(method, url, **kwargs)
+                    await self._gather(r)
+                    # Timeouts and connection errors raise and count as failures on their own.
+                    slot.failed = ((r.status_code or 0) >= HTTPStatus.INTERNAL_SERVER_ERROR
+                                   or (endpoint == 'xmlrpc' and _is_fault(r)))
+                finally:
+                    if self.metrics is not None or self.tracer.enabled:
+                        self._record_request(span, method, endpoint, kwargs, r, slot, queued)
+        return r
+
+    def _record_request(self, span: Span, method: str, endpoint: str, kwargs: Mapping[str, Any],
+                        r: niquests.Response | None, slot: ConcurrencySlot, queued: float) -> None:
+        mode = _request_mode(endpoint, kwargs.get('data'))
+        bytes_out, bytes_in, retries = _request_sizes(r, stream=bool(kwargs.get('stream')))
+        failed = slot.failed or r is None
+        if self.metrics is not None:
+            self.metrics.record(endpoint,
+                                mode,
+                                time.monotonic() - slot.started,
+                                bytes_out=bytes_out,
+                                bytes_in=bytes_in,
+                                retries=retries,
+                                failed=failed)
+        if self.tracer.enabled:
+            for key, value in (('http.request.method', method), ('xirvik.endpoint', endpoint),
+                               ('xirvik.mode', mode), ('http.request.body.size', bytes_out),
+                               ('http.response.body.size', bytes_in), ('xirvik.retries', retries),
+                               ('xirvik.failed', failed), ('xirvik.queued_seconds',
+                                                           slot.started - queued)):
+                span.set_attribute(key, value)
+            if r is not None:
+                span.set_attribute('http.response.status_code', r.status_code or 0)
+
+    async def _post(self, url: str, *, coalesce: bool = False, **kwargs: Any) -> niquests.Response:
+        if not coalesce or self.coalesce is None:
+            return await self._request('POST', url, **kwargs)
+        key = (self._endpoint(url, kwargs.get('headers')), repr(kwargs.get('data')))
+        r: niquests.Response | None = None
+        if (cached := self._responses.get(key)) is not None:
+            if cached[0] > time.monotonic():
+                r = cached[1]
+            else:
+                del self._responses[key]
+        while r is None and (flight := self._in_flight.get(key)) is not None:
+            r = await flight.result()
+        if r is None:
+            return await self._single_flight(key, url, kwargs)
+        self.tracer.current_span().set_attribute('xirvik.coalesced', value=True)
+        return r
+
+    async def _single_flight(self, key: tuple[str, str], url: str,
+                             kwargs: dict[str, Any]) -> niquests.Response:
+        flight = self._in_flight[key] = _Flight()
+        generation = self._generation
+        try:
+            r = flight.response = await self._request('POST', url, **kwargs)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            del self._in_flight[key]
+            flight.done.set()
+        # A response that started before a change may be outdated.
+        if self.coalesce and r.ok and generation == self._generation:
+            self._responses[key] = (time.monotonic() + self.coalesce, r)
+        return r
+
+    async def _get(self, url: str, **kwargs: Any) -> niquests.Response:
+        return await self._request('GET', url, **kwargs)
 
     async def aclose(self) -> None:
         """Close the underlying HTTP session and release resources."""
@@ -161,6 +781,7 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         """Basic authentication credentials."""
         return (self.name, self.password)
 
+    @_traced()
     async def add_torrent(self, filepath: str, *, start_now: bool = True) -> None:
         """
         Add a torrent. Use ``start_now=False`` to start paused.
@@ -174,66 +795,384 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         """
         filepath_obj = anyio.Path(filepath)
         content = await filepath_obj.read_bytes()
-        (await self._session.post(self.add_torrent_uri,
-                                  data={'torrents_start_stopped': 'on'} if not start_now else {},
-                                  auth=self.auth,
-                                  files={'torrent_file': (str(
-                                      filepath_obj.name), content)})).raise_for_status()
+        (await
+         self._post(self.add_torrent_uri,
+                    data={'torrents_start_stopped': 'on'} if not start_now else {},
+                    auth=self.auth,
+                    files={'torrent_file': (str(filepath_obj.name), content)})).raise_for_status()
+        await self._invalidate_cache()
+
+    @_traced('xirvik.path_count')
+    async def add_torrents(self,
+                           paths: Iterable[str | Path],
+                           batch_size: int = 20,
+                           concurrency: int = 2,
+                           *,
+                           start_now: bool = True) -> dict[str, bool]:
+        """
+        Add many torrents, uploading several files in each request.
+
+        The files are sent as ``torrent_file[]`` parts of one multipart ``addtorrent.php`` request
+        per batch of ``batch_size`` files, with up to ``concurrency`` requests in flight over the
+        client's connection pool.
+
+        If ruTorrent responds with a status for each file, it is used for the result. Otherwise
+        every file of a request that succeeded is reported as added. A request that fails is logged
+        and all of its files are reported as not added.
 
-    async def list_torrents(self) -> AsyncIterator[TorrentInfo]:
+        Parameters
+        ----------
+        paths : Iterable[str | Path]
+            Paths to the torrent files.
+        batch_size : int
+            Maximum number of files per request.
+        concurrency : int
+            Maximum number of requests in flight.
+        start_now : bool
+            If the torrents should start immediately.
+
+        Returns
+        -------
+        dict[str, bool]
+            Whether the torrent was added, for each path as passed in.
+        """
+        ret: dict[str, bool] = {}
+        limiter = anyio.CapacityLimiter(concurrency)
+
+        async def add_batch(batch: list[str | Path]) -> None:
+            async with limiter:
+                try:
+                    ret.update(await self._add_torrent_batch(batch, start_now=start_now))
+                except (OSError, niquests.RequestException):
+                    log.exception('Failed to upload %d torrents.', len(batch))
+                    ret.update(dict.fromkeys(map(str, batch), False))
+
+        it = iter(paths)
+        async with anyio.create_task_group() as tg:
+            while batch := list(itertools.islice(it, batch_size)):
+                tg.start_soon(add_batch, batch)
+        return ret
+
+    async def _add_torrent_batch(self, batch: list[str | Path], *,
+                                 start_now: bool) -> dict[str, bool]:
+        # Transliterate the names like the add command always has, for servers that mishandle
+        # non-ASCII file names.
+        files = [('torrent_file[]', (unidecode(path.name), await path.read_bytes()))
+                 for path in map(anyio.Path, batch)]
+        log.debug('Uploading %d torrents.', len(files))
+        r = await self._post(self.add_torrent_uri,
+                             data={
+                                 'json': '1',
+                                 **({} if start_now else {
+                                        'torrents_start_stopped': 'on'
+                                    })
+                             },
+                             files=files,
+                             auth=self.auth)
+        r.raise_for_status()
+        await self._invalidate_cache()
+        try:
+            statuses = self.json_backend.loads(r.content or b'')
+        except ValueError:
+            statuses = None
+        if isinstance(statuses, list) and len(statuses) == len(batch):
+            return {
+                str(path): isinstance(status, dict) and status.get('status') == 'Success'
+                for path, status in zip(batch, statuses, strict=True)
+            }
+        return dict.fromkeys(map(str, batch), True)
+
+    @overload
+    def list_torrents(self,
+                      *,
+                      stream: bool = ...,
+                      refresh: bool = ...,
+                      fields: None = None,
+                      view: str = ...,
+                      filter: str | None = ...) -> AsyncIterator[TorrentInfo]:
+        ...
+
+    @overload
+    def list_torrents(self,
+                      *,
+                      stream: bool = ...,
+                      refresh: bool = ...,
+                      fields: Iterable[str],
+                      view: str = ...,
+                      filter: str | None = ...) -> AsyncIterator[Any]:
+        ...
+
+    @_traced('xirvik.torrent_count')
+    async def list_torrents(
+            self,
+            *,
+            stream: bool = False,
+            refresh: bool = False,
+            fields: Iterable[str] | None = None,
+            view: str = 'main',
+            filter: str | None = None  # ruff:ignore[builtin-argument-shadowing]
+    ) -> AsyncIterator[Any]:
         """
         Get all torrent information.
 
-        Yields
-        ------
-        TorrentInfo
-            Information about each torrent.
+        With ``stream=True`` the response body is parsed while it is being downloaded and each
+        torrent is yielded as soon as its row has arrived. This keeps memory use flat with a large
+        number of torrents and lets processing start before the download finishes.
+
+        With ``fields``, only those fields (names of :py:class:`~xirvik.typing.TorrentInfo` fields)
+        are requested with one XML-RPC ``d.multicall2`` call, and each torrent is yielded as a named
+        tuple of the hash followed by the fields in the order given. Fetching a few fields is much
+        smaller and faster to decode than the full ``mode=list`` response. ``stream`` has no effect
+        then.
+
+        ``view`` and ``filter`` select torrents on the server, so only the rows of matching
+        torrents are transferred. ``view`` is the name of an rTorrent view such as ``complete``,
+        ``incomplete``, ``seeding``, ``stopped`` or a view defined in the rTorrent configuration.
+        ``filter`` is a ``d.multicall.filtered`` expression such as :py:func:`label_filter` returns.
+        rTorrent before 0.9.7 does not support ``filter`` and it is ignored (with a warning) if the
+        call faults, so callers should still check the torrents they receive. Torrents selected
+        this way are fetched with XML-RPC like with ``fields``, and yielded as
+        :py:class:`~xirvik.typing.TorrentInfo` unless ``fields`` is given.
+
+        If the client has a :py:attr:`cache` and it holds a fresh entry for the host, the torrents
+        are read from it instead of the server. Otherwise the cache is updated once every torrent
+        has been yielded. Since the cache holds every field, ``fields`` only selects the fields of
+        the records yielded when the client has a cache. The cache is neither read nor updated
+        when ``view`` or ``filter`` is given.
+
+        A :py:class:`ListTorrentsError` is raised if the response is not as expected.
 
-        Raises
+        Parameters
+        ----------
+        stream : bool
+            Parse the response incrementally. With a cache, the torrents are still kept until the
+            list is complete so that they can be cached.
+        refresh : bool
+            Ignore the cache and always fetch from the server.
+        fields : Iterable[str] | None
+            Fields to fetch. All fields are fetched if ``None``.
+        view : str
+            rTorrent view to list.
+        filter : str | None
+            ``d.multicall.filtered`` expression that torrents must match.
+
+        Yields
         ------
-        ListTorrentsError
-            If the response is not as expected.
-        """
-        r = await self._session.post(self.multirpc_action_uri,
-                                     data={
-                                         'mode': 'list',
-                                         'cmd': 'd.custom=seedingtime'
-                                     },
-                                     auth=self.auth)
-        r.raise_for_status()
-        possible_dict = cast('dict[str, list[Any]]', r.json()['t'])
+        Any
+            Information about each torrent. This is a :py:class:`~xirvik.typing.TorrentInfo` unless
+            ``fields`` is given.
+        """
+        projection = None if fields is None else _torrent_projection(tuple(fields))
+        if view != 'main' or filter:
+            for info in await self._fetch_projection(
+                    projection or _torrent_projection(tuple(TORRENT_COMMANDS)), view, filter):
+                yield info
+            return
+        if self.cache is not None and not refresh:
+            cached = await anyio.to_thread.run_sync(self.cache.get, self.cache.key(self.host))
+            if cached is not None:
+                log.debug('Using %d cached torrents.', len(cached))
+                for info in cached:
+                    record = info if self._record is TorrentInfo else self._record._make(info)
+                    yield record if projection is None else projection.project(record)
+                return
+        if projection is not None and self.cache is None:
+            for info in await self._fetch_projection(projection, view):
+                yield info
+            return
+        fetched: list[TorrentInfo] | None = None if self.cache is None else []
+        async for info in (self._stream_list() if stream else self._fetch_list()):
+            if fetched is not None:
+                fetched.append(info)
+            yield info if projection is None else projection.project(info)
+        if self.cache is not None and fetched is not None:
+            await anyio.to_thread.run_sync(self.cache.put, self.cache.key(self.host), fetched)
+
+    async def _fetch_list(self) -> AsyncIterator[TorrentInfo]:
+        possible_dict, _ = await self._post_list()
         if not hasattr(possible_dict, 'items'):
             log.debug('Returned: %s', possible_dict)
             msg = f'Unexpected type in response: {type(possible_dict)}'
             raise ListTorrentsError(msg)
-        annots = inspect.get_annotations(TorrentInfo)
         for hash_, x in possible_dict.items():
-            del x[34]  # Delete unknown field
-            type_cls: ForwardRef
-            for i, (type_cls, val) in enumerate(
-                    zip((t[1] for t in list(annots.items())[1:]), (y.strip() for y in x),
-                        strict=False)):
-                match type_cls.__forward_arg__:
-                    case 'datetime | None':
-                        try:
-                            x[i] = datetime.fromtimestamp(float(val.strip() or '0'), timezone.utc)
-                            # First year xirvik.com existed
-                            if x[i].year < FIRST_YEAR_XIRVIK:
-                                x[i] = None
-                        except ValueError:  # pragma no cover
-                            x[i] = None
-                    case 'int':
-                        x[i] = int(val)
-                    case 'float':
-                        x[i] = float(val)
-                    case 'bool':
-                        x[i] = bool(int(val))
-                    case 'HashingState' | 'State':
-                        x[i] = int(val)
-                    case _:
-                        x[i] = val
-            yield TorrentInfo(hash_, *x)
+            yield self._decode_row(hash_, x)
+
+    async def _fetch_projection(self,
+                                projection: _TorrentProjection,
+                                view: str,
+                                filter_: str | None = None) -> list[Any]:
+        rows: Any = None
+        if filter_:
+            try:
+                rows = await self.xmlrpc_call('d.multicall.filtered', '', view, filter_, 'd.hash=',
+                                              *projection.commands)
+            except xmlrpc.Fault as e:
+                log.warning('Filtering failed, listing the whole view instead: %s', e)
+        if rows is None:
+            rows = await self.xmlrpc_call('d.multicall2', '', view, 'd.hash=', *projection.commands)
+        if not isinstance(rows, list):
+            log.debug('Returned: %s', rows)
+            msg = f'Unexpected type in response: {type(rows)}'
+            raise ListTorrentsError(msg)
+        return [projection.decode(row) for row in rows]
+
+    async def _invalidate_cache(self) -> None:
+        self._generation += 1
+        self._responses.clear()
+        if self.cache is not None:
+            await anyio.to_thread.run_sync(self.cache.invalidate, self.cache.key(self.host))
+
+    async def _stream_list(self) -> AsyncIterator[TorrentInfo]:
+        r = cast(
+            'niquests.AsyncResponse', await self._post(self.multirpc_action_uri,
+                                                       data={
+                                                           'mode': 'list',
+                                                           'cmd': 'd.custom=seedingtime'
+                                                       },
+                                                       auth=self.auth,
+                                                       stream=True))
+        try:
+            r.raise_for_status()
+            rows = iter_json_object_members(await r.iter_content(STREAM_CHUNK_SIZE), 't')
+            while True:
+                try:
+                    hash_, x = await anext(rows)
+                except StopAsyncIteration:
+                    break
+                except ValueError as e:
+                    raise ListTorrentsError(str(e)) from e
+                yield self._decode_row(hash_, x)
+        finally:
+            await r.close()
+
+    async def _post_list(self, cid: int | None = None) -> tuple[Any, int | None]:
+        data = {'mode': 'list', 'cmd': 'd.custom=seedingtime'}
+        if cid is not None:
+            data['cid'] = str(cid)
+        r = await self._post(self.multirpc_action_uri, data=data, auth=self.auth, coalesce=True)
+        r.raise_for_status()
+        json = self.json_backend.loads(r.content or b'')
+        return json['t'], json.get('cid')
+
+    async def _list_delta(self, cid: int | None) -> tuple[Mapping[str, Any], int | None]:
+        rows, new_cid = await self._post_list(cid)
+        if cid is not None and rows == []:
+            # PHP encodes an empty delta as an empty array.
+            rows = {}
+        if not hasattr(rows, 'items'):
+            log.debug('Returned: %s', rows)
+            msg = f'Unexpected type in response: {type(rows)}'
+            raise ListTorrentsError(msg)
+        return rows, new_cid
 
+    @_traced('xirvik.torrent_count')
+    async def sync_torrents(self, *, full: bool = False) -> Mapping[str, TorrentInfo]:
+        """
+        Get all torrent information, transferring only what changed since the previous call.
+
+        The first call (or any call with ``full=True``) downloads every torrent. The cache token
+        (``cid``) returned by ruTorrent is kept and sent with later calls, which then only return
+        added and changed torrents plus the hashes of deleted torrents. These are merged into a
+        local state maintained by the client. Use ``full=True`` occasionally to recover from the
+        server discarding its cache.
+
+        A :py:class:`ListTorrentsError` is raised if the response is not as expected.
+
+        Parameters
+        ----------
+        full : bool
+            Discard the local state and download every torrent.
+
+        Returns
+        -------
+        Mapping[str, TorrentInfo]
+            Read-only view of the local state, keyed by hash. The view reflects later calls.
+        """
+        cid = None if full else self._list_cid
+        rows, new_cid = await self._list_delta(cid)
+        self._list_cid = new_cid
+        if cid is None:
+            self._torrent_state.clear()
+        for hash_, x in rows.items():
+            # Deleted torrents are returned with false in place of the row.
+            if x is False:
+                self._torrent_state.pop(hash_, None)
+            else:
+                self._torrent_state[hash_] = self._decode_row(hash_, x)
+        log.debug('Synchronised %d changes (cid: %s).', len(rows), self._list_cid)
+        return MappingProxyType(self._torrent_state)
+
+    @_traced('xirvik.event_count')
+    async def watch_torrents(self, interval: float = 10) -> AsyncIterator[TorrentEvent]:
+        """
+        Watch torrents for changes.
+
+        The torrent list is downloaded once and then polled every ``interval`` seconds with
+        ruTorrent's cache token (``cid``), as in :py:meth:`sync_torrents`, so each poll only
+        transfers and compares the torrents that changed. The state is kept by the iterator and is
+        independent of :py:meth:`sync_torrents`. Torrents present at the start are not reported as
+        added.
+
+        A torrent can have several events from one poll, in the order completed, label changed,
+        state changed and message changed. Other changes, such as transfer rates, are not reported.
+        A :py:class:`ListTorrentsError` is raised if a response is not as expected.
+
+        Parameters
+        ----------
+        interval : float
+            Seconds to wait between polls.
+
+        Yields
+        ------
+        TorrentEvent
+            Each change, until the iterator is closed.
+        """
+        rows, cid = await self._list_delta(None)
+        state = {hash_: self._decode_row(hash_, x) for hash_, x in rows.items()}
+        while True:
+            await anyio.sleep(interval)
+            sent_cid = cid
+            rows, cid = await self._list_delta(sent_cid)
+            changes: list[tuple[str, TorrentInfo | None]] = [
+                (hash_, None if x is False else self._decode_row(hash_, x))
+                for hash_, x in rows.items()
+            ]
+            if sent_cid is None:
+                # A full list does not mark deleted torrents.
+                changes.extend((hash_, None) for hash_ in state.keys() - rows.keys())
+            for hash_, info in changes:
+                previous = state.pop(hash_, None) if info is None else state.get(hash_)
+                if info is not None:
+                    state[hash_] = info
+                for event in _torrent_events(hash_, previous, info):
+                    yield event
+
+    @_traced('xirvik.torrent_count')
+    async def list_torrents_snapshot(self) -> TorrentSnapshot:
+        """
+        Get all torrent information as a columnar snapshot.
+
+        This uses much less memory than collecting the results of :py:meth:`list_torrents` for a
+        large number of torrents. The rows of the response are decoded straight into the columns of
+        the snapshot. With a cache, the torrents are listed with :py:meth:`list_torrents` instead.
+
+        A :py:class:`ListTorrentsError` is raised if the response is not as expected.
+
+        Returns
+        -------
+        TorrentSnapshot
+            Snapshot of all torrents.
+        """
+        snapshot = TorrentSnapshot()
+        if self.cache is not None:
+            async for info in self.list_torrents():
+                snapshot.append(info)
+            return snapshot
+        rows, _ = await self._list_delta(None)
+        snapshot.extend_rows(rows.items())
+        return snapshot
+
+    @_traced()
     async def get_torrent(self, hash_: str) -> tuple[niquests.Response, str]:
         r"""
         Prepare to get a torrent file given a hash.
@@ -247,14 +1186,141 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         -------
         tuple[niquests.Response, str]
             :py:class:`~niquests.Response` object and the file name string.
+
+        Raises
+        ------
+        HTTPError
+            If the server returns an error status.
+        KeyError
+            If the response has no file name.
         """
         source_torrent_uri = (f'{self.http_prefix}/rtorrent/plugins/source/'
                               f'action.php?hash={hash_}')
-        r = await self._session.get(source_torrent_uri, auth=self.auth, stream=True)
-        r.raise_for_status()
-        fn = parse_header(str(r.headers['content-disposition']))[1]['filename']
+        r = await self._get(source_torrent_uri, auth=self.auth, stream=True)
+        try:
+            r.raise_for_status()
+            fn = parse_header(str(r.headers['content-disposition']))[1]['filename']
+        except (KeyError, niquests.HTTPError):
+            await cast('niquests.AsyncResponse', r).close()
+            raise
         return r, fn
 
+    async def _iter_torrent(self, hash_: str) -> AsyncIterator[bytes]:
+        r = cast('niquests.AsyncResponse', (await self.get_torrent(hash_))[0])
+        try:
+            async for chunk in await r.iter_content(STREAM_CHUNK_SIZE):
+                yield chunk
+        finally:
+            await r.close()
+
+    async def _save_torrent(self, hash_: str, target: anyio.Path) -> None:
+        # Write to a temporary name first so an interrupted download is not mistaken for a saved
+        # file on the next run.
+        part = target.with_name(f'{target.name}.part')
+        try:
+            async with await anyio.open_file(part, 'wb') as f:
+                async for chunk in self._iter_torrent(hash_):
+                    await f.write(chunk)
+            await part.rename(target)
+        except BaseException:
+            # Cancellation must not interrupt the clean-up.
+            with anyio.CancelScope(shield=True):
+                await part.unlink(missing_ok=True)
+            raise
+
+    @_traced('xirvik.hash_count')
+    async def save_torrents(self,
+                            hashes: Iterable[str],
+                            dest: str | Path | IO[bytes],
+                            concurrency: int = 4) -> dict[str, bool]:
+        """
+        Download the source ``.torrent`` files of torrents.
+
+        If ``dest`` is a path, each file is streamed to disk in chunks as ``<hash>.torrent`` in that
+        directory, which is created if it does not exist. Hashes that already have a file there are
+        not downloaded again. A download that fails leaves no file behind.
+
+        If ``dest`` is a binary file object, a tar archive is streamed to it instead, so it does not
+        need to be seekable and can be a pipe. Each file is added as ``<hash>.torrent`` as soon as
+        it is downloaded, so at most ``concurrency`` files are held in memory at a time. The file
+        object is not closed.
+
+        Up to ``concurrency`` downloads are in flight. A download that fails is logged.
+
+        Parameters
+        ----------
+        hashes : Iterable[str]
+            Hashes of the torrents.
+        dest : str | Path | IO[bytes]
+            Directory to save the files in, or file object to write a tar archive to.
+        concurrency : int
+            Maximum number of downloads in flight.
+
+        Returns
+        -------
+        dict[str, bool]
+            Whether the file was saved (or already present), for each hash.
+        """
+        if isinstance(dest, (str, Path)):
+            return await self._save_torrents_to_dir(hashes, anyio.Path(dest), concurrency)
+        return await self._save_torrents_to_tar(hashes, dest, concurrency)
+
+    async def _save_torrents_to_dir(self, hashes: Iterable[str], dest: anyio.Path,
+                                    concurrency: int) -> dict[str, bool]:
+        await dest.mkdir(parents=True, exist_ok=True)
+        ret: dict[str, bool] = {}
+        limiter = anyio.CapacityLimiter(concurrency)
+
+        async def save(hash_: str) -> None:
+            target = dest / f'{hash_}.torrent'
+            if await target.exists():
+                log.debug('Skipping %s, already saved.', hash_)
+                ret[hash_] = True
+                return
+            async with limiter:
+                try:
+                    await self._save_torrent(hash_, target)
+                except (KeyError, OSError, niquests.RequestException):
+                    log.exception('Failed to save torrent %s.', hash_)
+                    ret[hash_] = False
+                else:
+                    ret[hash_] = True
+
+        async with anyio.create_task_group() as tg:
+            for hash_ in hashes:
+                tg.start_soon(save, hash_)
+        return ret
+
+    async def _save_torrents_to_tar(self, hashes: Iterable[str], fileobj: IO[bytes],
+                                    concurrency: int) -> dict[str, bool]:
+        ret: dict[str, bool] = {}
+        limiter = anyio.CapacityLimiter(concurrency)
+        lock = anyio.Lock()
+        with tarfile.open(fileobj=fileobj, mode='w|') as tar:
+
+            async def add(hash_: str) -> None:
+                async with limiter:
+                    try:
+                        content = b''.join([x async for x in self._iter_torrent(hash_)])
+                    except (KeyError, niquests.RequestException):
+                        log.exception('Failed to download torrent %s.', hash_)
+                        ret[hash_] = False
+                        return
+                    info = tarfile.TarInfo(f'{hash_}.torrent')
+                    info.size = len(content)
+                    info.mtime = int(time.time())
+                    info.mode = 0o644
+                    # Members are written whole, one at a time, so they never interleave.
+                    async with lock:
+                        await anyio.to_thread.run_sync(tar.addfile, info, io.BytesIO(content))
+                    ret[hash_] = True
+
+            async with anyio.create_task_group() as tg:
+                for hash_ in hashes:
+                    tg.start_soon(add, hash_)
+        return ret
+
+    @_traced()
     async def move_torrent(self,
                            torrent_hash: str,
                            target_dir: str,
@@ -277,20 +1343,22 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         UnexpectedruTorrentError
             If the server returns errors in the response.
         """
-        r = await self._session.post(self.datadir_action_uri,
-                                     data={
-                                         'hash': torrent_hash,
-                                         'datadir': target_dir,
-                                         'move_addpath': '1',
-                                         'move_datafiles': '1',
-                                         'move_fastresume': '1' if fast_resume else '0'
-                                     },
-                                     auth=self.auth)
+        r = await self._post(self.datadir_action_uri,
+                             data={
+                                 'hash': torrent_hash,
+                                 'datadir': target_dir,
+                                 'move_addpath': '1',
+                                 'move_datafiles': '1',
+                                 'move_fastresume': '1' if fast_resume else '0'
+                             },
+                             auth=self.auth)
         r.raise_for_status()
-        json = r.json()
+        await self._invalidate_cache()
+        json = self.json_backend.loads(r.content or b'')
         if json.get('errors'):
             raise UnexpectedruTorrentError(str(json['errors']))
 
+    @_traced()
     async def set_label_to_hashes(self, **kwargs: Any) -> None:
         """
         Set a label to a list of info hashes. The label can be a new label.
@@ -308,6 +1376,9 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
             Expected keys: ``hashes`` (list of hash strings), ``label`` (str), and optionally
             ``allow_recursive_fix`` (bool), ``recursion_limit`` (int), ``recursion_attempt`` (int).
 
+        Unlike :py:meth:`set_label_many`, the hashes are sent in one request and an HTTP, XML-RPC
+        or decoding error is raised.
+
         Raises
         ------
         TypeError
@@ -321,49 +1392,114 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         if not hashes or not label:
             msg = '"hashes" (list) and "label" (str) keyword arguments are required.'
             raise TypeError(msg)
-        # The way to set a label to multiple torrents is to specify the hashes
-        # using hash=, then the v parameter as many times as there are hashes,
-        # and then the s=label for as many times as there are hashes.
-        # Example:
-        #    mode=setlabel&hash=...&hash=...&v=label&v=label&s=label&s=label
-        # This method builds this string in pieces because it is not possible
-        # to set the same key twice in a dictionary.
-        data = b'mode=setlabel'
-        for hash_ in hashes:
-            data += f'&hash={hash_}'.encode()
-        data += f'&v={label}'.encode() * len(hashes)
-        data += b'&s=label' * len(hashes)
-        log.debug('set_labels() with data: %s', data.decode())
-        r = await self._session.post(self.multirpc_action_uri, data=data, auth=self.auth)
-        r.raise_for_status()
-        json = r.json()
-        # This may not be an error, but sometimes just `[]` is returned.
-        if len(json) != len(hashes):
+        await self._set_label_chunk(
+            list(hashes), label,
+            1 + max(0, recursion_limit - recursion_attempt) if allow_recursive_fix else 1)
+
+    @_traced('xirvik.hash_count')
+    async def set_label_many(self,
+                             hashes: Iterable[str],
+                             label: str,
+                             chunk_size: int = 500,
+                             concurrency: int = 4,
+                             *,
+                             max_attempts: int = 3) -> dict[str, bool]:
+        """
+        Set a label to many torrents.
+
+        The hashes are sent in ``mode=setlabel`` requests of at most ``chunk_size`` torrents, with
+        up to ``concurrency`` requests in flight. If ruTorrent does not confirm every torrent of a
+        request, the labels of that request's torrents are read back with one XML-RPC multicall and
+        only the torrents whose label did not stick are sent again, up to ``max_attempts`` times.
+
+        A request that fails with an HTTP or XML-RPC error, or whose response cannot be decoded, is
+        logged and its torrents are reported as not labelled. Other requests are not affected.
+
+        Parameters
+        ----------
+        hashes : Iterable[str]
+            Hashes of the torrents.
+        label : str
+            Label to use. The label can be a new label.
+        chunk_size : int
+            Maximum number of torrents per request.
+        concurrency : int
+            Maximum number of requests in flight.
+        max_attempts : int
+            Maximum number of requests for each torrent.
+
+        Returns
+        -------
+        dict[str, bool]
+            Whether the label was set, for each hash.
+        """
+        ret: dict[str, bool] = {}
+        limiter = anyio.CapacityLimiter(concurrency)
+
+        async def label_chunk(chunk: list[str]) -> None:
+            async with limiter:
+                try:
+                    ret.update(await self._set_label_chunk(chunk, label, max_attempts))
+                except (niquests.RequestException, xmlrpc.Error, ValueError):
+                    log.exception('Failed to label %d torrents.', len(chunk))
+                    ret.update(dict.fromkeys(chunk, False))
+
+        it = iter(hashes)
+        async with anyio.create_task_group() as tg:
+            while chunk := list(itertools.islice(it, chunk_size)):
+                tg.start_soon(label_chunk, chunk)
+        return ret
+
+    async def _set_label_chunk(self, hashes: list[str], label: str,
+                               max_attempts: int) -> dict[str, bool]:
+        ret: dict[str, bool] = {}
+        pending = hashes
+        for attempt in range(1, max_attempts + 1):
+            # ruTorrent expects every hash, then the label once per hash as v and the property name
+            # once per hash as s. For example:
+            #    mode=setlabel&hash=...&hash=...&v=label&v=label&s=label&s=label
+            r = await self._post(self.multirpc_action_uri,
+                                 data=[('mode', 'setlabel'), *(('hash', x) for x in pending),
+                                       *(('v', label) for _ in pending),
+                                       *(('s', 'label') for _ in pending)],
+                                 auth=self.auth)
+            r.raise_for_status()
+            await self._invalidate_cache()
+            json = self.json_backend.loads(r.content or b'')
+            # This may not be an error, but sometimes just `[]` is returned.
+            if len(json) == len(pending):
+                ret.update(dict.fromkeys(pending, True))
+                return ret
             log.warning(
                 'JSON returned should have been an array with same length as hashes list passed '
                 'in: %s', json)
             # Even with the retries, sometimes all but one torrent gets a label.
-            if allow_recursive_fix and recursion_attempt < recursion_limit:
-                recursion_attempt += 1
-                log.info('Attempting label again '
-                         '(%d out of %d)', recursion_attempt, recursion_limit)
-                data = b'mode=setlabel'
-                new_hashes = []
-                async for v in self.list_torrents():
-                    hash_ = v.hash
-                    if hash_ in hashes or not (v.custom1 or '').strip():
-                        data += f'&hash={hash_}'.encode()
-                        new_hashes.append(hash_)
-                if not new_hashes:
-                    log.debug('Found no torrents to correct')
-                    return
-                await self.set_label_to_hashes(hashes=new_hashes,
-                                               label=label,
-                                               recursion_limit=recursion_limit,
-                                               recursion_attempt=recursion_attempt)
+            status = await self._label_status(pending, label)
+            # Faulted torrents are reported as not labelled but are not retried.
+            ret.update((k, bool(v)) for k, v in status.items() if v is not False)
+            pending = [k for k, v in status.items() if v is False]
+            if not pending:
+                log.debug('Found no torrents to correct')
+                return ret
+            if attempt < max_attempts:
+                log.info('Attempting label again (%d out of %d)', attempt, max_attempts - 1)
+        log.warning('Failed to label %d torrents after %d attempts.', len(pending), max_attempts)
+        ret.update(dict.fromkeys(pending, False))
+        return ret
+
+    async def _label_status(self, hashes: Sequence[str], label: str) -> dict[str, bool | None]:
+        results = await self._multicall(('d.custom1', (hash_,)) for hash_ in hashes)
+        ret: dict[str, bool | None] = {}
+        for hash_, result in zip(hashes, results, strict=True):
+            if (fault := _fault_from_result(result)) is not None:
+                # Most likely the torrent no longer exists, so retrying will not help.
+                log.warning('Cannot verify label of %s: %s', hash_, fault)
+                ret[hash_] = None
             else:
-                log.warning('Passed recursion limit for label fix')
+                ret[hash_] = label in {result[0], unquote(result[0])}
+        return ret
 
+    @_traced()
     async def set_label(self, label: str, torrent_hash: str) -> None:
         """
         Set a label to a torrent.
@@ -377,6 +1513,7 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         """
         await self.set_label_to_hashes(hashes=[torrent_hash], label=label)
 
+    @_traced('xirvik.file_count')
     async def list_files(self, hash_: str) -> AsyncIterator[TorrentTrackedFile]:
         r"""
         List files for a given torrent hash.
@@ -405,39 +1542,127 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         TorrentTrackedFile
             Named tuple with file information.
         """
-        r = await self._session.post(
+        r = await self._post(
             self.multirpc_action_uri,
             data=(f'mode=fls&hash={hash_}' + '&' +
                   '&'.join(f'cmd={x}'
                            for x in (quote('f.prioritize_first='), quote('f.prioritize_last=')))),
-            auth=self.auth)
+            auth=self.auth,
+            coalesce=True)
         r.raise_for_status()
-        for x in r.json():
-            # Fix the numeric values which come as strings.
-            x[1] = int(x[1])  # total number of pieces
-            x[2] = int(x[2])  # downloaded pieces
-            x[3] = int(x[3])  # size in bytes
-            x[4] = FilePriority(int(x[4]))  # priority ID
-            x[5] = FileDownloadStrategy(int(x[5]))  # download strategy ID
-            yield TorrentTrackedFile(*x[:6])
+        for x in self.json_backend.loads(r.content or b''):
+            yield _decode_file_row(x, self._file_record)
+
+    @_traced('xirvik.hash_count')
+    async def list_files_many(
+            self,
+            hashes: Iterable[str],
+            chunk_size: int = 50) -> AsyncIterator[tuple[str, list[TorrentTrackedFile]]]:
+        """
+        List files for many torrents using batched XML-RPC requests.
+
+        Each request is a single ``system.multicall`` with one ``f.multicall`` per hash, so listing
+        the files of N torrents takes N / ``chunk_size`` round trips instead of N. As many requests
+        as the client's concurrency limit allows are sent at once, and their results are yielded
+        when they have all completed.
+
+        A torrent that cannot be listed, such as one that was deleted since ``hashes`` was built,
+        is logged and skipped. A failed request is raised.
+
+        Example use:
 
-    async def list_all_files(self) -> AsyncIterator[TorrentTrackedFile]:
+        .. code-block:: python
+
+           async for hash_, files in client.list_files_many(hashes):
+               ...
+
+        Parameters
+        ----------
+        hashes : Iterable[str]
+            Hashes of the torrents.
+        chunk_size : int
+            Maximum number of torrents per request.
+
+        Yields
+        ------
+        tuple[str, list[TorrentTrackedFile]]
+            Hash and the files of the torrent, in the order of ``hashes``.
+        """
+        def list_chunk(chunk: list[str]) -> Awaitable[list[Any]]:
+            return self._multicall(
+                [('f.multicall', (hash_, '', *FILE_COMMANDS)) for hash_ in chunk])
+
+        it = iter(hashes)
+        # A task group cannot span the yields of an async generator, so the requests are sent in
+        # rounds that complete before their results are yielded.
+        while chunks := [
+                x for x in (list(itertools.islice(it, chunk_size))
+                            for _ in range(max(1, int(self.concurrency_limiter.limit)))) if x
+        ]:
+            for index, results in sorted(await _run_each(list_chunk, chunks),
+                                         key=operator.itemgetter(0)):
+                if isinstance(results, Exception):
+                    raise results
+                for hash_, result in zip(chunks[index], results, strict=True):
+                    if (fault := _fault_from_result(result)) is not None:
+                        log.warning('Cannot list files of %s: %s', hash_, fault)
+                        continue
+                    yield hash_, [_decode_file_row(x, self._file_record) for x in result[0]]
+
+    @_traced('xirvik.file_count')
+    async def list_all_files(self,
+                             concurrency: int = 1,
+                             *,
+                             ordered: bool = True) -> AsyncIterator[TorrentTrackedFile]:
         """
         List all files tracked by rTorrent.
 
-        If there are thousands of torrents, this may take well over 10 minutes.
+        If there are thousands of torrents, this may take well over 10 minutes. Use
+        ``concurrency`` to send file list requests in rounds of up to that many at once.
+
+        If listing the files of a torrent fails, the error is logged and the torrent is skipped.
 
         Returns a generator of tracked files.
 
+        Parameters
+        ----------
+        concurrency : int
+            Maximum number of concurrent requests.
+        ordered : bool
+            Yield files in the order of the torrent list. If ``False``, files of the torrents of
+            each round are yielded in the order their requests completed.
+
         Yields
         ------
         TorrentTrackedFile
             Named tuple with file information.
         """
-        async for info in self.list_torrents():
-            async for tracked_file in self.list_files(info.hash):
+        hashes = [info.hash async for info in self.list_torrents()]
+        async for _, files in self._list_files_concurrently(hashes, concurrency, ordered=ordered):
+            for tracked_file in files:
                 yield tracked_file
 
+    async def _list_files_concurrently(
+            self, hashes: Sequence[str], concurrency: int, *,
+            ordered: bool) -> AsyncIterator[tuple[str, list[TorrentTrackedFile]]]:
+        async def list_one(hash_: str) -> list[TorrentTrackedFile]:
+            return [f async for f in self.list_files(hash_)]
+
+        # A task group cannot span the yields of an async generator, so the requests are sent in
+        # rounds that complete before their results are yielded.
+        for start in range(0, len(hashes), concurrency):
+            round_hashes = hashes[start:start + concurrency]
+            results = await _run_each(list_one, round_hashes)
+            for index, result in sorted(results,
+                                        key=operator.itemgetter(0)) if ordered else results:
+                if isinstance(result, (niquests.RequestException, ValueError)):
+                    log.error('Failed to list files of %s.', round_hashes[index], exc_info=result)
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield round_hashes[index], result
+
+    @_traced()
     async def delete(self, hash_: str) -> None:
         r"""
         Delete a torrent and its files by hash.
@@ -451,18 +1676,116 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         hash\_ : str
             Hash of the torrent.
         """
-        await run_sync(self._delete_sync, hash_)
+        if (fault := (await self.delete_many([hash_]))[hash_]) is not None:
+            raise fault
+
+    @_traced('xirvik.hash_count')
+    async def delete_many(self,
+                          hashes: Iterable[str],
+                          chunk_size: int = 100,
+                          concurrency: int = 4) -> dict[str, Exception | None]:
+        """
+        Delete many torrents and their files.
+
+        The calls for each torrent are packed into one ``system.multicall`` per chunk of
+        ``chunk_size`` torrents, with up to ``concurrency`` requests in flight. A fault for one
+        torrent does not stop the others from being deleted, and a failed request does not stop the
+        other chunks. The error of a failed request is returned for each torrent of its chunk.
+
+        Parameters
+        ----------
+        hashes : Iterable[str]
+            Hashes of the torrents.
+        chunk_size : int
+            Maximum number of torrents per request.
+        concurrency : int
+            Maximum number of requests in flight.
+
+        Returns
+        -------
+        dict[str, Exception | None]
+            The first fault returned for each hash (an :py:class:`xmlrpc.Fault`), the error of the
+            request of its chunk, or ``None`` if the torrent was deleted.
+        """
+        ret: dict[str, Exception | None] = {}
+        limiter = anyio.CapacityLimiter(concurrency)
+
+        async def delete_chunk(chunk: list[str]) -> list[Any]:
+            async with limiter:
+                return await self._multicall(
+                    call for hash_ in chunk for call in _delete_calls(hash_))
+
+        it = iter(hashes)
+        chunks = list(iter(lambda: list(itertools.islice(it, chunk_size)), []))
+        outcomes = sorted(await _run_each(delete_chunk, chunks), key=operator.itemgetter(0))
+        if any(not isinstance(x, Exception) for _, x in outcomes):
+            await self._invalidate_cache()
+        for chunk, (_, results) in zip(chunks, outcomes, strict=True):
+            if isinstance(results, Exception):
+                log.debug('Failed to delete %d torrents: %s', len(chunk), results)
+                ret.update(dict.fromkeys(chunk, results))
+                continue
+            for i, hash_ in enumerate(chunk):
+                faults = (_fault_from_result(x)
+                          for x in results[i * len(DELETE_COMMANDS):(i + 1) * len(DELETE_COMMANDS)])
+                ret[hash_] = next((x for x in faults if x is not None), None)
+                if ret[hash_] is not None:
+                    log.debug('Fault deleting %s: %s', hash_, ret[hash_])
+        return ret
+
+    @_traced()
+    async def xmlrpc_call(self, method: str, *args: Any) -> Any:
+        """
+        Call an XML-RPC method on rTorrent.
 
-    def _delete_sync(self, hash_: str) -> None:
-        mc = xmlrpc.MultiCall(self._xmlrpc_proxy)
-        getattr(mc, 'd.custom5.set')(hash_, '1')
-        getattr(mc, 'd.delete_tied')(hash_)
-        getattr(mc, 'd.erase')(hash_)
-        for x in mc().results:
-            x_typed = cast('dict[str, Any]', x)
-            if 'faultCode' in x_typed and 'faultString' in x_typed:
-                raise xmlrpc.Fault(x_typed['faultCode'], x_typed['faultString'])
+        The call is sent through the client's HTTP session, so it shares its connection pool and
+        retry policy.
 
+        Faults are converted to :py:class:`xmlrpc.Fault` exceptions. A response with an error
+        status is raised as :py:class:`xmlrpc.ProtocolError`.
+
+        Parameters
+        ----------
+        method : str
+            Method name, such as ``d.name``.
+        *args : Any
+            Method parameters.
+
+        Returns
+        -------
+        Any
+            The value returned by the method.
+
+        Raises
+        ------
+        ProtocolError
+            If the server responds with an error status.
+        """
+        coalesce = method in COALESCED_XMLRPC_METHODS or (
+            method == 'system.multicall' and bool(args)
+            and all(call['methodName'] in COALESCED_XMLRPC_METHODS for call in args[0]))
+        if not coalesce:
+            # The call may change torrents.
+            self._generation += 1
+            self._responses.clear()
+        r = await self._post(self.multirpc_action_uri,
+                             data=xmlrpc.dumps(args, method).encode(),
+                             headers={'Content-Type': 'text/xml'},
+                             auth=self.auth,
+                             coalesce=coalesce)
+        if not r.ok:
+            raise xmlrpc.ProtocolError(self.multirpc_action_uri, r.status_code or 0, r.reason or '',
+                                       dict(r.headers))
+        return xmlrpc.loads(r.content or b'')[0][0]
+
+    async def _multicall(self, calls: Iterable[tuple[str, tuple[Any, ...]]]) -> list[Any]:
+        return cast(
+            'list[Any]', await self.xmlrpc_call('system.multicall', [{
+                'methodName': method,
+                'params': list(params)
+            } for method, params in calls]))
+
+    @_traced()
     async def remove(self, hash_: str) -> None:
         r"""
         Remove a torrent from the client but keep the data.
@@ -476,13 +1799,15 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         hash\_ : str
             Hash of the torrent.
         """
-        (await self._session.post(self.multirpc_action_uri,
-                                  data={
-                                      'mode': 'remove',
-                                      'hash': hash_
-                                  },
-                                  auth=self.auth)).raise_for_status()
-
+        (await self._post(self.multirpc_action_uri,
+                          data={
+                              'mode': 'remove',
+                              'hash': hash_
+                          },
+                          auth=self.auth)).raise_for_status()
+        await self._invalidate_cache()
+
+    @_traced()
     async def stop(self, hash_: str) -> None:
         r"""
         Stop a torrent by hash.
@@ -494,13 +1819,15 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         hash\_ : str
             Hash of the torrent.
         """
-        (await self._session.post(self.multirpc_action_uri,
-                                  data={
-                                      'mode': 'stop',
-                                      'hash': hash_
-                                  },
-                                  auth=self.auth)).raise_for_status()
-
+        (await self._post(self.multirpc_action_uri,
+                          data={
+                              'mode': 'stop',
+                              'hash': hash_
+                          },
+                          auth=self.auth)).raise_for_status()
+        await self._invalidate_cache()
+
+    @_traced()
     async def add_torrent_url(self, url: str) -> None:
         """
         Add a torrent via URI.
@@ -511,9 +1838,11 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
             URI to the torrent file. Must be available either under the current credentials or
             public.
         """
-        (await self._session.post(self.add_torrent_uri, data={'url': url},
-                                  auth=self.auth)).raise_for_status()
+        (await self._post(self.add_torrent_uri, data={'url': url},
+                          auth=self.auth)).raise_for_status()
+        await self._invalidate_cache()
 
+    @_traced()
     async def edit_torrents(self,
                             hashes: Iterable[str],
                             *,
@@ -539,20 +1868,21 @@ class ruTorrentClient:  # ruff:ignore[invalid-class-name]
         niquests.Response
             The response object.
         """
-        r = await self._session.post(f'{self.http_prefix}/rtorrent/plugins/edit/action.php',
-                                     data=[
-                                         *(({
-                                             'comment': comment.strip(),
-                                             'set_comment': '1'
-                                         } if comment else {}) | ({
-                                             'private': '1' if private else '0',
-                                             'set_private': '1'
-                                         } if private is not None else {}) | ({
-                                             'set_trackers': '1'
-                                         } if trackers else {})).items(),
-                                         *(('hash', h) for h in hashes or []),
-                                         *(('tracker', t) for t in trackers or [])
-                                     ],
-                                     auth=self.auth)
+        r = await self._post(f'{self.http_prefix}/rtorrent/plugins/edit/action.php',
+                             data=[
+                                 *(({
+                                     'comment': comment.strip(),
+                                     'set_comment': '1'
+                                 } if comment else {}) | ({
+                                     'private': '1' if private else '0',
+                                     'set_private': '1'
+                                 } if private is not None else {}) | ({
+                                     'set_trackers': '1'
+                                 } if trackers else {})).items(),
+                                 *(('hash', h) for h in hashes or []),
+                                 *(('tracker', t) for t in trackers or [])
+                             ],
+                             auth=self.auth)
         r.raise_for_status()
+        await self._invalidate_cache()
         return r
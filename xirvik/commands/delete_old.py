@@ -1,25 +1,35 @@
 """Deletes old torrents based on specified criteria."""
 from __future__ import annotations
 
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Any
 import asyncio
 import logging
 import xmlrpc.client as xmlrpc
 
 from bascom import setup_logging
 from niquests.exceptions import HTTPError
-from xirvik.client import ruTorrentClient
+from xirvik.cache import TorrentCache
+from xirvik.client import label_filter, ruTorrentClient
 from xirvik.typing import TorrentInfo
 import anyio
 import click
 
-from .utils import command_with_config_file, common_options_and_arguments
+from .utils import (
+    cache_options,
+    command_with_config_file,
+    common_options_and_arguments,
+    connection_options,
+    deprecated_options,
+)
 
 log = logging.getLogger(__name__)
 TestCallable = Callable[[TorrentInfo], tuple[str, bool]]
 TestsDict = dict[str, tuple[bool, TestCallable]]
+FIELDS = ('name', 'custom1', 'left_bytes', 'ratio', 'state_changed')
+"""Torrent fields used to select torrents to delete."""
 
 
 def _test_date_cb(days: int = 14) -> TestCallable:
@@ -38,12 +48,69 @@ def _test_ratio(info: TorrentInfo) -> tuple[str, bool]:
     return 'ratio >= 1', info.ratio >= 1
 
 
+def _select(torrents: Iterable[TorrentInfo], label: str | None, days: int, *, ignore_ratio: bool,
+            ignore_date: bool, dry_run: bool) -> list[str]:
+    tests: TestsDict = {
+        'ratio': (ignore_ratio, _test_ratio),
+        'date': (ignore_date, _test_date_cb(days))
+    }
+    to_delete: list[str] = []
+    for info in torrents:
+        if info.left_bytes != 0 or info.custom1 != label:
+            continue
+        reason: str | None = None
+        can_delete = False
+        for key, (can_ignore, test) in tests.items():
+            if can_ignore:
+                can_delete = True
+                reason = f'ignoring {key}'
+                break
+            reason, can_delete = test(info)
+            if can_delete:
+                break
+        if not can_delete:
+            log.info('Cannot delete %s', info.name)
+            continue
+        if dry_run:
+            log.info('Would delete %s, reason: %s', info.name, reason)
+            continue
+        log.info('Deleting %s, reason: %s', info.name, reason)
+        to_delete.append(info.hash)
+    return to_delete
+
+
+async def _delete_batch(client: ruTorrentClient, batch: list[str], *, max_attempts: int,
+                        backoff_factor: int) -> None:
+    attempts = 0
+    while batch and attempts < max_attempts:
+        attempts += 1
+        try:
+            faults = await client.delete_many(batch)
+        except xmlrpc.ProtocolError:
+            log.exception('Failed to delete %d torrents', len(batch))
+        else:
+            batch = [hash_ for hash_, fault in faults.items() if fault is not None]
+            for hash_ in batch:
+                log.warning('Failed to delete %s: %s', hash_, faults[hash_])
+        if batch:
+            delay = backoff_factor * (2 ** (attempts - 1))
+            with client.tracer.span('sleep', {'xirvik.seconds': delay}):
+                await anyio.sleep(delay)
+
+
 @click.command(cls=command_with_config_file('config', 'delete-old'))
 @common_options_and_arguments
+@cache_options
+@connection_options
+@deprecated_options(('--sleep-time',))
 @click.option('--days', type=int, default=14)
 @click.option('--label', default=None)
 @click.option('--max-attempts', type=int, default=3)
-@click.option('--sleep-time', type=int, default=10)
+@click.option('-b',
+              '--batch-size',
+              type=int,
+              default=100,
+              help='Number of torrents to delete per request.')
 @click.option('-D', '--ignore-date', is_flag=True)
 @click.option('-a', '--ignore-ratio', is_flag=True)
 @click.option('-y', '--dry-run', is_flag=True)
@@ -57,10 +124,14 @@ def main(
         max_retries: int = 10,
         days: int = 14,
         backoff_factor: int = 1,
-        sleep_time: int = 10,
+        batch_size: int = 100,
         config: str | None = None,  # ruff:ignore[unused-function-argument]
+        cache_max_age: int = 300,
+        connection_options: dict[str, Any] | None = None,
         *,
+        cache: bool = False,
         debug: bool = False,
+        refresh: bool = False,
         ignore_ratio: bool = False,
         ignore_date: bool = False,
         dry_run: bool = False) -> None:
@@ -80,45 +151,37 @@ def main(
                                    name=username,
                                    password=password,
                                    max_retries=max_retries,
-                                   netrc_path=netrc_path) as client:
+                                   netrc_path=netrc_path,
+                                   cache=TorrentCache(max_age=cache_max_age) if cache else None,
+                                   **(connection_options or {})) as client:
             try:
-                torrents = [info async for info in client.list_torrents()]
+                with client.tracer.span('list') as span:
+                    # Only complete torrents with the label can be deleted. Filtering on the server
+                    # bypasses the cache, so it is only done without one.
+                    torrents = [
+                        info async for info in client.list_torrents(
+                            refresh=refresh,
+                            fields=FIELDS,
+                            view='main' if cache else 'complete',
+                            filter=label_filter(label) if label and not cache else None)
+                    ]
+                    span.set_attribute('xirvik.torrent_count', len(torrents))
             except HTTPError as e:
                 log.exception('Connection failed on list_torrents() call')
                 raise click.Abort from e
-            tests = {
-                'ratio': (ignore_ratio, _test_ratio),
-                'date': (ignore_date, _test_date_cb(days))
-            }
-            for info in torrents:
-                if info.left_bytes != 0 or info.custom1 != label:
-                    continue
-                reason: str | None = None
-                can_delete = False
-                for key, (can_ignore, test) in tests.items():
-                    if can_ignore:
-                        can_delete = True
-                        reason = f'ignoring {key}'
-                        break
-                    reason, can_delete = test(info)
-                    if can_delete:
-                        break
-                if not can_delete:
-                    log.info('Cannot delete %s', info.name)
-                    continue
-                if dry_run:
-                    log.info('Would delete %s, reason: %s', info.name, reason)
-                    continue
-                log.info('Deleting %s, reason: %s', info.name, reason)
-                attempts = 0
-                while attempts < max_attempts:
-                    attempts += 1
-                    try:
-                        await client.delete(info.hash)
-                    except (xmlrpc.Fault, xmlrpc.ProtocolError):
-                        await anyio.sleep(backoff_factor * (2 ** (attempts - 1)))
-                    else:
-                        await anyio.sleep(sleep_time)
-                        break
+            with client.tracer.span('filter') as span:
+                to_delete = _select(torrents,
+                                    label,
+                                    days,
+                                    ignore_ratio=ignore_ratio,
+                                    ignore_date=ignore_date,
+                                    dry_run=dry_run)
+                span.set_attribute('xirvik.hash_count', len(to_delete))
+            with client.tracer.span('act', {'xirvik.hash_count': len(to_delete)}):
+                for start in range(0, len(to_delete), batch_size):
+                    await _delete_batch(client,
+                                        to_delete[start:start + batch_size],
+                                        max_attempts=max_attempts,
+                                        backoff_factor=backoff_factor)
 
     asyncio.run(_main())
@@ -2,17 +2,24 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 import asyncio
 import logging
 
 from bascom import setup_logging
-from niquests.exceptions import HTTPError
-from xirvik.client import ruTorrentClient
+from niquests.exceptions import HTTPError, RequestException
+from xirvik.cache import TorrentCache
+from xirvik.client import LABELLED_FILTER, UnexpectedruTorrentError, ruTorrentClient
 import anyio
 import click
 
-from .utils import command_with_config_file, common_options_and_arguments
+from .utils import (
+    cache_options,
+    command_with_config_file,
+    common_options_and_arguments,
+    connection_options,
+    deprecated_options,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Sequence
@@ -21,6 +28,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 PREFIX = '/downloads/{}'
+FIELDS = ('name', 'base_path', 'custom1', 'is_hash_checking', 'left_bytes')
+"""Torrent fields used to select and move torrents."""
 
 
 def _base_path_check(username: str, completed_dir: str, *,
@@ -47,17 +56,13 @@ def _key_check(info: TorrentInfo) -> bool:
 @click.command(cls=command_with_config_file('config', 'move-by-label'),
                context_settings={'help_option_names': ('-h', '--help')})
 @common_options_and_arguments
-@click.option('-b', '--batch-size', type=int, default=10, help='Batch size.')
+@cache_options
+@connection_options
+@deprecated_options(('-b', '--batch-size'), ('-t', '--sleep-time'))
 @click.option('-c',
               '--completed-dir',
               default='_completed',
               help='Top directory where moved torrent data will be placed.')
-@click.option('-t',
-              '--sleep-time',
-              default=10,
-              type=int,
-              help=('Time to sleep in seconds at certain times during this batch '
-                    'of requests.'))
 @click.option('-l',
               '--lower-label',
               is_flag=True,
@@ -69,13 +74,15 @@ def main(host: str,
          username: str | None = None,
          password: str | None = None,
          completed_dir: str = '_completed',
-         sleep_time: int = 10,
          max_retries: int = 10,
          backoff_factor: int = 1,
          config: str | None = None,
-         batch_size: int = 10,
+         cache_max_age: int = 300,
+         connection_options: dict[str, Any] | None = None,
          *,
+         cache: bool = False,
          debug: bool = False,
+         refresh: bool = False,
          lower_label: bool | None = None) -> None:
     """Move torrents according to labels assigned."""
     netrc_path = Path(netrc) if netrc else Path('~/.netrc').expanduser()
@@ -98,27 +105,56 @@ def main(host: str,
                                    password=password,
                                    max_retries=max_retries,
                                    netrc_path=netrc_path,
-                                   backoff_factor=backoff_factor) as client:
+                                   backoff_factor=backoff_factor,
+                                   cache=TorrentCache(max_age=cache_max_age) if cache else None,
+                                   **(connection_options or {})) as client:
             uname = client.name
             try:
-                torrents = [info async for info in client.list_torrents()]
+                with client.tracer.span('list') as span:
+                    # Only complete torrents with a label are moved. Filtering on the server
+                    # bypasses the cache, so it is only done without one.
+                    torrents = [
+                        info async for info in client.list_torrents(
+                            refresh=refresh,
+                            fields=FIELDS,
+                            view='main' if cache else 'complete',
+                            filter=None if cache else LABELLED_FILTER)
+                    ]
+                    span.set_attribute('xirvik.torrent_count', len(torrents))
             except (ValueError, HTTPError) as e:
                 logger.exception('Connection failed on list_torrents() call')
                 raise click.Abort from e
-            count = 0
-            for info in (
-                    y for y in (x for x in torrents if _key_check(x))
-                    if _base_path_check(uname, completed_dir, lower_label=lower_label or False)(y)):
-                label = info.custom1
-                if not label or label in ignore_labels:
-                    continue
-                if lower_label:
-                    label = label.lower()
-                move_to = f'{PREFIX.format(completed_dir)}/{label}'
+            base_path_check = _base_path_check(uname,
+                                               completed_dir,
+                                               lower_label=lower_label or False)
+            moves: list[tuple[TorrentInfo, str]] = []
+            with client.tracer.span('filter') as span:
+                for info in (x for x in torrents if _key_check(x) and base_path_check(x)):
+                    label = info.custom1
+                    if not label or label in ignore_labels:
+                        continue
+                    if lower_label:
+                        label = label.lower()
+                    moves.append((info, f'{PREFIX.format(completed_dir)}/{label}'))
+                span.set_attribute('xirvik.hash_count', len(moves))
+            failed: list[str] = []
+
+            async def move(info: TorrentInfo, move_to: str) -> None:
                 logger.info('Moving %s from %s to %s/.', info.name, info.base_path, move_to)
-                await client.move_torrent(info.hash, move_to)
-                count += 1
-                if count > 0 and (count % batch_size) == 0:
-                    await anyio.sleep(sleep_time)
+                try:
+                    await client.move_torrent(info.hash, move_to)
+                except (ValueError, RequestException, UnexpectedruTorrentError):
+                    logger.exception('Failed to move %s.', info.name)
+                    failed.append(info.hash)
+
+            # Moves run concurrently, paced by the client's rate and concurrency limiters. A failed
+            # move does not stop the others.
+            with client.tracer.span('act', {'xirvik.hash_count': len(moves)}):
+                async with anyio.create_task_group() as tg:
+                    for info, move_to in moves:
+                        tg.start_soon(move, info, move_to)
+            if failed:
+                logger.error('Failed to move %d of %d torrents.', len(failed), len(moves))
+                raise click.Abort
 
     asyncio.run(_main())
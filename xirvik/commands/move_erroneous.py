@@ -6,14 +6,22 @@ import asyncio
 import logging
 
 from bascom import setup_logging
-from xirvik.client import ruTorrentClient
+from niquests.exceptions import RequestException
+from xirvik.cache import TorrentCache
+from xirvik.client import LABELLED_FILTER, UnexpectedruTorrentError, ruTorrentClient
 import anyio
 import click
 
-from .utils import command_with_config_file, common_options_and_arguments
+from .utils import (
+    cache_options,
+    command_with_config_file,
+    common_options_and_arguments,
+    connection_options,
+    deprecated_options,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Awaitable, Callable, Iterable
 
     from xirvik.typing import TorrentInfo
 
@@ -22,6 +30,8 @@ __all__ = ('main',)
 logger = logging.getLogger(__name__)
 PREFIX = '/torrents/{}/_completed-not-active'
 BAD_MESSAGES = ('unregistered torrent', "couldn't connect to server", 'server returned nothing')
+FIELDS = ('name', 'message', 'custom1', 'is_hash_checking', 'left_bytes')
+"""Torrent fields used to select and move torrents."""
 T = TypeVar('T')
 
 
@@ -40,22 +50,33 @@ def _make_move_to(prefix: str, label: str) -> str:
     return f'{prefix}/{label}'
 
 
+async def _attempt(step: str, func: Callable[[TorrentInfo], Awaitable[None]], info: TorrentInfo,
+                   failed: set[str]) -> None:
+    try:
+        await func(info)
+    except (ValueError, RequestException, UnexpectedruTorrentError):
+        logger.exception('Failed to %s %s.', step, info.name)
+        failed.add(info.hash)
+
+
 @click.command(cls=command_with_config_file('config', 'move-erroneous'),
                context_settings={'help_option_names': ('-h', '--help')})
 @common_options_and_arguments
-@click.option('--sleep-time',
-              type=int,
-              default=10,
-              help='Time to sleep between batches in seconds.')
+@cache_options
+@connection_options
+@deprecated_options(('--sleep-time',))
 def main(
         host: str,
         netrc: str | None = None,
         username: str | None = None,
         password: str | None = None,
-        sleep_time: int = 10,
         max_retries: int = 10,
+        cache_max_age: int = 300,
+        connection_options: dict[str, Any] | None = None,
         *,
+        cache: bool = False,
         debug: bool = False,
+        refresh: bool = False,
         **kwargs: Any  # ruff:ignore[unused-function-argument]
 ) -> None:
     """Move torrents in error state to another location."""
@@ -72,27 +93,49 @@ def main(
                                    name=username,
                                    password=password,
                                    max_retries=max_retries,
-                                   netrc_path=netrc) as client:
+                                   netrc_path=netrc,
+                                   cache=TorrentCache(max_age=cache_max_age) if cache else None,
+                                   **(connection_options or {})) as client:
             prefix = PREFIX.format(client.name)
-            to_delete: list[tuple[str, str]] = []
-            items = [info async for info in client.list_torrents() if _should_process(info)]
-            for count, info in enumerate(items):
+            with client.tracer.span('list') as span:
+                # Only complete torrents with a label are moved. Filtering on the server bypasses
+                # the cache, so it is only done without one.
+                torrents = [
+                    info async for info in client.list_torrents(
+                        refresh=refresh,
+                        fields=FIELDS,
+                        view='main' if cache else 'complete',
+                        filter=None if cache else LABELLED_FILTER)
+                ]
+                span.set_attribute('xirvik.torrent_count', len(torrents))
+            with client.tracer.span('filter') as span:
+                items = [info for info in torrents if _should_process(info)]
+                span.set_attribute('xirvik.hash_count', len(items))
+
+            async def stop(info: TorrentInfo) -> None:
                 logger.info('Stopping %s.', info.name)
                 await client.stop(info.hash)
-                if count > 0 and (count % 10) == 0:
-                    await anyio.sleep(sleep_time)
-            for count, info in enumerate(items):
+
+            async def move(info: TorrentInfo) -> None:
                 move_to = _make_move_to(prefix, info.custom1.lower())
-                to_delete.append((info.hash, info.name))
                 logger.info('Moving %s to %s/.', info.name, move_to)
                 await client.move_torrent(info.hash, move_to)
                 await client.stop(info.hash)
-                if count > 0 and (count % 10) == 0:
-                    await anyio.sleep(sleep_time)
-            for count, (hash_, name) in enumerate(to_delete):
-                logger.info('Removing torrent "%s" (without deleting data).', name)
-                await client.remove(hash_)
-                if count > 0 and (count % 10) == 0:
-                    await anyio.sleep(sleep_time)
+
+            async def remove(info: TorrentInfo) -> None:
+                logger.info('Removing torrent "%s" (without deleting data).', info.name)
+                await client.remove(info.hash)
+
+            # Each step runs concurrently for all torrents, paced by the client's rate and
+            # concurrency limiters. A torrent that fails a step is skipped by the following steps.
+            failed: set[str] = set()
+            with client.tracer.span('act', {'xirvik.hash_count': len(items)}):
+                for step, func in (('stop', stop), ('move', move), ('remove', remove)):
+                    async with anyio.create_task_group() as tg:
+                        for info in [x for x in items if x.hash not in failed]:
+                            tg.start_soon(_attempt, step, func, info, failed)
+            if failed:
+                logger.error('Failed to move %d of %d torrents.', len(failed), len(items))
+                raise click.Abort
 
     asyncio.run(_main())
@@ -12,6 +12,7 @@ from .simple import (
     authorize_ip,
     delete_ftp_user,
     download_untracked_files,
+    export_torrents,
     fix_rtorrent,
     list_all_files,
     list_files,
@@ -52,6 +53,7 @@ ftp.add_command(delete_ftp_user, 'delete-user')
 ftp.add_command(list_ftp_users, 'list-users')
 rtorrent.add_command(delete_old, 'delete-old')
 rtorrent.add_command(download_untracked_files, 'download-untracked-files')
+rtorrent.add_command(export_torrents, 'export-torrents')
 rtorrent.add_command(fix_rtorrent, 'fix')
 rtorrent.add_command(list_all_files, 'list-all-files')
 rtorrent.add_command(list_files, 'list-files')
@@ -6,11 +6,9 @@ from datetime import MINYEAR, datetime, timezone
 from logging.handlers import SysLogHandler
 from pathlib import Path
 from shlex import quote
-from tempfile import NamedTemporaryFile
-from typing import TYPE_CHECKING, Any, NoReturn, cast
+from typing import TYPE_CHECKING, Any, BinaryIO, NoReturn, cast
 import asyncio
 import functools
-import json
 import logging
 import re
 import signal
@@ -22,13 +20,21 @@ from bs4 import BeautifulSoup as Soup
 from fabric import Connection  # type: ignore[import-untyped]
 from niquests.exceptions import HTTPError
 from tabulate import tabulate, tabulate_formats
-from unidecode import unidecode
+from xirvik.cache import TorrentCache
 from xirvik.client import ruTorrentClient
+from xirvik.json_backend import get_json_backend
 import anyio
 import click
 import niquests
 
-from .utils import command_with_config_file, complete_hosts, complete_ports
+from .utils import (
+    cache_options,
+    command_with_config_file,
+    complete_hashes,
+    complete_hosts,
+    complete_ports,
+    connection_options,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Iterator, Sequence
@@ -101,39 +107,19 @@ def start_torrents(
                               'propagate': False
                           } if handlers_tuple else {}
                       })
-        cache_dir = await (await anyio.Path('~/.cache/xirvik').expanduser()).resolve()
-        await cache_dir.mkdir(parents=True, exist_ok=True)
-        post_url = f'https://{host:s}:{port:d}/rtorrent/php/addtorrent.php?'
-        form_data: dict[str, str] = {}
-        if start_stopped:
-            form_data['torrents_start_stopped'] = 'on'
-        for d in (Path(x) for x in directories):
-            for item in d.iterdir():
-                if not item.name.lower().endswith('.torrent'):
-                    continue
-                prefix = f'{item.name:s}-'
-                item_bytes = await anyio.Path(item).read_bytes()
-                with NamedTemporaryFile(prefix=prefix,
-                                        suffix='.torrent',
-                                        dir=cache_dir,
-                                        delete=False) as w:
-                    w.write(item_bytes)
-                    old = item
-                torrent_content = await anyio.Path(w.name).read_bytes()
-                filename = unidecode(w.name)
-                log.info('Uploading torrent %s (actual name: "%s").',
-                         Path(item).name,
-                         Path(filename).name)
-                resp = await niquests.apost(post_url,
-                                            data=form_data,
-                                            files={'torrent_file': (filename, torrent_content)},
-                                            verify=not no_verify,
-                                            timeout=30)
-                if not resp.ok:
-                    log.error('Error uploading %s.', old)
-                    continue
-                log.debug('Deleting %s.', old)
-                await anyio.Path(old).unlink()
+        paths = sorted(item for d in directories for item in d.iterdir()
+                       if item.name.lower().endswith('.torrent'))
+        if not paths:
+            return
+        log.info('Uploading %d torrents.', len(paths))
+        async with ruTorrentClient(f'{host}:{port}', verify=not no_verify) as client:
+            results = await client.add_torrents(paths, start_now=not start_stopped)
+        for path in paths:
+            if not results.get(str(path)):
+                log.error('Error uploading %s.', path)
+                continue
+            log.debug('Deleting %s.', path)
+            await anyio.Path(path).unlink()
 
     asyncio.run(_main())
 
@@ -377,15 +363,21 @@ STATES_FOR_SORTING = {'finished', 'creation_date', 'state_changed'}
                   ('name', 'hash', 'label', 'creation_date', 'state_changed', 'finished')),
               help='Field to sort by.')
 @click.option('-R', '--reverse-order', is_flag=True, help='Reverse the sort order.')
+@cache_options
+@connection_options
 def list_torrents(
         host: str,
         config: str | None = None,  # ruff:ignore[unused-function-argument]
         table_format: str = 'plain',
         sort: str | None = None,
+        cache_max_age: int = 300,
+        connection_options: dict[str, Any] | None = None,
         *,
+        cache: bool = False,
         debug: bool = False,
         no_headers: bool = False,
         port: int = 443,
+        refresh: bool = False,
         reverse_order: bool | None = None) -> None:
     """List torrents in a given format."""
     async def _main() -> None:
@@ -406,9 +398,11 @@ def list_torrents(
                 return min_tz_aware
             return val or ''
 
-        async with ruTorrentClient(f'{host}:{port}') as client:
+        async with ruTorrentClient(f'{host}:{port}',
+                                   cache=TorrentCache(max_age=cache_max_age) if cache else None,
+                                   **(connection_options or {})) as client:
             torrents = cast('list[TorrentInfo] | Sequence[TorrentInfo]',
-                            [info async for info in client.list_torrents()])
+                            [info async for info in client.list_torrents(refresh=refresh)])
             if sort:
                 torrents = sorted(torrents, key=sorter)
             if reverse_order:
@@ -421,14 +415,13 @@ def list_torrents(
                                           ('Hash', 'Name', 'Label', 'Finished')),
                                  tablefmt=table_format))
                 case 'json':
-                    click.echo(
-                        json.dumps([{
-                            'hash': x.hash,
-                            'name': x.name,
-                            'label': x.custom1,
-                            'finished': x.finished.isoformat() if x.finished else None,
-                            'base_path': x.base_path
-                        } for x in torrents]))
+                    click.echo(get_json_backend().dumps([{
+                        'hash': x.hash,
+                        'name': x.name,
+                        'label': x.custom1,
+                        'finished': x.finished.isoformat() if x.finished else None,
+                        'base_path': x.base_path
+                    } for x in torrents]))
                 case _:  # pragma no cover
                     click.echo('Invalid table format specified.', err=True)
                     raise click.Abort
@@ -459,7 +452,7 @@ def list_torrents(
               default='name',
               help='Field to sort by.')
 @click.option('-R', '--reverse-order', is_flag=True, help='Reverse the sort order.')
-@click.argument('hash')
+@click.argument('hash', shell_complete=complete_hashes)
 def list_files(
         hash: str,  # ruff:ignore[builtin-argument-shadowing]
         host: str,
@@ -496,7 +489,7 @@ def list_files(
                                            'Priority ID')),
                                  tablefmt=table_format))
                 case 'json':
-                    click.echo(json.dumps([x._asdict() for x in files]))
+                    click.echo(get_json_backend().dumps([x._asdict() for x in files]))
                 case _:  # pragma no cover
                     click.echo('Invalid table format specified.', err=True)
                     raise click.Abort
@@ -521,12 +514,18 @@ def _resolve_single_file_torrent_path(info: TorrentInfo, filename: str) -> str:
               help='Server port.',
               shell_complete=complete_ports)
 @click.option('-d', '--debug', is_flag=True, help='Enable debug level logging.')
+@cache_options
+@connection_options
 def list_all_files(
         host: str,
         port: int,
         config: str | None = None,  # ruff:ignore[unused-function-argument]
+        cache_max_age: int = 300,
+        connection_options: dict[str, Any] | None = None,
         *,
-        debug: bool = False) -> None:
+        cache: bool = False,
+        debug: bool = False,
+        refresh: bool = False) -> None:
     """List every tracked file."""
     async def _main() -> None:
         setup_logging(debug=debug,
@@ -537,14 +536,17 @@ def list_all_files(
                           },
                           'xirvik': {}
                       })
-        async with ruTorrentClient(f'{host}:{port}') as client:
+        async with ruTorrentClient(f'{host}:{port}',
+                                   cache=TorrentCache(max_age=cache_max_age) if cache else None,
+                                   **(connection_options or {})) as client:
             click.echo('Listing torrents ...', file=sys.stderr)
-            all_torrents = [info async for info in client.list_torrents()]
-            with click.progressbar(all_torrents, file=sys.stderr,
+            all_torrents = {info.hash: info async for info in client.list_torrents(refresh=refresh)}
+            with click.progressbar(length=len(all_torrents),
+                                   file=sys.stderr,
                                    label='Getting file list') as progress_bar:
-                info: TorrentInfo
-                for info in progress_bar:
-                    files = [f async for f in client.list_files(info.hash)]
+                async for hash_, files in client.list_files_many(all_torrents):
+                    progress_bar.update(1)
+                    info = all_torrents[hash_]
                     if len(files) == 1:
                         click.echo(_resolve_single_file_torrent_path(info, files[0].name))
                     else:
@@ -554,6 +556,82 @@ def list_all_files(
     asyncio.run(_main())
 
 
+@click.command(cls=command_with_config_file('config', 'export-torrents'),
+               context_settings={'help_option_names': ('-h', '--help')})
+@click.option('-H', '--host', help='Xirvik host (without protocol).', shell_complete=complete_hosts)
+@click.option('-C', '--config', help='Configuration file.')
+@click.option('-p',
+              '--port',
+              type=int,
+              default=443,
+              help='Server port.',
+              shell_complete=complete_ports)
+@click.option('-d', '--debug', is_flag=True, help='Enable debug level logging.')
+@click.option('-o',
+              '--output-dir',
+              type=click.Path(file_okay=False, path_type=Path),
+              help='Directory to save the files in. Defaults to the current directory.')
+@click.option('-t',
+              '--tar',
+              'tar_file',
+              type=click.File('wb'),
+              help='Write a tar archive instead of separate files (- for standard output).')
+@click.option('-c',
+              '--concurrency',
+              type=int,
+              default=4,
+              help='Maximum number of downloads at once.')
+@click.argument('hashes', nargs=-1, shell_complete=complete_hashes)
+@cache_options
+@connection_options
+def export_torrents(
+        host: str,
+        port: int,
+        hashes: tuple[str, ...],
+        config: str | None = None,  # ruff:ignore[unused-function-argument]
+        output_dir: Path | None = None,
+        tar_file: BinaryIO | None = None,
+        concurrency: int = 4,
+        cache_max_age: int = 300,
+        connection_options: dict[str, Any] | None = None,
+        *,
+        cache: bool = False,
+        debug: bool = False,
+        refresh: bool = False) -> None:
+    """
+    Save the source torrent files of torrents.
+
+    If no hashes are passed, every torrent is exported. Files already in the output directory are
+    not downloaded again.
+    """
+    async def _main() -> None:
+        if output_dir and tar_file:
+            msg = '--output-dir and --tar cannot be used together.'
+            raise click.UsageError(msg)
+        setup_logging(debug=debug,
+                      loggers={
+                          'urllib3': {},
+                          'urllib3.util.retry': {
+                              'level': 'WARNING'
+                          },
+                          'xirvik': {}
+                      })
+        async with ruTorrentClient(f'{host}:{port}',
+                                   cache=TorrentCache(max_age=cache_max_age) if cache else None,
+                                   **(connection_options or {})) as client:
+            all_hashes = hashes or [
+                info.hash async for info in client.list_torrents(refresh=refresh, fields=())
+            ]
+            log.info('Exporting %d torrents.', len(all_hashes))
+            results = await client.save_torrents(all_hashes, tar_file or output_dir or Path(),
+                                                 concurrency)
+        if failed := [hash_ for hash_, saved in results.items() if not saved]:
+            log.error('Failed to export %d torrents: %s', len(failed), ', '.join(failed))
+            raise click.Abort
+
+    asyncio.run(_main())
+
+
 @click.command(cls=command_with_config_file('config', 'list-untracked-files'),
                context_settings={'help_option_names': ('-h', '--help')})
 @click.option('-H', '--host', help='Xirvik host (without protocol).', shell_complete=complete_hosts)
@@ -571,13 +649,19 @@ def list_all_files(
                     "ssh name-of-server 'find /media/sf_hostshare -type f' | "
                     "sed -re 's|^/media/sf_hostshare|/torrents/username|g'."))
 @click.option('-d', '--debug', is_flag=True, help='Enable debug level logging.')
+@cache_options
+@connection_options
 def list_untracked_files(
         host: str,
         port: int,
         server_list_command: str,
         config: str | None = None,  # ruff:ignore[unused-function-argument]
+        cache_max_age: int = 300,
+        connection_options: dict[str, Any] | None = None,
         *,
-        debug: bool = False) -> None:
+        cache: bool = False,
+        debug: bool = False,
+        refresh: bool = False) -> None:
     """List all files on the server that are not tracked."""
     async def _main() -> None:
         def fix_path(res: str) -> str:
@@ -620,15 +704,18 @@ def list_untracked_files(
                     except ValueError:  # pragma: no cover
                         log.debug('Unknown file (%s): %s', info.name, file)
 
-        async with ruTorrentClient(f'{host}:{port}') as client:
+        async with ruTorrentClient(f'{host}:{port}',
+                                   cache=TorrentCache(max_age=cache_max_age) if cache else None,
+                                   **(connection_options or {})) as client:
             click.echo('Listing torrents ...', file=sys.stderr)
-            all_torrents = [info async for info in client.list_torrents()]
-            with click.progressbar(all_torrents, file=sys.stderr,
+            all_torrents = {info.hash: info async for info in client.list_torrents(refresh=refresh)}
+            with click.progressbar(length=len(all_torrents),
+                                   file=sys.stderr,
                                    label='Getting file list') as progress_bar:
-                info: TorrentInfo
-                for info in progress_bar:
+                async for hash_, files in client.list_files_many(all_torrents):
+                    progress_bar.update(1)
+                    info = all_torrents[hash_]
                     log.debug('Torrent: %s', info.name)
-                    files = [f async for f in client.list_files(info.hash)]
                     if files:
                         _remove_tracked(info, files)
         for file in sorted(server_files):
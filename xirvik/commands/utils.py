@@ -7,20 +7,36 @@ import functools
 import itertools
 import logging
 import re
+import sqlite3
 import warnings
 
 from click.core import ParameterSource
 from typing_extensions import override
+from xirvik.cache import DEFAULT_CACHE_MAX_AGE, TorrentCache
+from xirvik.client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_KEEPALIVE_DELAY,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_RATE_BURST,
+    DEFAULT_READ_TIMEOUT,
+    ENDPOINTS,
+)
+from xirvik.metrics import RequestMetrics
+from xirvik.tracing import JSONLinesTracer, Tracer
 import click
 import platformdirs
 import yaml
 
 if TYPE_CHECKING:  # pragma no cover
-    from collections.abc import Callable, Iterator
+    from collections.abc import Callable, Iterable, Iterator
 
-__all__ = ('common_options_and_arguments', 'complete_hosts', 'complete_ports')
+__all__ = ('cache_options', 'common_options_and_arguments', 'complete_hashes', 'complete_hosts',
+           'complete_ports', 'connection_options', 'deprecated_options')
 
 logger = logging.getLogger(__name__)
+_CONNECTION_OPTION_NAMES = ('pool_connections', 'pool_maxsize', 'multiplexed', 'connect_timeout',
+                            'read_timeout', 'keepalive_delay', 'rate_limit', 'rate_burst')
 
 
 def common_options_and_arguments(func: Callable[..., None]) -> Callable[..., None]:
@@ -63,6 +79,167 @@ def common_options_and_arguments(func: Callable[..., None]) -> Callable[..., Non
     return wrapper
 
 
+def cache_options(func: Callable[..., None]) -> Callable[..., None]:
+    """
+    Torrent list cache options, to be used as a decorator with ``click.command()``.
+
+    Parameters
+    ----------
+    func : Callable[..., None]
+        The function to decorate.
+
+    Returns
+    -------
+    Callable[..., None]
+        The decorated function.
+    """
+    @click.option('--cache',
+                  is_flag=True,
+                  help='Read the torrent list from and save it to a cache in ~/.cache/xirvik.')
+    @click.option('--cache-max-age',
+                  type=int,
+                  default=DEFAULT_CACHE_MAX_AGE,
+                  help='Maximum age in seconds of the cached torrent list.')
+    @click.option('--refresh', is_flag=True, help='Fetch the torrent list even if it is cached.')
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> None:  # pragma: no cover
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def connection_options(func: Callable[..., None]) -> Callable[..., None]:
+    """
+    HTTP connection options, to be used as a decorator with ``click.command()``.
+
+    The options are collected into a ``connection_options`` dictionary argument that can be passed
+    to :py:class:`~xirvik.client.ruTorrentClient` as keyword arguments.
+
+    Parameters
+    ----------
+    func : Callable[..., None]
+        The function to decorate.
+
+    Returns
+    -------
+    Callable[..., None]
+        The decorated function.
+    """
+    @click.option('--pool-connections',
+                  type=int,
+                  default=DEFAULT_POOL_CONNECTIONS,
+                  help='Number of connection pools to cache.')
+    @click.option('--pool-maxsize',
+                  type=int,
+                  default=DEFAULT_POOL_MAXSIZE,
+                  help='Maximum number of connections to keep open to the host.')
+    @click.option('--multiplexed',
+                  is_flag=True,
+                  help='Send concurrent requests over one multiplexed HTTP/2 connection.')
+    @click.option('--connect-timeout',
+                  type=float,
+                  default=DEFAULT_CONNECT_TIMEOUT,
+                  help='Time in seconds to wait for a connection.')
+    @click.option('--read-timeout',
+                  type=float,
+                  default=DEFAULT_READ_TIMEOUT,
+                  help='Time in seconds to wait for data from the server.')
+    @click.option('--keepalive-delay',
+                  type=float,
+                  default=DEFAULT_KEEPALIVE_DELAY,
+                  help='Time in seconds to keep an idle connection alive.')
+    @click.option('--rate-limit',
+                  type=float,
+                  help='Maximum number of requests per second. Not limited by default.')
+    @click.option('--rate-burst',
+                  type=int,
+                  default=DEFAULT_RATE_BURST,
+                  help='Number of requests that can be sent at once before the rate limit applies.')
+    @click.option('--endpoint-rate-limit',
+                  'endpoint_rate_limits',
+                  multiple=True,
+                  metavar='ENDPOINT=RATE',
+                  help=('Maximum number of requests per second to an endpoint '
+                        f'({", ".join(ENDPOINTS)}). Can be given more than once.'))
+    @click.option('--metrics-file',
+                  type=click.Path(dir_okay=False, path_type=Path),
+                  help=('Write request metrics to this file at exit, in the Prometheus textfile '
+                        'collector format.'))
+    @click.option('--trace-file',
+                  type=click.Path(dir_okay=False, path_type=Path),
+                  help='Append a span for the command, each of its phases and each request to '
+                  'this file, one JSON object per line.')
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> None:
+        metrics_file: Path | None = kwargs.pop('metrics_file')
+        metrics = RequestMetrics() if metrics_file else None
+        trace_file: Path | None = kwargs.pop('trace_file')
+        tracer = JSONLinesTracer(trace_file) if trace_file else Tracer()
+        options = {k: kwargs.pop(k) for k in _CONNECTION_OPTION_NAMES}
+        options['endpoint_rate_limits'] = _parse_endpoint_rate_limits(
+            kwargs.pop('endpoint_rate_limits'))
+        options['metrics'] = metrics
+        options['tracer'] = tracer
+        kwargs['connection_options'] = options
+        try:
+            with tracer.span(click.get_current_context().info_name or func.__name__):
+                return func(*args, **kwargs)
+        finally:
+            tracer.close()
+            if metrics_file and metrics:
+                metrics.write_textfile(metrics_file)
+
+    return wrapper
+
+
+def deprecated_options(
+        *options: tuple[str, ...]) -> Callable[[Callable[..., None]], Callable[..., None]]:
+    """
+    Hidden integer options that are accepted for compatibility but have no effect.
+
+    A warning is logged for each of these options that is given, on the command line or in the
+    configuration file. Their values are not passed to the decorated function.
+
+    Parameters
+    ----------
+    *options : tuple[str, ...]
+        Declarations of each option, ending with its long name, such as ``('-t', '--sleep-time')``.
+
+    Returns
+    -------
+    Callable[[Callable[..., None]], Callable[..., None]]
+        The decorator.
+    """
+    def decorator(func: Callable[..., None]) -> Callable[..., None]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> None:
+            for decls in options:
+                if kwargs.pop(decls[-1].lstrip('-').replace('-', '_')) is not None:
+                    logger.warning('Option %s is deprecated and has no effect.', decls[-1])
+            return func(*args, **kwargs)
+
+        for decls in options:
+            wrapper = click.option(*decls, type=int, default=None, hidden=True)(wrapper)
+        return wrapper
+
+    return decorator
+
+
+def _parse_endpoint_rate_limits(values: Iterable[str]) -> dict[str, float]:
+    ret: dict[str, float] = {}
+    for value in values:
+        endpoint, _, rate = value.partition('=')
+        if endpoint not in ENDPOINTS:
+            msg = f'Unknown endpoint in {value!r}.'
+            raise click.BadParameter(msg, param_hint='--endpoint-rate-limit')
+        try:
+            ret[endpoint] = float(rate)
+        except ValueError as e:
+            msg = f'Invalid rate in {value!r}.'
+            raise click.BadParameter(msg, param_hint='--endpoint-rate-limit') from e
+    return ret
+
+
 def _clean_host(host: str) -> str:
     # Attempt to not break IPv6 addresses
     if '[' not in host and (re.search(r'[0-9]+\:[0-9]+', host) or host == '::1'):
@@ -137,6 +314,37 @@ def complete_ports(_: Any, __: Any, incomplete: str) -> list[str]:
     return [k for k in ('80', '443', '8080') if k.startswith(incomplete)]
 
 
+def complete_hashes(ctx: click.Context, _: Any, incomplete: str) -> list[str]:
+    """
+    Return torrent hashes from the torrent list cache for completion.
+
+    The server is never contacted, so only hashes of hosts listed with ``--cache`` are completed.
+
+    Parameters
+    ----------
+    ctx : click.Context
+        The context. The ``host`` and ``port`` parameters are used to find the host's entry.
+    _ : Any
+        Unused.
+    incomplete : str
+        The incomplete string to match against.
+
+    Returns
+    -------
+    list[str]
+        A list of matching hashes.
+    """
+    if not (host := ctx.params.get('host')):
+        return []
+    try:
+        torrents = TorrentCache().get(TorrentCache.key(host, ctx.params.get('port')),
+                                      ignore_age=True)
+    except sqlite3.Error:  # pragma: no cover
+        logger.debug('Failed to read the torrent list cache.', exc_info=True)
+        return []
+    return [x.hash for x in torrents or () if x.hash.startswith(incomplete)]
+
+
 def command_with_config_file(config_file_param_name: str = 'config',
                              default_section: str | None = None) -> type[click.Command]:
     """
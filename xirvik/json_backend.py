@@ -0,0 +1,102 @@
+"""Pluggable JSON encoding and decoding."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import functools
+import importlib
+import importlib.util
+import json
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+__all__ = ('JSON_BACKENDS', 'JSONBackend', 'get_json_backend')
+
+JSON_BACKENDS = ('orjson', 'msgspec', 'json')
+"""Names of the JSON backends, in the order ``auto`` tries them."""
+
+
+class JSONBackend:
+    """
+    JSON encoder and decoder.
+
+    Parameters
+    ----------
+    name : str
+        Backend name, one of :py:data:`JSON_BACKENDS`.
+    loads : Callable[[bytes | str], Any]
+        Decode a document.
+    dumps : Callable[[Any], str]
+        Encode a value as a compact document.
+    """
+    __slots__ = ('dumps', 'loads', 'name')
+
+    def __init__(self, name: str, loads: Callable[[bytes | str], Any],
+                 dumps: Callable[[Any], str]) -> None:
+        self.name = name
+        """Backend name."""
+        self.loads = loads
+        """Decode a document."""
+        self.dumps = dumps
+        """Encode a value as a compact document."""
+
+    def __repr__(self) -> str:
+        """
+        Represent the backend by name.
+
+        Returns
+        -------
+        str
+            The representation.
+        """
+        return f'{type(self).__name__}({self.name!r})'
+
+
+def _load(name: str) -> JSONBackend:
+    # Imported by name as neither package is a dependency.
+    if name == 'orjson':
+        orjson = importlib.import_module('orjson')
+        return JSONBackend(name, orjson.loads, lambda obj: orjson.dumps(obj).decode())
+    if name == 'msgspec':
+        msgspec_json = importlib.import_module('msgspec.json')
+        encoder = msgspec_json.Encoder()
+        return JSONBackend(name,
+                           msgspec_json.Decoder().decode, lambda obj: encoder.encode(obj).decode())
+    return JSONBackend(name, json.loads,
+                       functools.partial(json.dumps, ensure_ascii=False, separators=(',', ':')))
+
+
+@functools.cache
+def get_json_backend(name: str = 'auto') -> JSONBackend:
+    """
+    Get a JSON backend.
+
+    ``auto`` selects ``orjson`` if it is installed, then ``msgspec``, and otherwise the standard
+    library's :py:mod:`json`. All backends decode UTF-8 ``bytes`` and encode the same documents:
+    compact, with non-ASCII characters left unescaped and enumerations as their values.
+
+    Parameters
+    ----------
+    name : str
+        ``auto`` or a name in :py:data:`JSON_BACKENDS`.
+
+    Returns
+    -------
+    JSONBackend
+        The backend.
+
+    Raises
+    ------
+    ValueError
+        If the name is unknown or the backend's package is not installed.
+    """
+    if name == 'auto':
+        name = next(x for x in JSON_BACKENDS if x == 'json' or importlib.util.find_spec(x))
+    if name not in JSON_BACKENDS:
+        msg = f'Unknown JSON backend: {name}'
+        raise ValueError(msg)
+    try:
+        return _load(name)
+    except ImportError as e:
+        msg = f'JSON backend {name} is not installed.'
+        raise ValueError(msg) from e
@@ -0,0 +1,150 @@
+"""Request metrics."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+import bisect
+import os
+import tempfile
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+__all__ = ('LATENCY_BUCKETS', 'RequestMetrics')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+"""Upper bounds in seconds of the request latency histogram buckets."""
+_COUNTERS = (
+    ('requests_total', 'count', 'Requests sent to ruTorrent.'),
+    ('request_failures_total', 'failures',
+     'Requests that raised, or returned a 5xx status or an XML-RPC fault.'),
+    ('request_retries_total', 'retries', 'Retries made by the HTTP adapter.'),
+    ('request_bytes_sent_total', 'bytes_out', 'Request body bytes sent.'),
+    ('response_bytes_received_total', 'bytes_in', 'Response body bytes received.'),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class _Series:
+    __slots__ = ('buckets', 'bytes_in', 'bytes_out', 'count', 'duration', 'failures', 'retries')
+
+    def __init__(self) -> None:
+        self.count = self.failures = self.retries = self.bytes_in = self.bytes_out = 0
+        self.duration = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+
+class RequestMetrics:
+    """
+    Request counts, latencies, sizes, retries and failures per endpoint and mode.
+
+    The endpoint is one of :py:data:`xirvik.client.ENDPOINTS`. The mode is the ``mode`` field of a
+    ``multirpc`` request (such as ``list``, ``fls`` or ``setlabel``), the method name of an
+    XML-RPC call, or empty for other endpoints.
+
+    Parameters
+    ----------
+    prefix : str
+        Prefix of the metric names.
+    """
+    def __init__(self, prefix: str = 'xirvik') -> None:
+        self.prefix = prefix
+        """Prefix of the metric names."""
+        self._series: dict[tuple[str, str], _Series] = {}
+
+    def record(self,
+               endpoint: str,
+               mode: str,
+               latency: float,
+               *,
+               bytes_out: int = 0,
+               bytes_in: int = 0,
+               retries: int = 0,
+               failed: bool = False) -> None:
+        """
+        Record a completed request.
+
+        Parameters
+        ----------
+        endpoint : str
+            Endpoint name.
+        mode : str
+            Request mode.
+        latency : float
+            Time in seconds from sending the request to receiving the response headers.
+        bytes_out : int
+            Size of the request body.
+        bytes_in : int
+            Size of the response body.
+        retries : int
+            Number of retries made for the request.
+        failed : bool
+            Whether the request failed.
+        """
+        series = self._series.setdefault((endpoint, mode), _Series())
+        series.count += 1
+        series.failures += failed
+        series.retries += retries
+        series.bytes_out += bytes_out
+        series.bytes_in += bytes_in
+        series.duration += latency
+        if (index := bisect.bisect_left(LATENCY_BUCKETS, latency)) < len(LATENCY_BUCKETS):
+            series.buckets[index] += 1
+
+    def _lines(self) -> Iterator[str]:
+        keys = sorted(self._series)
+        labels = {key: f'endpoint="{_escape(key[0])}",mode="{_escape(key[1])}"' for key in keys}
+        for name, attr, help_ in _COUNTERS:
+            yield f'# HELP {self.prefix}_{name} {help_}'
+            yield f'# TYPE {self.prefix}_{name} counter'
+            for key in keys:
+                yield f'{self.prefix}_{name}{{{labels[key]}}} {getattr(self._series[key], attr)}'
+        name = f'{self.prefix}_request_duration_seconds'
+        yield f'# HELP {name} Time from sending a request to receiving the response headers.'
+        yield f'# TYPE {name} histogram'
+        for key in keys:
+            series = self._series[key]
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, series.buckets, strict=True):
+                cumulative += count
+                yield f'{name}_bucket{{{labels[key]},le="{bound}"}} {cumulative}'
+            yield f'{name}_bucket{{{labels[key]},le="+Inf"}} {series.count}'
+            yield f'{name}_sum{{{labels[key]}}} {series.duration}'
+            yield f'{name}_count{{{labels[key]}}} {series.count}'
+
+    def to_prometheus(self) -> str:
+        """
+        Format the metrics in the Prometheus text exposition format.
+
+        Returns
+        -------
+        str
+            The metrics, one sample per line.
+        """
+        return ''.join(f'{line}\n' for line in self._lines())
+
+    def write_textfile(self, path: str | Path) -> None:
+        """
+        Write the metrics to a file for the node_exporter textfile collector.
+
+        The file is written to a temporary file in the same directory and then renamed, so the
+        collector never reads a partial file.
+
+        Parameters
+        ----------
+        path : str | Path
+            File path. It should end in ``.prom``.
+        """
+        path = Path(path)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            Path(tmp).chmod(0o644)
+            Path(tmp).replace(path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
@@ -0,0 +1,206 @@
+"""Request rate and concurrency limiting."""
+from __future__ import annotations
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+import logging
+import time
+
+import anyio
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+__all__ = ('AdaptiveConcurrencyLimiter', 'ConcurrencySlot', 'TokenBucket')
+
+log = logging.getLogger(__name__)
+
+BASELINE_DRIFT = 0.05
+"""Weight of a slower latency sample in the baseline, so a lasting slowdown becomes normal."""
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Tokens are added at ``rate`` per second up to ``burst`` tokens. Each call to
+    :py:meth:`acquire` takes one token, waiting until one is available. Waiters are served in the
+    order they called :py:meth:`acquire`, so a steady stream of callers never exceeds ``rate``
+    after the initial burst.
+
+    Parameters
+    ----------
+    rate : float
+        Tokens added per second.
+    burst : int
+        Maximum number of tokens that can accumulate, which is the number of acquisitions that can
+        happen at once after a quiet period.
+
+    Raises
+    ------
+    ValueError
+        If ``rate`` is not positive or ``burst`` is less than 1.
+    """
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        if rate <= 0:
+            msg = 'Rate must be positive.'
+            raise ValueError(msg)
+        if burst < 1:
+            msg = 'Burst must be at least 1.'
+            raise ValueError(msg)
+        self.rate = rate
+        """Tokens added per second."""
+        self.burst = burst
+        """Maximum number of tokens."""
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = anyio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Take a token, waiting until one is available."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await anyio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class ConcurrencySlot:
+    """
+    A request slot taken from an :py:class:`AdaptiveConcurrencyLimiter`.
+
+    Set :py:attr:`failed` to report an overload signal such as a 5xx response. A slot whose
+    context raises an exception is always counted as failed.
+
+    Parameters
+    ----------
+    epoch : int
+        Number of decreases of the limit when the slot was taken.
+    """
+    def __init__(self, epoch: int) -> None:
+        self.epoch = epoch
+        """Number of decreases of the limit when the slot was taken."""
+        self.failed = False
+        """Whether the request failed in a way that indicates the server is overloaded."""
+        self.started = time.monotonic()
+        """Time the slot was taken, from :py:func:`time.monotonic`."""
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit requests in flight with additive increase, multiplicative decrease (AIMD).
+
+    While the limit is reached and latency stays within ``latency_tolerance`` times the baseline
+    (the lowest recent latency), every completed request raises the limit by ``1 / limit``, which
+    is about one more request in flight per round trip. A failed request multiplies the limit by
+    ``backoff``. Requests that were already in flight when the limit was cut do not cut it again,
+    so a burst of failures from one overload counts once.
+
+    Parameters
+    ----------
+    initial : int
+        Initial limit.
+    minimum : int
+        Lowest limit.
+    maximum : int
+        Highest limit.
+    backoff : float
+        Factor applied to the limit when a request fails.
+    latency_tolerance : float
+        Latency above this multiple of the baseline stops the limit from growing.
+
+    Raises
+    ------
+    ValueError
+        If the limits are not ordered ``1 <= minimum <= initial <= maximum`` or ``backoff`` is not
+        between 0 and 1.
+    """
+    def __init__(self,
+                 initial: int = 4,
+                 minimum: int = 1,
+                 maximum: int = 32,
+                 backoff: float = 0.5,
+                 latency_tolerance: float = 2.0) -> None:
+        if not 1 <= minimum <= initial <= maximum:
+            msg = 'Limits must satisfy 1 <= minimum <= initial <= maximum.'
+            raise ValueError(msg)
+        if not 0 < backoff < 1:
+            msg = 'Backoff must be between 0 and 1.'
+            raise ValueError(msg)
+        self.limit = float(initial)
+        """Current limit. Requests wait while the integer part is reached."""
+        self.minimum = minimum
+        """Lowest limit."""
+        self.maximum = maximum
+        """Highest limit."""
+        self.backoff = backoff
+        """Factor applied to the limit when a request fails."""
+        self.latency_tolerance = latency_tolerance
+        """Multiple of the baseline latency above which the limit stops growing."""
+        self.in_flight = 0
+        """Number of slots currently taken."""
+        self._baseline: float | None = None
+        self._epoch = 0
+        self._waiters: deque[anyio.Event] = deque()
+
+    async def _acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            event = anyio.Event()
+            self._waiters.append(event)
+            try:
+                await event.wait()
+            except BaseException:
+                if event in self._waiters:
+                    self._waiters.remove(event)
+                elif self._waiters and self.in_flight < int(self.limit):
+                    # Pass on the wake-up this waiter will not use.
+                    self._waiters.popleft().set()
+                raise
+        self.in_flight += 1
+
+    def _release(self, slot: ConcurrencySlot) -> None:
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        if slot.failed:
+            if slot.epoch == self._epoch:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self._epoch += 1
+                log.debug('Request failed, concurrency limit decreased to %d.', self.limit)
+        else:
+            latency = time.monotonic() - slot.started
+            if self._baseline is None or latency < self._baseline:
+                self._baseline = latency
+            else:
+                self._baseline += (latency - self._baseline) * BASELINE_DRIFT
+            # Only grow when the limit is what holds requests back.
+            if saturated and latency <= self._baseline * self.latency_tolerance:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        for _ in range(min(len(self._waiters), int(self.limit) - self.in_flight)):
+            self._waiters.popleft().set()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[ConcurrencySlot]:
+        """
+        Take a slot for one request, waiting until one is free.
+
+        Yields
+        ------
+        ConcurrencySlot
+            The slot. It is released when the context exits.
+        """
+        await self._acquire()
+        slot = ConcurrencySlot(self._epoch)
+        try:
+            yield slot
+        except Exception:
+            slot.failed = True
+            raise
+        finally:
+            self._release(slot)
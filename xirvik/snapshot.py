@@ -0,0 +1,342 @@
+"""Columnar torrent state."""
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timezone
+from itertools import compress, groupby, repeat
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any
+import functools
+import inspect
+import operator
+
+from .typing import FIRST_YEAR_XIRVIK, TorrentInfo, torrent_row_decoders
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
+__all__ = ('TorrentSnapshot',)
+
+_TYPE_CODES = {
+    'bool': 'B',
+    'datetime | None': 'd',
+    'float': 'd',
+    'HashingState': 'B',
+    'int': 'q',
+    'State': 'B'
+}
+_FIELD_TYPES = {
+    k: v if isinstance(v, str) else v.__forward_arg__
+    for k, v in inspect.get_annotations(TorrentInfo).items()
+}
+_DATETIME_FIELDS = frozenset(k for k, v in _FIELD_TYPES.items() if v == 'datetime | None')
+_STRING_FIELDS = frozenset(k for k, v in _FIELD_TYPES.items() if v not in _TYPE_CODES) - {'hash'}
+_FIRST_TIMESTAMP = datetime(FIRST_YEAR_XIRVIK, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+@functools.lru_cache
+def _row_layout(width: int) -> tuple[tuple[str, int], ...]:
+    return tuple(
+        (k, i)
+        for k, (i, _) in zip(TorrentInfo._fields[1:], torrent_row_decoders(width), strict=False))
+
+
+def _timestamps(values: Iterable[str]) -> list[float]:
+    # Dates before xirvik.com existed are decoded as None, stored as 0.
+    return [x if (x := float(v or '0')) >= _FIRST_TIMESTAMP else 0.0 for v in values]
+
+
+class TorrentSnapshot:
+    """
+    Columnar, array-backed state of many torrents.
+
+    Numeric fields of :py:class:`~xirvik.typing.TorrentInfo` are stored in :py:class:`array.array`
+    columns. Date fields are stored as epoch seconds (``0`` meaning ``None``). String fields are
+    stored as indices into a table of unique strings that is shared with snapshots derived by
+    :py:meth:`filter`. Hashes are kept in a plain list.
+
+    Rows of a ``mode=list`` response are decoded into the columns by :py:meth:`extend_rows`.
+    ``TorrentInfo`` objects are only created on demand when indexing or iterating the snapshot.
+
+    Example use:
+
+    .. code-block:: python
+
+       snapshot = await client.list_torrents_snapshot()
+       done = snapshot.filter(
+           map(operator.and_, snapshot.compare('left_bytes', operator.eq, 0),
+               snapshot.compare('custom1', operator.eq, 'movies')))
+       for info in done:
+           ...
+    """
+    __slots__ = ('_columns', '_hash_indices', '_hashes', '_string_ids', '_strings')
+
+    def __init__(self, torrents: Iterable[TorrentInfo] = ()) -> None:
+        self._hashes: list[str] = []
+        self._hash_indices: dict[str, int] | None = None
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        self._columns: dict[str, array[Any]] = {
+            k: array('L' if k in _STRING_FIELDS else _TYPE_CODES[v])
+            for k, v in _FIELD_TYPES.items() if k != 'hash'
+        }
+        for info in torrents:
+            self.append(info)
+
+    def _intern(self, value: str) -> int:
+        if (ret := self._string_ids.get(value)) is None:
+            ret = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return ret
+
+    def _intern_all(self, values: list[str]) -> Iterator[int]:
+        ids = self._string_ids
+        for value in dict.fromkeys(values):
+            if value not in ids:
+                ids[value] = len(self._strings)
+                self._strings.append(value)
+        return map(ids.__getitem__, values)
+
+    def _decode_column(self, key: str, values: Iterable[str]) -> array[Any]:
+        typecode = self._columns[key].typecode
+        if key in _STRING_FIELDS:
+            return array(typecode, self._intern_all(list(map(str.strip, values))))
+        if key in _DATETIME_FIELDS:
+            return array(typecode, _timestamps(values))
+        return array(typecode, map(float if typecode == 'd' else int, values))
+
+    def extend_rows(self, rows: Iterable[tuple[str, Sequence[str]]]) -> None:
+        """
+        Add torrents from the rows of a ``mode=list`` response.
+
+        Values are converted a column at a time straight into the arrays, without creating
+        ``TorrentInfo`` objects.
+
+        Parameters
+        ----------
+        rows : Iterable[tuple[str, Sequence[str]]]
+            Pairs of torrent hash and row, such as the items of the ``t`` member of the response.
+
+        Raises
+        ------
+        ValueError
+            If a row does not have a column for every field or a value cannot be converted.
+        """
+        for width, group in groupby(rows, key=lambda x: len(x[1])):
+            layout = _row_layout(width)
+            if len(layout) != len(self._columns):
+                msg = f'Rows of {width} columns do not have every field'
+                raise ValueError(msg)
+            items = list(group)
+            values = list(map(itemgetter(1), items))
+            # Decode every column before changing any, so that a bad value cannot leave columns
+            # of different lengths.
+            decoded = [(self._columns[key], self._decode_column(key, map(itemgetter(i), values)))
+                       for key, i in layout]
+            self._hashes.extend(map(itemgetter(0), items))
+            self._hash_indices = None
+            for column, new in decoded:
+                column.extend(new)
+
+    def append(self, info: TorrentInfo) -> None:
+        """
+        Add a torrent to the snapshot.
+
+        Parameters
+        ----------
+        info : TorrentInfo
+            Torrent to add.
+        """
+        self._hashes.append(info.hash)
+        self._hash_indices = None
+        for key, column in self._columns.items():
+            value = getattr(info, key)
+            if key in _STRING_FIELDS:
+                column.append(self._intern(value))
+            elif key in _DATETIME_FIELDS:
+                column.append(value.timestamp() if value else 0)
+            else:
+                column.append(value)
+
+    def __len__(self) -> int:
+        """
+        Get the number of torrents.
+
+        Returns
+        -------
+        int
+            Number of torrents in the snapshot.
+        """
+        return len(self._hashes)
+
+    def __getitem__(self, index: int) -> TorrentInfo:
+        """
+        Build a row view for the torrent at ``index``.
+
+        Parameters
+        ----------
+        index : int
+            Row index.
+
+        Returns
+        -------
+        TorrentInfo
+            The torrent at the index.
+        """
+        values: list[Any] = [self._hashes[index]]
+        for key, column in self._columns.items():
+            value = column[index]
+            if key in _STRING_FIELDS:
+                value = self._strings[value]
+            elif key in _DATETIME_FIELDS:
+                value = datetime.fromtimestamp(value, timezone.utc) if value else None
+            elif column.typecode == 'B' and _FIELD_TYPES[key] == 'bool':
+                value = bool(value)
+            values.append(value)
+        return TorrentInfo._make(values)
+
+    def __iter__(self) -> Iterator[TorrentInfo]:
+        """
+        Iterate row views of all torrents.
+
+        Yields
+        ------
+        TorrentInfo
+            Each torrent in the snapshot.
+        """
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def hashes(self) -> Sequence[str]:
+        """Hashes of all torrents, in row order."""
+        return self._hashes
+
+    def index(self, hash_: str) -> int:
+        r"""
+        Get the row index of a torrent by hash.
+
+        A :py:class:`KeyError` is raised if the hash is not in the snapshot.
+
+        Parameters
+        ----------
+        hash\_ : str
+            Hash of the torrent.
+
+        Returns
+        -------
+        int
+            Row index.
+        """
+        if self._hash_indices is None:
+            self._hash_indices = {h: i for i, h in enumerate(self._hashes)}
+        return self._hash_indices[hash_]
+
+    def column(self, field: str) -> Sequence[Any]:
+        """
+        Get the values of a single field for all torrents.
+
+        Numeric fields are returned as the backing array without copying. Date fields are returned
+        as epoch seconds, with ``0`` meaning ``None``.
+
+        Parameters
+        ----------
+        field : str
+            Name of a :py:class:`~xirvik.typing.TorrentInfo` field.
+
+        Returns
+        -------
+        Sequence[Any]
+            Values in row order.
+        """
+        if field == 'hash':
+            return self._hashes
+        column = self._columns[field]
+        if field in _STRING_FIELDS:
+            return [self._strings[x] for x in column]
+        return column
+
+    def mask(self, field: str, predicate: Callable[[Any], bool]) -> list[bool]:
+        """
+        Evaluate ``predicate`` against every value of a field.
+
+        The result can be combined with other masks and passed to :py:meth:`filter`. For string
+        fields, ``predicate`` is called once per unique value. Use :py:meth:`compare` for
+        comparisons, which do not call Python code for each row.
+
+        Parameters
+        ----------
+        field : str
+            Name of a :py:class:`~xirvik.typing.TorrentInfo` field. Values are passed as returned by
+            :py:meth:`column`.
+        predicate : Callable[[Any], bool]
+            Function to evaluate.
+
+        Returns
+        -------
+        list[bool]
+            One boolean per row.
+        """
+        if field in _STRING_FIELDS:
+            column = self._columns[field]
+            strings = self._strings
+            results = {x: predicate(strings[x]) for x in dict.fromkeys(column)}
+            return list(map(results.__getitem__, column))
+        return list(map(predicate, self.column(field)))
+
+    def compare(self, field: str, op: Callable[[Any, Any], bool], value: Any) -> list[bool]:
+        """
+        Compare every value of a field with ``value``.
+
+        With a function of the :py:mod:`operator` module such as :py:func:`operator.eq` or
+        :py:func:`operator.ge`, numeric fields are compared by iterating the backing array in C.
+        String fields are compared by index for :py:func:`operator.eq` and :py:func:`operator.ne`
+        and once per unique value otherwise. Dates are compared as epoch seconds, with ``None``
+        as ``0``.
+
+        Parameters
+        ----------
+        field : str
+            Name of a :py:class:`~xirvik.typing.TorrentInfo` field.
+        op : Callable[[Any, Any], bool]
+            Comparison, called with a value of the field and ``value``.
+        value : Any
+            Value to compare with.
+
+        Returns
+        -------
+        list[bool]
+            One boolean per row.
+        """
+        if field in _STRING_FIELDS:
+            if op in {operator.eq, operator.ne}:
+                return list(map(op, self._columns[field], repeat(self._string_ids.get(value, -1))))
+            return self.mask(field, lambda x: op(x, value))
+        if field in _DATETIME_FIELDS:
+            value = value.timestamp() if value else 0
+        return list(map(op, self.column(field), repeat(value)))
+
+    def filter(self, mask: Iterable[bool]) -> TorrentSnapshot:
+        """
+        Create a new snapshot containing only the rows where ``mask`` is true.
+
+        Parameters
+        ----------
+        mask : Iterable[bool]
+            One boolean per row.
+
+        Returns
+        -------
+        TorrentSnapshot
+            The filtered snapshot.
+        """
+        selectors = list(mask)
+        ret = TorrentSnapshot()
+        ret._strings = self._strings
+        ret._string_ids = self._string_ids
+        ret._hashes = list(compress(self._hashes, selectors))
+        ret._columns = {
+            k: array(v.typecode, compress(v, selectors))
+            for k, v in self._columns.items()
+        }
+        return ret
@@ -0,0 +1,289 @@
+"""Tracing of client operations and command phases."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Protocol
+import json
+import secrets
+import threading
+import time
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+    from contextlib import AbstractContextManager
+
+__all__ = ('JSONLinesTracer', 'OpenTelemetryTracer', 'Span', 'Tracer')
+
+
+class Span(Protocol):
+    """
+    Span of an operation.
+
+    This is the subset of the OpenTelemetry ``Span`` interface used by the client, so OpenTelemetry
+    spans can be used as is.
+    """
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set an attribute.
+
+        Parameters
+        ----------
+        key : str
+            Attribute name.
+        value : Any
+            Attribute value. A string, a number or a boolean.
+        """
+
+    def record_exception(self, exception: BaseException) -> None:
+        """
+        Record an exception raised during the operation.
+
+        Parameters
+        ----------
+        exception : BaseException
+            The exception.
+        """
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+
+class _NoopContext:
+    def __enter__(self) -> Span:
+        return _NOOP_SPAN
+
+    def __exit__(self, *args: object) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT = _NoopContext()
+_current_span: ContextVar[Any] = ContextVar('xirvik_current_span', default=None)
+
+
+class Tracer:
+    """
+    Tracer that records nothing.
+
+    This is the default tracer of the client. Its spans are shared no-op objects and
+    :py:attr:`enabled` is ``False``, so callers can skip computing attributes.
+    """
+    enabled = False
+    """Whether spans are recorded."""
+    def span(  # ruff:ignore[no-self-use]
+        self,
+        name: str,  # ruff:ignore[unused-method-argument]
+        attributes: Mapping[str, Any] | None = None,  # ruff:ignore[unused-method-argument]
+        *,
+        current: bool = True  # ruff:ignore[unused-method-argument]
+    ) -> AbstractContextManager[Span]:
+        """
+        Start a span that ends when the returned context manager exits.
+
+        An exception leaving the context is recorded on the span and marks it as failed.
+
+        Parameters
+        ----------
+        name : str
+            Span name.
+        attributes : Mapping[str, Any] | None
+            Initial attributes.
+        current : bool
+            Make the span the parent of spans started in the context. Spans that stay open across
+            the yields of a generator must not be made current, as the context they would change is
+            the consumer's.
+
+        Returns
+        -------
+        AbstractContextManager[Span]
+            Context manager that yields the span.
+        """
+        return _NOOP_CONTEXT
+
+    def current_span(self) -> Span:  # ruff:ignore[no-self-use]
+        """
+        Get the innermost current span.
+
+        Returns
+        -------
+        Span
+            The span, or a span that records nothing if there is none.
+        """
+        return _current_span.get() or _NOOP_SPAN
+
+    def close(self) -> None:
+        """Release resources held by the tracer."""
+
+
+class _RecordedSpan:
+    __slots__ = ('attributes', 'error', 'name', 'parent_span_id', 'span_id', 'start', 'trace_id')
+
+    def __init__(self, name: str, attributes: Mapping[str, Any] | None,
+                 parent: _RecordedSpan | None) -> None:
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.trace_id: str = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id: str = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.error: str | None = None
+        self.start = time.time_ns()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.error = f'{type(exception).__name__}: {exception}'
+
+
+class JSONLinesTracer(Tracer):
+    """
+    Tracer that appends each finished span to a file as one line of JSON.
+
+    Each line has the keys ``name``, ``trace_id``, ``span_id``, ``parent_span_id``,
+    ``start_time_unix_nano``, ``end_time_unix_nano``, ``duration_ms``, ``status`` (``OK`` or
+    ``ERROR``), ``error`` and ``attributes``, named after the OpenTelemetry data model. A span is
+    written when it ends, so children come before their parent.
+
+    Parameters
+    ----------
+    path : str | Path
+        File path. The file is created if it does not exist.
+    """
+    enabled = True
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        """File path."""
+        self._file = self.path.open('a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self,
+             name: str,
+             attributes: Mapping[str, Any] | None = None,
+             *,
+             current: bool = True) -> Iterator[Span]:
+        """
+        Start a span that ends when the context exits.
+
+        Parameters
+        ----------
+        name : str
+            Span name.
+        attributes : Mapping[str, Any] | None
+            Initial attributes.
+        current : bool
+            Make the span the parent of spans started in the context.
+
+        Yields
+        ------
+        Span
+            The span.
+        """
+        parent = _current_span.get()
+        span = _RecordedSpan(name, attributes,
+                             parent if isinstance(parent, _RecordedSpan) else None)
+        token = _current_span.set(span) if current else None
+        try:
+            yield span
+        except BaseException as e:
+            # An abandoned generator is not a failure.
+            if not isinstance(e, GeneratorExit):
+                span.record_exception(e)
+            raise
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+            self._write(span, time.time_ns())
+
+    def _write(self, span: _RecordedSpan, end: int) -> None:
+        line = json.dumps(
+            {
+                'name': span.name,
+                'trace_id': span.trace_id,
+                'span_id': span.span_id,
+                'parent_span_id': span.parent_span_id,
+                'start_time_unix_nano': span.start,
+                'end_time_unix_nano': end,
+                'duration_ms': (end - span.start) / 1e6,
+                'status': 'ERROR' if span.error else 'OK',
+                'error': span.error,
+                'attributes': span.attributes
+            },
+            default=str)
+        with self._lock:
+            self._file.write(f'{line}\n')
+            # Keep the spans of a run that is killed.
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer that records spans with an OpenTelemetry tracer.
+
+    The ``opentelemetry-api`` package is not a dependency of this package. Pass a tracer from
+    ``opentelemetry.trace.get_tracer()``.
+
+    Parameters
+    ----------
+    tracer : Any
+        OpenTelemetry tracer.
+    """
+    enabled = True
+
+    def __init__(self, tracer: Any) -> None:
+        self.tracer = tracer
+        """OpenTelemetry tracer."""
+
+    @contextmanager
+    def span(self,
+             name: str,
+             attributes: Mapping[str, Any] | None = None,
+             *,
+             current: bool = True) -> Iterator[Span]:
+        """
+        Start a span that ends when the context exits.
+
+        Parameters
+        ----------
+        name : str
+            Span name.
+        attributes : Mapping[str, Any] | None
+            Initial attributes.
+        current : bool
+            Make the span the parent of spans started in the context.
+
+        Yields
+        ------
+        Span
+            The OpenTelemetry span.
+        """
+        if current:
+            # The OpenTelemetry context manager records exceptions and sets the status itself.
+            with self.tracer.start_as_current_span(name, attributes=attributes) as span:
+                token = _current_span.set(span)
+                try:
+                    yield span
+                finally:
+                    _current_span.reset(token)
+            return
+        span = self.tracer.start_span(name, attributes=attributes)
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                span.record_exception(e)
+            raise
+        finally:
+            span.end()
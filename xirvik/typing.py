@@ -1,14 +1,25 @@
 """Typing helpers."""
 from __future__ import annotations
 
-from enum import IntEnum
-from typing import TYPE_CHECKING, NamedTuple
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from enum import Enum, IntEnum
+from typing import TYPE_CHECKING, Any, ClassVar, NamedTuple, overload
+import functools
+import inspect
+import itertools
+import struct
+import sys
 
 if TYPE_CHECKING:
-    from datetime import datetime
+    from collections.abc import Callable, Iterable, Iterator
 
-__all__ = ('FileDownloadStrategy', 'FilePriority', 'HashingState', 'State', 'TorrentInfo',
-           'TorrentTrackedFile')
+    from typing_extensions import Self
+
+__all__ = ('FIRST_YEAR_XIRVIK', 'UNKNOWN_TORRENT_COLUMN', 'CompactTorrentInfo',
+           'CompactTorrentTrackedFile', 'FileDownloadStrategy', 'FilePriority', 'HashingState',
+           'LazyTorrentInfo', 'State', 'TorrentEvent', 'TorrentEventType', 'TorrentInfo',
+           'TorrentTrackedFile', 'field_converter', 'torrent_row_decoders')
 
 
 class HashingState(IntEnum):
@@ -103,3 +114,482 @@ class TorrentTrackedFile(NamedTuple):
     """Download priority."""
     download_strategy_id: FileDownloadStrategy
     """Download strategy."""
+
+
+def _from_timestamp(value: float) -> datetime | None:
+    return datetime.fromtimestamp(value, timezone.utc) if value else None
+
+
+def _to_timestamp(value: datetime | None) -> float:
+    return value.timestamp() if value else 0
+
+
+# Struct format, conversion when packing and conversion when unpacking of each non-string type.
+_PACKED_TYPES: dict[str, tuple[str, Callable[[Any], Any] | None, Callable[[Any], Any] | None]] = {
+    'bool': ('?', None, None),
+    'datetime | None': ('d', _to_timestamp, _from_timestamp),
+    'FileDownloadStrategy': ('B', None, FileDownloadStrategy),
+    'FilePriority': ('B', None, FilePriority),
+    'float': ('d', None, None),
+    'HashingState': ('B', None, None),
+    'int': ('q', None, None),
+    'State': ('B', None, None)
+}
+
+
+def _field_types(record: type[tuple[Any, ...]]) -> dict[str, str]:
+    return {
+        k: v if isinstance(v, str) else v.__forward_arg__
+        for k, v in inspect.get_annotations(record).items()
+    }
+
+
+def _string_fields(record: type[tuple[Any, ...]]) -> tuple[str, ...]:
+    return tuple(k for k, v in _field_types(record).items() if v == 'str')
+
+
+@functools.total_ordering
+class _TupleRecord(Sequence[Any]):
+    """
+    Base of records that can be used in place of a named tuple.
+
+    Fields are read-only attributes named by ``_fields``. Records can be indexed, sliced, iterated,
+    compared, hashed, copied and pickled like the named tuple and have its ``_make``, ``_asdict``
+    and ``_replace`` methods. They are :py:class:`~collections.abc.Sequence` instances but not
+    :py:class:`tuple` instances, since a subclass of ``tuple`` cannot have slots for its fields.
+    """
+    __slots__ = ()
+    _fields: ClassVar[tuple[str, ...]]
+    _field_defaults: ClassVar[dict[str, Any]] = {}
+
+    @classmethod
+    def _make(cls, iterable: Iterable[Any]) -> Self:
+        return cls(*iterable)
+
+    def _asdict(self) -> dict[str, Any]:
+        return {k: getattr(self, k) for k in self._fields}
+
+    def _replace(self, **kwargs: Any) -> Self:
+        result = self._make(
+            list(itertools.starmap(kwargs.pop, zip(self._fields, self, strict=True))))
+        if kwargs:
+            msg = f'Got unexpected field names: {list(kwargs)!r}'
+            raise ValueError(msg)
+        return result
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """
+        Prevent fields from being set.
+
+        Parameters
+        ----------
+        name : str
+            Attribute name.
+        value : Any
+            Value.
+
+        Raises
+        ------
+        AttributeError
+            Always.
+        """
+        msg = f"'{type(self).__name__}' object attribute '{name}' is read-only"
+        raise AttributeError(msg)
+
+    def __delattr__(self, name: str) -> None:
+        """
+        Prevent fields from being deleted.
+
+        Parameters
+        ----------
+        name : str
+            Attribute name.
+
+        Raises
+        ------
+        AttributeError
+            Always.
+        """
+        msg = f"'{type(self).__name__}' object attribute '{name}' is read-only"
+        raise AttributeError(msg)
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Iterate the field values in the order of the named tuple.
+
+        Returns
+        -------
+        Iterator[Any]
+            The values.
+        """
+        return (getattr(self, k) for k in self._fields)
+
+    def __len__(self) -> int:
+        """
+        Get the number of fields.
+
+        Returns
+        -------
+        int
+            Number of fields.
+        """
+        return len(self._fields)
+
+    @overload
+    def __getitem__(self, index: int) -> Any:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> tuple[Any, ...]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        """
+        Get a field by position, or a tuple of the fields in a slice.
+
+        Parameters
+        ----------
+        index : int | slice
+            Field index or slice of field indices.
+
+        Returns
+        -------
+        Any
+            The field value, or a tuple of the values for a slice.
+        """
+        if isinstance(index, slice):
+            return tuple(getattr(self, k) for k in self._fields[index])
+        return getattr(self, self._fields[index])
+
+    def __eq__(self, other: object) -> bool:
+        """
+        Compare the field values with another record or tuple.
+
+        Parameters
+        ----------
+        other : object
+            Other object.
+
+        Returns
+        -------
+        bool
+            Whether the values are equal.
+        """
+        if isinstance(other, (_TupleRecord, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __lt__(self, other: object) -> bool:
+        """
+        Order the field values with another record or tuple.
+
+        Parameters
+        ----------
+        other : object
+            Other object.
+
+        Returns
+        -------
+        bool
+            Whether the values sort before the other values.
+        """
+        if isinstance(other, (_TupleRecord, tuple)):
+            return tuple(self) < tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """
+        Hash the field values.
+
+        Returns
+        -------
+        int
+            Hash of the field values as a tuple.
+        """
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        """
+        Represent the record like a named tuple.
+
+        Returns
+        -------
+        str
+            The representation.
+        """
+        values = ', '.join(f'{k}={getattr(self, k)!r}' for k in self._fields)
+        return f'{type(self).__name__}({values})'
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        """
+        Pickle and copy the record by its field values.
+
+        Returns
+        -------
+        tuple[Any, ...]
+            ``_make`` and the field values.
+        """
+        return type(self)._make, (tuple(self),)
+
+
+class _Packed:
+    """Read-only field stored in the packed bytes of a compact record."""
+    __slots__ = ('convert', 'offset', 'struct')
+
+    def __init__(self, struct_: struct.Struct, offset: int,
+                 convert: Callable[[Any], Any] | None) -> None:
+        self.struct = struct_
+        self.offset = offset
+        self.convert = convert
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+        data = instance._data  # ruff:ignore[private-member-access]
+        value = self.struct.unpack_from(data, self.offset)[0]
+        return value if self.convert is None else self.convert(value)
+
+
+class _CompactRecord(_TupleRecord):
+    """
+    Base of records that store the numeric fields of a named tuple packed in one ``bytes`` object.
+
+    String fields are kept in slots. Subclasses declare the slots and pass the named tuple they
+    replace as the ``record`` class argument. Strings of the fields in ``interned`` are interned
+    with :py:func:`sys.intern` as they usually repeat across records.
+    """
+    __slots__ = ('_data',)
+    _struct: ClassVar[struct.Struct]
+    _strings: ClassVar[tuple[tuple[str, int, bool], ...]]
+    _packers: ClassVar[tuple[tuple[int, Callable[[Any], Any] | None], ...]]
+    if TYPE_CHECKING:
+        # Packed fields are descriptors set by __init_subclass__.
+        def __getattr__(self, name: str) -> Any:
+            ...
+
+    def __init_subclass__(cls,
+                          record: type[tuple[Any, ...]],
+                          interned: Iterable[str] = (),
+                          **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        annotations = _field_types(record)
+        interned = frozenset(interned)
+        cls._fields = tuple(annotations)
+        cls._strings = tuple(
+            (k, i, k in interned) for i, k in enumerate(annotations) if annotations[k] == 'str')
+        packed = [(i, k, _PACKED_TYPES[v]) for i, (k, v) in enumerate(annotations.items())
+                  if v != 'str']
+        cls._struct = struct.Struct('<' + ''.join(code for _, _, (code, _, _) in packed))
+        cls._packers = tuple((i, pack) for i, _, (_, pack, _) in packed)
+        offset = 0
+        for _, k, (code, _, unpack) in packed:
+            setattr(cls, k, _Packed(struct.Struct(f'<{code}'), offset, unpack))
+            offset += struct.calcsize(f'<{code}')
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        if len(args) + len(kwargs) != len(self._fields):
+            msg = f'Expected {len(self._fields)} fields, got {len(args) + len(kwargs)}.'
+            raise TypeError(msg)
+        values = args + tuple(kwargs[k] for k in self._fields[len(args):])
+        for k, i, intern in self._strings:
+            object.__setattr__(self, k, sys.intern(values[i]) if intern else values[i])
+        object.__setattr__(
+            self, '_data',
+            self._struct.pack(*(values[i] if pack is None else pack(values[i])
+                                for i, pack in self._packers)))
+
+
+class CompactTorrentInfo(_CompactRecord,
+                         record=TorrentInfo,
+                         interned=('custom1', 'custom2', 'message')):
+    """
+    Torrent information with the attributes of :py:class:`TorrentInfo` in less memory.
+
+    Numbers, flags and dates (as epoch seconds) are packed in one ``bytes`` object and converted
+    back when read. Labels and messages are interned. Records are read-only and can be used like
+    ``TorrentInfo``.
+    """
+    __slots__ = _string_fields(TorrentInfo)
+
+
+class CompactTorrentTrackedFile(_CompactRecord, record=TorrentTrackedFile):
+    """
+    File information with the attributes of :py:class:`TorrentTrackedFile` in less memory.
+
+    Numbers are packed in one ``bytes`` object and converted back when read. Records are read-only
+    and can be used like ``TorrentTrackedFile``.
+    """
+    __slots__ = ('name',)
+
+
+FIRST_YEAR_XIRVIK = 2009
+"""First year xirvik.com existed. Earlier dates in a ``mode=list`` row are decoded as ``None``."""
+UNKNOWN_TORRENT_COLUMN = 34
+"""Index of the column in a ``mode=list`` row that has no corresponding ``TorrentInfo`` field."""
+
+
+def _to_datetime(val: str) -> datetime | None:
+    try:
+        ret = datetime.fromtimestamp(float(val or '0'), timezone.utc)
+    except ValueError:  # pragma no cover
+        return None
+    return None if ret.year < FIRST_YEAR_XIRVIK else ret
+
+
+def _to_bool(val: str) -> bool:
+    return bool(int(val))
+
+
+_CONVERTERS: dict[str, Callable[[str], Any]] = {
+    'datetime | None': _to_datetime,
+    'int': int,
+    'float': float,
+    'bool': _to_bool,
+    'HashingState': int,
+    'State': int
+}
+
+
+@functools.lru_cache
+def torrent_row_decoders(width: int) -> tuple[tuple[int, Callable[[str], Any]], ...]:
+    """
+    Build the column decoder table for a ``mode=list`` row of the given width.
+
+    The table is built once per row layout and maps each column index to the callable that
+    converts it, so rows can be decoded without introspecting ``TorrentInfo``. Converters accept
+    the raw server value: numeric converters tolerate surrounding whitespace and strings are
+    stripped.
+
+    Parameters
+    ----------
+    width : int
+        Number of columns in the row.
+
+    Returns
+    -------
+    tuple[tuple[int, Callable[[str], Any]], ...]
+        Pairs of column index and converter, in ``TorrentInfo`` field order (without the hash).
+    """
+    annotations = list(inspect.get_annotations(TorrentInfo).values())[1:]
+    indices = [i for i in range(width) if width <= len(annotations) or i != UNKNOWN_TORRENT_COLUMN]
+    return tuple((i, field_converter(t)) for i, t in zip(indices, annotations, strict=False))
+
+
+def field_converter(annotation: Any) -> Callable[[str], Any]:
+    """
+    Get the callable that converts a raw ``mode=list`` value to a field's type.
+
+    Parameters
+    ----------
+    annotation : Any
+        Annotation of a :py:class:`TorrentInfo` field.
+
+    Returns
+    -------
+    Callable[[str], Any]
+        The converter. Values of string fields are stripped.
+    """
+    return _CONVERTERS.get(
+        annotation if isinstance(annotation, str) else annotation.__forward_arg__, str.strip)
+
+
+@functools.lru_cache
+def _lazy_torrent_decoders(width: int) -> dict[str, tuple[int, Callable[[str], Any]]]:
+    return dict(zip(TorrentInfo._fields[1:], torrent_row_decoders(width), strict=False))
+
+
+class LazyTorrentInfo(_TupleRecord):
+    """
+    Torrent information that is decoded from the server's row when accessed.
+
+    This has the attributes of :py:class:`TorrentInfo` and can be used like it. The raw
+    ``mode=list`` row is kept and a field is converted the first time it is read, after which the
+    value is stored in a slot of the same name. Since conversion is deferred, a malformed column
+    raises when its field is read rather than when the torrent is listed.
+
+    Parameters
+    ----------
+    hash_ : str
+        Torrent hash.
+    row : list[str]
+        Row of the torrent in a ``mode=list`` response.
+    """
+    __slots__ = ('_row', *TorrentInfo._fields)
+    _fields = TorrentInfo._fields
+
+    def __init__(self, hash_: str, row: list[str]) -> None:
+        object.__setattr__(self, 'hash', hash_)
+        object.__setattr__(self, '_row', row)
+
+    @classmethod
+    def _make(cls, iterable: Iterable[Any]) -> Self:
+        values = tuple(iterable)
+        if len(values) != len(cls._fields):
+            msg = f'Expected {len(cls._fields)} arguments, got {len(values)}'
+            raise TypeError(msg)
+        # Every field is set, so there is nothing left to decode.
+        self = cls.__new__(cls)
+        for k, v in zip(('_row', *cls._fields), ([], *values), strict=True):
+            object.__setattr__(self, k, v)  # ruff:ignore[unnecessary-dunder-call]
+        return self
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Convert a field that has not been read yet.
+
+        Parameters
+        ----------
+        name : str
+            Field name.
+
+        Returns
+        -------
+        Any
+            The converted value.
+
+        Raises
+        ------
+        AttributeError
+            If ``name`` is not a field of the row.
+        """
+        # Only called when the slot is empty. An empty _row slot must not recurse.
+        if name == '_row' or (decoder := _lazy_torrent_decoders(len(self._row)).get(name)) is None:
+            msg = f"'{type(self).__name__}' object has no attribute '{name}'"
+            raise AttributeError(msg)
+        index, conv = decoder
+        value = conv(self._row[index])
+        object.__setattr__(self, name, value)
+        return value
+
+    def to_torrent_info(self) -> TorrentInfo:
+        """
+        Convert every field.
+
+        Returns
+        -------
+        TorrentInfo
+            The record with all fields decoded.
+        """
+        return TorrentInfo._make(self)
+
+
+class TorrentEventType(str, Enum):
+    """Type of change to a torrent."""
+    ADDED = 'added'
+    REMOVED = 'removed'
+    COMPLETED = 'completed'
+    """The torrent finished downloading."""
+    LABEL_CHANGED = 'label_changed'
+    STATE_CHANGED = 'state_changed'
+    """The torrent was started, stopped or paused."""
+    MESSAGE_CHANGED = 'message_changed'
+
+
+class TorrentEvent(NamedTuple):
+    """Change to a torrent."""
+    type: TorrentEventType
+    hash: str
+    info: TorrentInfo | None
+    """Torrent information after the change. ``None`` if the torrent was removed."""
+    previous: TorrentInfo | None
+    """Torrent information before the change. ``None`` if the torrent was added."""
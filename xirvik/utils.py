@@ -1,12 +1,16 @@
 """Utility functions."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
+import codecs
+import json
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import AsyncIterable, AsyncIterator, Iterator
 
-__all__ = ('parse_header',)
+__all__ = ('iter_json_object_members', 'parse_header')
+
+_JSON_WHITESPACE = ' \t\n\r'
 
 
 def _parseparam(param: str) -> Iterator[str]:
@@ -50,3 +54,119 @@ def parse_header(line: str) -> tuple[str, dict[str, str]]:
                 value = value[1:-1].replace('\\\\', '\\').replace('\\"', '"')
             pdict[name] = value
     return key, pdict
+
+
+class _JSONStreamReader:
+    def __init__(self, chunks: AsyncIterable[bytes]) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._chunks = aiter(chunks)
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    async def _read_more(self) -> bool:
+        if self._eof:
+            return False
+        try:
+            chunk = await anext(self._chunks)
+        except StopAsyncIteration:
+            self._eof = True
+            self._buf += self._text_decoder.decode(b'', final=True)
+            return False
+        self._buf += self._text_decoder.decode(chunk)
+        return True
+
+    async def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _JSON_WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not await self._read_more():
+                msg = 'Unexpected end of JSON document.'
+                raise ValueError(msg)
+
+    async def expect(self, char: str) -> None:
+        if (found := await self.peek()) != char:
+            msg = f'Expected {char!r} at offset {self._pos} but found {found!r}.'
+            raise ValueError(msg)
+        self._pos += 1
+
+    async def skip_if(self, char: str) -> None:
+        if await self.peek() == char:
+            self._pos += 1
+
+    async def decode_value(self) -> Any:
+        await self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if await self._read_more():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(self._buf) and await self._read_more():
+                continue
+            self._pos = end
+            return value
+
+    def discard_consumed(self) -> None:
+        self._buf = self._buf[self._pos:]
+        self._pos = 0
+
+
+async def iter_json_object_members(chunks: AsyncIterable[bytes],
+                                   key: str) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Incrementally parse the members of an object nested in a top-level JSON object.
+
+    Only the object at ``key`` is decoded member by member. Each member is yielded as soon as its
+    value is complete, so the whole document never has to be held in memory. Other top-level
+    members before ``key`` are decoded and discarded. Parsing stops at the end of the object at
+    ``key``; the rest of the document is not read.
+
+    A :py:class:`ValueError` is also raised if the document is malformed or if the value at ``key``
+    is not an object.
+
+    Parameters
+    ----------
+    chunks : AsyncIterable[bytes]
+        UTF-8 encoded document, in chunks of any size.
+    key : str
+        Top-level key of the object to parse.
+
+    Yields
+    ------
+    tuple[str, Any]
+        Each key and decoded value of the object at ``key``.
+
+    Raises
+    ------
+    ValueError
+        If ``key`` is not found.
+    """
+    reader = _JSONStreamReader(chunks)
+    await reader.expect('{')
+    while await reader.peek() != '}':
+        member_key = await reader.decode_value()
+        await reader.expect(':')
+        if member_key != key:
+            await reader.decode_value()
+            await reader.skip_if(',')
+            continue
+        await reader.expect('{')
+        first = True
+        while await reader.peek() != '}':
+            if not first:
+                await reader.expect(',')
+            first = False
+            name = await reader.decode_value()
+            await reader.expect(':')
+            value = await reader.decode_value()
+            reader.discard_consumed()
+            yield name, value
+        return
+    msg = f'Key {key!r} not found.'
+    raise ValueError(msg)